@@ -2,10 +2,12 @@
 import os
 import re
 import json
+import math
 import urllib.request
 import urllib.parse
 import urllib.error
 import socket
+from concurrent.futures import ThreadPoolExecutor
 
 from lutris import settings
 from lutris.util import resources
@@ -16,6 +18,7 @@ from lutris.util.log import logger
 API_KEY_FILE_PATH = os.path.join(settings.CACHE_DIR, "auth-token")
 USER_INFO_FILE_PATH = os.path.join(settings.CACHE_DIR, "user.json")
 USER_ICON_FILE_PATH = os.path.join(settings.CACHE_DIR, "user.png")
+API_PAGE_WORKERS = 4  # Pages of games fetched at the same time
 
 
 def read_api_key():
@@ -98,7 +101,7 @@ def get_library():
 def get_runners(runner_name):
     """Return the available runners for a given runner name"""
     api_url = settings.SITE_URL + "/api/runners/" + runner_name
-    response = http.Request(api_url).get()
+    response = http.Request(api_url, cache=True).get()
     return response.json
 
 
@@ -116,7 +119,7 @@ def get_game_api_page(game_ids, page="1", query_type="games"):
     if int(page) > 1:
         url += "?page={}".format(page)
 
-    response = http.Request(url, headers={"Content-Type": "application/json"})
+    response = http.Request(url, headers={"Content-Type": "application/json"}, cache=True)
     if game_ids:
         payload = json.dumps({query_type: game_ids, "page": page}).encode("utf-8")
     else:
@@ -139,25 +142,48 @@ def get_game_api_page(game_ids, page="1", query_type="games"):
     return response_data
 
 
+def get_game_api_pages(game_ids, pages, query_type="games"):
+    """Read pages of games from the API, API_PAGE_WORKERS pages at a time,
+    and return their games up to the first page that couldn't be read.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=API_PAGE_WORKERS) as executor:
+        responses = executor.map(
+            lambda page: get_game_api_page(game_ids, page=str(page), query_type=query_type),
+            pages
+        )
+        for page, response_data in zip(pages, responses):
+            if not response_data:
+                logger.warning("Unable to get response for page %s", page)
+                break
+            results += response_data.get("results")
+    return results
+
+
 def get_api_games(game_slugs=None, page="1", query_type="games", inject_aliases=False):
     """Return all games from the Lutris API matching the given game slugs"""
     response_data = get_game_api_page(game_slugs, page=page, query_type=query_type)
     if not response_data:
         return []
     results = response_data.get("results", [])
-    while response_data.get("next"):
-        page_match = re.search(r"page=(\d+)", response_data["next"])
-        if page_match:
-            next_page = page_match.group(1)
-        else:
-            logger.error("No page found in %s", response_data["next"])
-            break
-        response_data = get_game_api_page(game_slugs, page=next_page, query_type=query_type)
-        if not response_data:
-            logger.warning("Unable to get response for page %s", next_page)
-            break
-        else:
-            results += response_data.get("results")
+    if response_data.get("next") and response_data.get("count") and results:
+        # Every page but the last has as many games as this one
+        page_count = math.ceil(response_data["count"] / len(results))
+        results += get_game_api_pages(game_slugs, range(int(page) + 1, page_count + 1), query_type)
+    else:
+        while response_data.get("next"):
+            page_match = re.search(r"page=(\d+)", response_data["next"])
+            if page_match:
+                next_page = page_match.group(1)
+            else:
+                logger.error("No page found in %s", response_data["next"])
+                break
+            response_data = get_game_api_page(game_slugs, page=next_page, query_type=query_type)
+            if not response_data:
+                logger.warning("Unable to get response for page %s", next_page)
+                break
+            else:
+                results += response_data.get("results")
     if game_slugs and inject_aliases:
         matched_games = []
         for game in results:
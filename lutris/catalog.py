@@ -0,0 +1,124 @@
+"""In memory catalog of the games in the library"""
+import threading
+
+from lutris import pga
+
+# Fields of the games table with a lookup index in the catalog
+INDEXED_FIELDS = ("slug", "steamid", "runner", "platform")
+
+# Fields stored as integers by SQLite, values given as strings are converted
+INTEGER_FIELDS = {
+    field["name"] for field in pga.DATABASE["games"] if field["type"] == "INTEGER"
+}
+
+
+def normalize_value(field, value):
+    """Convert a value to the type SQLite would store it as for this field"""
+    if field in INTEGER_FIELDS and isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+class GameCatalog:
+    """Games of the PGA, loaded once and indexed by id, slug, steamid, runner
+    and platform.
+
+    The catalog is kept in sync with the database by the change notifications
+    of the pga module: modified games are reloaded on the next lookup.
+    Returned games are shared and must be treated as read only.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._db_path = None
+        self._games = None
+        self._indexes = {}
+        self._changed_ids = set()
+        pga.GAME_CHANGE_CALLBACKS.append(self.invalidate)
+
+    def invalidate(self, game_ids=None):
+        """Mark games as changed, or the whole catalog if no ids are given"""
+        with self._lock:
+            if game_ids is None:
+                self._games = None
+            elif self._games is not None:
+                self._changed_ids.update(game_ids)
+
+    def _add(self, game):
+        self._games[game["id"]] = game
+        for field in INDEXED_FIELDS:
+            self._indexes[field].setdefault(game[field], {})[game["id"]] = game
+
+    def _remove(self, game_id):
+        game = self._games.pop(game_id, None)
+        if not game:
+            return
+        for field in INDEXED_FIELDS:
+            index = self._indexes[field]
+            del index[game[field]][game_id]
+            if not index[game[field]]:
+                del index[game[field]]
+
+    def _refresh(self):
+        """Load the games if needed and reload the ones that have changed.
+        Must be called with the lock held.
+        """
+        if self._games is None or self._db_path != pga.PGA_DB:
+            self._db_path = pga.PGA_DB
+            self._games = {}
+            self._indexes = {field: {} for field in INDEXED_FIELDS}
+            self._changed_ids.clear()
+            for game in pga.get_games():
+                self._add(game)
+        elif self._changed_ids:
+            changed_ids = self._changed_ids
+            self._changed_ids = set()
+            for game_id in changed_ids:
+                self._remove(game_id)
+            for game in pga.get_games_by_ids(list(changed_ids)):
+                self._add(game)
+
+    def get_game(self, game_id):
+        """Return a game by its id, an empty dict if it doesn't exist"""
+        with self._lock:
+            self._refresh()
+            return self._games.get(int(game_id), {})
+
+    def get_games(self, **conditions):
+        """Return the games whose fields are equal to the given values.
+        Lookups on an indexed field don't go through the whole library.
+        """
+        conditions = {
+            field: normalize_value(field, value) for field, value in conditions.items()
+        }
+        with self._lock:
+            self._refresh()
+            indexed_field = next((field for field in conditions if field in INDEXED_FIELDS), None)
+            if indexed_field:
+                games = self._indexes[indexed_field].get(conditions.pop(indexed_field), {})
+            else:
+                games = self._games
+            return [
+                game for game in games.values()
+                if all(game[field] == value for field, value in conditions.items())
+            ]
+
+    def get_games_with(self, field):
+        """Return the games having a non empty value for an indexed field"""
+        with self._lock:
+            self._refresh()
+            return [
+                game
+                for value, games in self._indexes[field].items()
+                if value not in (None, "")
+                for game in games.values()
+            ]
+
+    def get_values(self, field):
+        """Return the sorted non empty values of an indexed field"""
+        with self._lock:
+            self._refresh()
+            return sorted(value for value in self._indexes[field] if value not in (None, ""))
+
+
+CATALOG = GameCatalog()
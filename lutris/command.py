@@ -1,6 +1,5 @@
 """Threading module, used to launch games while monitoring them."""
 
-import io
 import os
 import sys
 import fcntl
@@ -14,6 +13,7 @@ from gi.repository import GLib
 from lutris import settings
 from lutris import runtime
 from lutris.util.log import logger
+from lutris.util.log_capture import LogCapture
 from lutris.util import system
 
 
@@ -52,6 +52,7 @@ class MonitoredCommand:
             exclude_processes=None,
             log_buffer=None,
             title=None,
+            log_path=None,
     ):  # pylint: disable=too-many-arguments
         self.ready_state = True
         self.env = self.get_environment(env)
@@ -76,13 +77,14 @@ class MonitoredCommand:
 
         self.cwd = self.get_cwd(cwd)
 
-        self._stdout = io.StringIO()
+        self.output = LogCapture(log_path)
 
         self._title = title if title else command[0]
 
     @property
     def stdout(self):
-        return self._stdout.getvalue()
+        """Return the last part of the output, the rest is in the log file"""
+        return self.output.get_text()
 
     @property
     def wrapper_command(self):
@@ -96,7 +98,7 @@ class MonitoredCommand:
         ] + self.include_processes + self.exclude_processes + self.command
 
     def set_log_buffer(self, log_buffer):
-        """Attach a TextBuffer to this command enables the buffer handler"""
+        """Attach a LogBuffer to this command enables the buffer handler"""
         if not log_buffer:
             return
         self.log_buffer = log_buffer
@@ -161,12 +163,12 @@ class MonitoredCommand:
         )
 
     def log_handler_stdout(self, line):
-        """Add the line to this command's stdout attribute"""
-        self._stdout.write(line)
+        """Add the line to this command's output"""
+        self.output.write(line)
 
     def log_handler_buffer(self, line):
         """Add the line to the associated LogBuffer object"""
-        self.log_buffer.insert(self.log_buffer.get_end_iter(), line, -1)
+        self.log_buffer.append(line)
 
     def log_handler_console_output(self, line):  # pylint: disable=no-self-use
         """Print the line to stdout"""
@@ -276,6 +278,7 @@ class MonitoredCommand:
             self.stdout_monitor = None
         else:
             logger.debug("logger already detached")
+        self.output.close()
 
         self.is_running = False
         self.ready_state = False
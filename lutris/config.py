@@ -4,11 +4,25 @@ import os
 import time
 
 from lutris import settings, sysoptions
-from lutris.runners import import_runner, InvalidRunner
+from lutris.runners import get_runner_info, InvalidRunner
 from lutris.util.system import path_exists
-from lutris.util.yaml import read_yaml_from_file, write_yaml_to_file
+from lutris.util.yaml import copy_yaml_data, read_yaml_from_file, write_yaml_to_file
 from lutris.util.log import logger
 
+# Cascaded configs by (level, runner_slug, game_config_id), along with the
+# config levels they were computed from
+_CASCADE_CACHE = {}
+# Default option values by (options_type, runner_slug)
+_DEFAULTS_CACHE = {}
+
+
+def clear_config_caches():
+    """Forget the cascaded configs and defaults computed. Needed when the
+    runners installed change, some defaults depend on them.
+    """
+    _CASCADE_CACHE.clear()
+    _DEFAULTS_CACHE.clear()
+
 
 def make_game_config_id(game_slug):
     """Return an unique config id to avoid clashes between multiple games"""
@@ -122,22 +136,51 @@ class LutrisConfig:
         self.update_raw_config()
 
     def update_cascaded_config(self):
-        if self.system_level.get("system") is None:
-            self.system_level["system"] = {}
+        """Compute the game, runner and system configs from the levels.
+
+        The result is reused by other instances of the same config as long
+        as none of its levels change.
+        """
+        self.fill_levels()
+        cache_key = (self.level, self.runner_slug, self.game_config_id)
+        levels = (self.system_level, self.runner_level, self.game_level)
+        cascaded_configs = (self.system_config, self.runner_config, self.game_config)
+        cached = _CASCADE_CACHE.get(cache_key)
+        if cached and cached[0] == levels:
+            for config, cached_config in zip(cascaded_configs, cached[1]):
+                config.clear()
+                config.update(copy_yaml_data(cached_config))
+            return
+        levels = copy_yaml_data(levels)
+
         self.system_config.clear()
         self.system_config.update(self.get_defaults("system"))
         self.system_config.update(self.system_level.get("system"))
 
         if self.level in ["runner", "game"] and self.runner_slug:
-            if self.runner_level.get(self.runner_slug) is None:
-                self.runner_level[self.runner_slug] = {}
-            if self.runner_level.get("system") is None:
-                self.runner_level["system"] = {}
             self.runner_config.clear()
             self.runner_config.update(self.get_defaults("runner"))
             self.runner_config.update(self.runner_level.get(self.runner_slug))
             self.merge_to_system_config(self.runner_level.get("system"))
 
+        if self.level == "game" and self.runner_slug:
+            self.game_config.clear()
+            self.game_config.update(self.get_defaults("game"))
+            self.game_config.update(self.game_level.get("game"))
+            self.runner_config.update(self.game_level.get(self.runner_slug))
+            self.merge_to_system_config(self.game_level.get("system"))
+
+        _CASCADE_CACHE[cache_key] = (levels, copy_yaml_data(cascaded_configs))
+
+    def fill_levels(self):
+        """Replace the missing sections of the config levels by empty ones"""
+        if self.system_level.get("system") is None:
+            self.system_level["system"] = {}
+        if self.level in ["runner", "game"] and self.runner_slug:
+            if self.runner_level.get(self.runner_slug) is None:
+                self.runner_level[self.runner_slug] = {}
+            if self.runner_level.get("system") is None:
+                self.runner_level["system"] = {}
         if self.level == "game" and self.runner_slug:
             if self.game_level.get("game") is None:
                 self.game_level["game"] = {}
@@ -145,11 +188,6 @@ class LutrisConfig:
                 self.game_level[self.runner_slug] = {}
             if self.game_level.get("system") is None:
                 self.game_level["system"] = {}
-            self.game_config.clear()
-            self.game_config.update(self.get_defaults("game"))
-            self.game_config.update(self.game_level.get("game"))
-            self.runner_config.update(self.game_level.get(self.runner_slug))
-            self.merge_to_system_config(self.game_level.get("system"))
 
     def merge_to_system_config(self, config):
         """Merge a configuration to the system configuation"""
@@ -207,16 +245,21 @@ class LutrisConfig:
 
         logger.debug("Saving %s config to %s", self, config_path)
         write_yaml_to_file(config_path, config)
+        # Other configs cascading from this level are computed again
+        _CASCADE_CACHE.clear()
         self.initialize_config()
 
     def get_defaults(self, options_type):
         """Return a dict of options' default value."""
-        options_dict = self.options_as_dict(options_type)
-        defaults = {}
-        for option, params in options_dict.items():
-            if "default" in params:
-                defaults[option] = params["default"]
-        return defaults
+        cache_key = (options_type, self.runner_slug)
+        if cache_key not in _DEFAULTS_CACHE:
+            options_dict = self.options_as_dict(options_type)
+            defaults = {}
+            for option, params in options_dict.items():
+                if "default" in params:
+                    defaults[option] = params["default"]
+            _DEFAULTS_CACHE[cache_key] = defaults
+        return _DEFAULTS_CACHE[cache_key]
 
     def options_as_dict(self, options_type):
         """Convert the option list to a dict with option name as keys"""
@@ -232,12 +275,9 @@ class LutrisConfig:
             attribute_name = options_type + "_options"
 
             try:
-                runner = import_runner(self.runner_slug)
+                runner_info = get_runner_info(self.runner_slug)
             except InvalidRunner:
                 options = {}
             else:
-                if not getattr(runner, attribute_name):
-                    runner = runner()
-
-                options = getattr(runner, attribute_name)
+                options = getattr(runner_info, attribute_name)
         return dict((opt["option"], opt) for opt in options)
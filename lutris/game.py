@@ -5,27 +5,33 @@ import time
 import shlex
 import subprocess
 
-from gi.repository import GLib, Gtk, GObject
+from gi.repository import GLib, GObject
 
 from lutris import pga
 from lutris import runtime
 from lutris.exceptions import GameConfigError, watch_lutris_errors
 from lutris.util import xdgshortcuts
-from lutris.runners import import_runner, InvalidRunner, wine
+from lutris.runners import import_runner, InvalidRunner
 from lutris.util import audio, jobs, system, strings
 from lutris.util.display import DISPLAY_MANAGER, get_compositor_commands, restore_gamma
 from lutris.util.log import logger
 from lutris.config import LutrisConfig
 from lutris.command import MonitoredCommand
 from lutris.gui import dialogs
+from lutris.gui.widgets.log_text_view import LogBuffer
 from lutris.util.timer import Timer
 from lutris.util.linux import LINUX_SYSTEM
+from lutris.util.wine.wine import get_system_wine_version
 from lutris.util.graphics.xrandr import turn_off_except
 from lutris.discord import DiscordPresence
-from lutris.settings import DEFAULT_DISCORD_CLIENT_ID
+from lutris.settings import DEFAULT_DISCORD_CLIENT_ID, GAME_LOG_PATH
 
 HEARTBEAT_DELAY = 2000
 
+# Messages in the output of a game explaining why it quit
+MISSING_LIBRARY_ERROR = "error while loading shared lib"
+WINESERVER_CONFLICT_ERROR = "maybe the wrong wineserver"
+
 
 class Game(GObject.Object):
     """This class takes cares of loading the configuration for a game
@@ -103,11 +109,11 @@ class Game(GObject.Object):
     def log_buffer(self):
         """Access the log buffer object, creating it if necessary"""
         if self._log_buffer is None:
-            self._log_buffer = Gtk.TextBuffer()
+            self._log_buffer = LogBuffer()
             self._log_buffer.create_tag("warning", foreground="red")
             if self.game_thread:
                 self.game_thread.set_log_buffer(self._log_buffer)
-                self._log_buffer.set_text(self.game_thread.stdout)
+                self._log_buffer.append(self.game_thread.stdout)
         return self._log_buffer
 
     @property
@@ -282,7 +288,7 @@ class Game(GObject.Object):
                 )
         if (
                 "wine" in self.runner_name
-                and not wine.get_system_wine_version()
+                and not get_system_wine_version()
                 and not LINUX_SYSTEM.is_flatpak
         ):
             # TODO find a reference to the root window or better yet a way not
@@ -556,7 +562,10 @@ class Game(GObject.Object):
             log_buffer=self._log_buffer,
             include_processes=self.game_runtime_config["include_processes"],
             exclude_processes=self.game_runtime_config["exclude_processes"],
+            log_path=os.path.join(GAME_LOG_PATH, "%s.log" % (self.slug or self.id)),
         )
+        self.game_thread.output.watch(MISSING_LIBRARY_ERROR)
+        self.game_thread.output.watch(WINESERVER_CONFLICT_ERROR)
         if hasattr(self.runner, "stop"):
             self.game_thread.stop_func = self.runner.stop
         self.game_thread.start()
@@ -665,18 +674,14 @@ class Game(GObject.Object):
     def process_return_codes(self):
         """Do things depending on how the game quitted."""
         if self.game_thread.return_code == 127:
-            # Error missing shared lib
-            error = "error while loading shared lib"
-            error_line = strings.lookup_string_in_text(error, self.game_thread.stdout)
+            error_line = self.game_thread.output.get_match(MISSING_LIBRARY_ERROR)
             if error_line:
                 dialogs.ErrorDialog(
                     "<b>Error: Missing shared library.</b>" "\n\n%s" % error_line
                 )
 
         if self.game_thread.return_code == 1:
-            # Error Wine version conflict
-            error = "maybe the wrong wineserver"
-            if strings.lookup_string_in_text(error, self.game_thread.stdout):
+            if self.game_thread.output.get_match(WINESERVER_CONFLICT_ERROR):
                 dialogs.ErrorDialog(
                     "<b>Error: A different Wine version is "
                     "already using the same Wine prefix.</b>"
@@ -44,12 +44,13 @@ from lutris.util.steam.appmanifest import AppManifest, get_appmanifests
 from lutris.util.steam.config import get_steamapps_paths
 from lutris.util import datapath
 from lutris.util import log
-from lutris.util.jobs import AsyncCall
+from lutris.util.jobs import DEFERRED_TASKS
 from lutris.util.log import logger
 from lutris.util.http import Request, HTTPError
+from lutris.util.profiling import STARTUP_PROFILER
 from lutris.api import parse_installer_url
-from lutris.startup import init_lutris, run_all_checks
-from lutris.util.wine.dxvk import init_dxvk_versions, wait_for_dxvk_init
+from lutris.startup import init_lutris, schedule_all_checks
+from lutris.util.wine.dxvk import wait_for_dxvk_init
 
 from .lutriswindow import LutrisWindow
 
@@ -149,6 +150,10 @@ class Application(Gtk.Application):
             "submit-issue", 0, GLib.OptionFlags.NONE, GLib.OptionArg.NONE,
             _("Submit an issue"), None
         )
+        self.add_main_option(
+            "profile-startup", 0, GLib.OptionFlags.NONE, GLib.OptionArg.NONE,
+            _("Report the time spent in each phase of the startup"), None
+        )
         self.add_main_option(
             GLib.OPTION_REMAINING, 0, GLib.OptionFlags.NONE, GLib.OptionArg.STRING_ARRAY,
             _("uri to open"), "URI",
@@ -165,11 +170,16 @@ class Application(Gtk.Application):
 
     def do_activate(self):
         if not self.window:
-            self.window = LutrisWindow(application=self)
+            with STARTUP_PROFILER.phase("main window"):
+                self.window = LutrisWindow(application=self)
             screen = self.window.props.screen
             Gtk.StyleContext.add_provider_for_screen(
                 screen, self.css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
             )
+            if self.run_in_background:
+                DEFERRED_TASKS.start(STARTUP_PROFILER.report)
+            else:
+                self.window.connect("draw", self.on_window_first_draw)
         if not self.run_in_background:
             self.window.present()
         else:
@@ -177,6 +187,13 @@ class Application(Gtk.Application):
             # accordingly
             self.run_in_background = False
 
+    def on_window_first_draw(self, window, _cairo_context):
+        """Run the deferred startup tasks once the main window is painted"""
+        window.disconnect_by_func(self.on_window_first_draw)
+        STARTUP_PROFILER.mark("first paint")
+        DEFERRED_TASKS.start(STARTUP_PROFILER.report)
+        return False
+
     def show_window(self, window_class, **kwargs):
         """Instanciate a window keeping 1 instance max
 
@@ -215,6 +232,8 @@ class Application(Gtk.Application):
         argc = len(sys.argv) - 1
         if "-d" in sys.argv or "--debug" in sys.argv:
             argc -= 1
+        if "--profile-startup" in sys.argv:
+            argc -= 1
         if not argc:
             # Switch back the log output to stderr (the default in Python)
             # to avoid messing with any output from command line options.
@@ -243,9 +262,9 @@ class Application(Gtk.Application):
             return 0
 
         logger.info("Running Lutris %s", settings.VERSION)
-        migrate()
-        run_all_checks()
-        AsyncCall(init_dxvk_versions)
+        with STARTUP_PROFILER.phase("migrations"):
+            migrate()
+        schedule_all_checks()
 
         # List game
         if options.contains("list-games"):
@@ -4,7 +4,9 @@ import random
 
 from gi.repository import GLib, Gtk
 from lutris import api, settings
+from lutris.config import clear_config_caches
 from lutris.gui.dialogs import Dialog, ErrorDialog, QuestionDialog
+from lutris.runners import clear_runner_info
 from lutris.util import jobs, system
 from lutris.util.downloader import Downloader
 from lutris.util.extract import extract_archive
@@ -168,6 +170,8 @@ class RunnerInstallDialog(Dialog):
             from lutris.util.wine.wine import get_wine_versions
 
             get_wine_versions.cache_clear()
+            clear_runner_info(self.runner)
+            clear_config_caches()
 
     def install_runner(self, row):
         url = row[2]
@@ -230,6 +234,8 @@ class RunnerInstallDialog(Dialog):
             from lutris.util.wine.wine import get_wine_versions
 
             get_wine_versions.cache_clear()
+            clear_runner_info(self.runner)
+            clear_config_caches()
 
     def on_destroy(self, _dialog, _data=None):
         """Override delete handler to prevent closing while downloads are active"""
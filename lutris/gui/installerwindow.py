@@ -16,7 +16,7 @@ from lutris.gui.dialogs import (
 from lutris.gui.widgets.download_progress import DownloadProgressBox
 from lutris.gui.widgets.common import FileChooserEntry, InstallerLabel
 from lutris.gui.widgets.installer import InstallerPicker
-from lutris.gui.widgets.log_text_view import LogTextView
+from lutris.gui.widgets.log_text_view import LogBuffer, LogTextView
 from lutris.gui.widgets.window import BaseApplicationWindow
 
 from lutris.util import jobs
@@ -309,12 +309,21 @@ class InstallerWindow(BaseApplicationWindow):
         self.interpreter.file_selected(file_path)
 
     def start_download(
-        self, file_uri, dest_file, callback=None, data=None, referer=None
-    ):
+        self,
+        file_uri,
+        dest_file,
+        callback=None,
+        data=None,
+        referer=None,
+        hash_type=None,
+        downloader=None,
+    ):  # pylint: disable=too-many-arguments
         self.clean_widgets()
         logger.debug("Downloading %s to %s", file_uri, dest_file)
         self.download_progress = DownloadProgressBox(
-            {"url": file_uri, "dest": dest_file, "referer": referer}, cancelable=True
+            {"url": file_uri, "dest": dest_file, "referer": referer, "hash_type": hash_type},
+            cancelable=True,
+            downloader=downloader
         )
         self.download_progress.cancel_button.hide()
         self.download_progress.connect("complete", self.on_download_complete, callback, data)
@@ -323,9 +332,32 @@ class InstallerWindow(BaseApplicationWindow):
         self.download_progress.start()
         self.interpreter.abort_current_task = self.download_progress.cancel
 
-    def on_download_complete(self, _widget, _data, callback=None, callback_data=None):
+    def start_downloads(self, download_queue):
+        """Download the files of a DownloadQueue, showing their total progress"""
+        self.clean_widgets()
+        logger.debug("Downloading %d files", len(download_queue))
+        self.download_progress = DownloadProgressBox(
+            {"title": "Downloading %d files" % len(download_queue)},
+            cancelable=True,
+            downloader=download_queue
+        )
+        self.download_progress.cancel_button.hide()
+        self.download_progress.connect(
+            "complete", self.on_downloads_complete, download_queue.callbacks
+        )
+        self.widget_box.pack_start(self.download_progress, False, False, 10)
+        self.download_progress.show()
+        self.download_progress.start()
+        self.interpreter.abort_current_task = self.download_progress.cancel
+
+    def on_download_complete(self, widget, data, callback=None, callback_data=None):
         """Action called on a completed download."""
-        if callback:
+        callbacks = [(callback, callback_data)] if callback else []
+        self.on_downloads_complete(widget, data, callbacks)
+
+    def on_downloads_complete(self, _widget, _data, callbacks):
+        """Action called once all the files of a download are completed."""
+        for callback, callback_data in callbacks:
             try:
                 callback_data = callback_data or {}
                 callback(**callback_data)
@@ -525,8 +557,8 @@ class InstallerWindow(BaseApplicationWindow):
         spinner.start()
 
     def attach_logger(self, command):
-        """Creates a TextBuffer and attach it to a command"""
-        self.log_buffer = Gtk.TextBuffer()
+        """Creates a LogBuffer and attach it to a command"""
+        self.log_buffer = LogBuffer()
         command.set_log_buffer(self.log_buffer)
         self.log_textview = LogTextView(self.log_buffer)
         scrolledwindow = Gtk.ScrolledWindow(
@@ -6,6 +6,7 @@ from collections import namedtuple
 from gi.repository import Gtk, Gdk, GLib, Gio, GObject
 
 from lutris import api, pga, settings
+from lutris.catalog import CATALOG
 from lutris.game import Game
 from lutris.game_actions import GameActions
 from lutris.sync import sync_from_remote
@@ -374,7 +375,7 @@ class LutrisWindow(Gtk.ApplicationWindow):
 
     def get_store(self, games=None):
         """Return an instance of GameStore"""
-        games = games or pga.get_games(show_installed_first=self.show_installed_first)
+        games = games or CATALOG.get_games()
         game_store = GameStore(
             games,
             self.icon_type,
@@ -418,7 +419,7 @@ class LutrisWindow(Gtk.ApplicationWindow):
         #     self.running_game.notify_steam_game_changed(appmanifest)
 
         runner_name = appmanifest.get_runner_name()
-        games = pga.get_games_where(steamid=appmanifest.steamid)
+        games = CATALOG.get_games(steamid=appmanifest.steamid)
         if operation == Gio.FileMonitorEvent.DELETED:
             for game in games:
                 if game["runner"] == runner_name:
@@ -683,7 +684,7 @@ class LutrisWindow(Gtk.ApplicationWindow):
 
     def invalidate_game_filter(self):
         """Refilter the game view based on current filters"""
-        self.game_store.modelfilter.refilter()
+        self.game_store.refilter()
         self.game_store.modelsort.clear_cache()
         self.game_store.sort_view(self.view_sorting, self.view_sorting_ascending)
         self.no_results_overlay.props.visible = not bool(self.game_store.games)
@@ -697,7 +698,7 @@ class LutrisWindow(Gtk.ApplicationWindow):
         """Shows the installed games first in the view"""
         settings.write_setting("show_installed_first", bool(show_installed_first))
         self.game_store.sort_view(show_installed_first)
-        self.game_store.modelfilter.refilter()
+        self.game_store.refilter()
 
     def on_show_installed_state_change(self, action, value):
         """Callback to handle uninstalled game filter switch"""
@@ -831,7 +832,7 @@ class LutrisWindow(Gtk.ApplicationWindow):
         self.game_selection_changed(panel, None)
 
     def update_game(self, slug):
-        for pga_game in pga.get_games_where(slug=slug):
+        for pga_game in CATALOG.get_games(slug=slug):
             self.game_store.update(pga_game)
 
     @GtkTemplate.Callback
@@ -0,0 +1,177 @@
+"""Index used to filter the games of the library view"""
+import unicodedata
+
+MAX_SEARCHES = 32  # Recent searches whose matches are kept
+
+
+def normalize_name(name):
+    """Return a game name in the form it is searched in: case folded and
+    without accents.
+    """
+    name = unicodedata.normalize("NFKD", name or "")
+    return "".join(char for char in name if not unicodedata.combining(char)).casefold()
+
+
+def get_trigrams(text):
+    """Return the set of 3 characters sequences of a text"""
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+def make_bitset(positions, size):
+    """Return an integer with the bits at `positions` set, all lower than
+    `size`. Faster than setting the bits one by one on large integers.
+    """
+    bits = bytearray(b"0" * (size + 1))
+    for position in positions:
+        bits[size - position] = ord("1")
+    return int(bits, 2)
+
+
+def iter_bits(bitset):
+    """Yield the positions of the bits set in an integer"""
+    bits = bin(bitset)[:1:-1]
+    position = bits.find("1")
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
+
+class GameFilterIndex:
+    """Runners, platforms, installed state and names of the games of a view,
+    to find the games matching the filters without going through all of them.
+
+    Each game is given a slot, and the games sharing a runner, a platform,
+    the installed state or a trigram of their name are stored as bitsets of
+    their slots. Name searches intersect the bitsets of the trigrams of the
+    searched text and check the candidates. The matches of recent searches
+    are kept: when a search refines one of them, only its matches are
+    checked.
+    """
+
+    def __init__(self):
+        self.slots = {}  # Slots of the games by key
+        self.keys = []  # Keys of the games by slot, None for free slots
+        self.games = []  # Normalized name, runner, platform and installed state by slot
+        self.free_slots = []
+        self.all = 0
+        self.installed = 0
+        self.runners = {}
+        self.platforms = {}
+        self.trigrams = {}
+        self._searches = {}  # Matches of the recent name searches
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    def add(self, key, name, runner, platform, installed):
+        """Add a game, or update it if `key` is already in the index"""
+        if key in self.slots:
+            self.remove(key)
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.keys[slot] = key
+        else:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.games.append(None)
+        self.slots[key] = slot
+        name = normalize_name(name)
+        self.games[slot] = (name, runner, platform, bool(installed))
+        bit = 1 << slot
+        self.all |= bit
+        if installed:
+            self.installed |= bit
+        self.runners[runner] = self.runners.get(runner, 0) | bit
+        self.platforms[platform] = self.platforms.get(platform, 0) | bit
+        for trigram in get_trigrams(name):
+            self.trigrams[trigram] = self.trigrams.get(trigram, 0) | bit
+        self._searches.clear()
+
+    def remove(self, key):
+        """Remove a game from the index"""
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return
+        name, runner, platform, _installed = self.games[slot]
+        mask = ~(1 << slot)
+        self.all &= mask
+        self.installed &= mask
+        self._clear_bit(self.runners, runner, mask)
+        self._clear_bit(self.platforms, platform, mask)
+        for trigram in get_trigrams(name):
+            self._clear_bit(self.trigrams, trigram, mask)
+        self.keys[slot] = None
+        self.games[slot] = None
+        self.free_slots.append(slot)
+        self._searches.clear()
+
+    @staticmethod
+    def _clear_bit(bitsets, value, mask):
+        bitset = bitsets[value] & mask
+        if bitset:
+            bitsets[value] = bitset
+        else:
+            del bitsets[value]
+
+    def search(self, text=None, runner=None, platform=None, installed=False):
+        """Return the bitset of the games matching the filters"""
+        matches = self.all
+        if installed:
+            matches &= self.installed
+        if runner:
+            matches &= self.runners.get(runner, 0)
+        if platform:
+            matches &= self.platforms.get(platform, 0)
+        if text:
+            matches &= self.search_name(text)
+        return matches
+
+    def search_name(self, text):
+        """Return the bitset of the games whose name contains `text`"""
+        text = normalize_name(text)
+        if text in self._searches:
+            return self._searches[text]
+        # When the text refines a recent search, only its matches can match
+        refined = [search for search in self._searches if search in text]
+        if refined:
+            candidates = self._searches[max(refined, key=len)]
+        else:
+            candidates = self.all
+            for trigram in get_trigrams(text):
+                candidates &= self.trigrams.get(trigram, 0)
+                if not candidates:
+                    break
+        games = self.games
+        matches = make_bitset(
+            (slot for slot in iter_bits(candidates) if text in games[slot][0]),
+            len(games)
+        )
+        if len(self._searches) >= MAX_SEARCHES:
+            del self._searches[next(iter(self._searches))]
+        self._searches[text] = matches
+        return matches
+
+    def get_bit(self, key):
+        """Return the bitset of a single game, 0 if it isn't indexed"""
+        slot = self.slots.get(key)
+        return 0 if slot is None else 1 << slot
+
+    def is_match(self, key, text=None, runner=None, platform=None, installed=False):
+        """Return whether the game with `key` matches the filters"""
+        name, game_runner, game_platform, game_installed = self.games[self.slots[key]]
+        if installed and not game_installed:
+            return False
+        if runner and runner != game_runner:
+            return False
+        if platform and platform != game_platform:
+            return False
+        if text and normalize_name(text) not in name:
+            return False
+        return True
+
+    def get_keys(self, bitset):
+        """Return the keys of the games in a bitset"""
+        return [self.keys[slot] for slot in iter_bits(bitset)]
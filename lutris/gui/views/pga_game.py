@@ -1,24 +1,21 @@
 """Game representation for views"""
 import time
 from lutris import runners
-from lutris.game import Game
 from lutris.util.log import logger
 from lutris.util.strings import gtk_safe, get_formatted_playtime
-from lutris.gui.widgets.utils import get_pixbuf_for_game
 
 
 class PgaGame:
     """Representation of a game for views
+    Only wraps the PGA data, runner details come from the shared runner infos.
     TODO: Fix overlap with Game class
     """
+    __slots__ = ("_pga_data", )
+
     def __init__(self, pga_data):
         if not pga_data:
             raise RuntimeError("No game data provided")
         self._pga_data = pga_data
-        self.runner_names = {
-            runner: runners.import_runner(runner).human_name
-            for runner in runners.__all__
-        }
 
     def __str__(self):
         return self.name
@@ -54,21 +51,23 @@ class PgaGame:
     @property
     def runner_text(self):
         """Runner name"""
-        return gtk_safe(self.runner_names.get(self.runner))
+        return gtk_safe(runners.get_runner_human_name(self._pga_data["runner"]))
 
     @property
     def platform(self):
         """Platform"""
         _platform = self._pga_data["platform"]
         if not _platform and self.installed:
-            game_inst = Game(self._pga_data["id"])
-            if game_inst.platform:
-                _platform = game_inst.platform
+            # Missing platforms are saved by startup.fill_missing_platforms,
+            # in the meantime use the runner's platform if it only has one.
+            try:
+                runner_platforms = runners.get_runner_platforms(self._pga_data["runner"])
+            except runners.InvalidRunner:
+                runner_platforms = ()
+            if len(runner_platforms) == 1:
+                _platform = runner_platforms[0]
             else:
                 logger.debug("Game %s has no platform", self)
-                # Save the game, which will call `set_platform_from_runner`
-                game_inst.save()
-                _platform = game_inst.platform
         return _platform
 
     @property
@@ -78,14 +77,6 @@ class PgaGame:
             return False
         return self._pga_data["installed"]
 
-    def get_pixbuf(self, icon_type):
-        """Pixbuf varying on icon type"""
-        return get_pixbuf_for_game(
-            self._pga_data["slug"],
-            icon_type,
-            self._pga_data["installed"]
-        )
-
     @property
     def installed_at(self):
         """Date of install"""
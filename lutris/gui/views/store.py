@@ -4,13 +4,15 @@ import concurrent.futures
 from gi.repository import Gtk, GObject, GLib
 from gi.repository.GdkPixbuf import Pixbuf
 from lutris import pga
-from lutris.gui.widgets.utils import get_pixbuf_for_game
+from lutris.catalog import CATALOG
+from lutris.gui.widgets.utils import PIXBUF_LOADER
 from lutris.util.resources import get_icon_path, download_media, update_desktop_icons
 from lutris.util.log import logger
 from lutris.util import system
 from lutris import api
 from lutris.util.jobs import AsyncCall
 from lutris.gui.views.pga_game import PgaGame
+from lutris.gui.views.filter_index import GameFilterIndex
 from . import (
     COL_ID,
     COL_SLUG,
@@ -27,6 +29,7 @@ from . import (
     COL_INSTALLED_AT_TEXT,
     COL_PLAYTIME,
     COL_PLAYTIME_TEXT,
+    COL_VISIBLE,
 )
 
 
@@ -96,12 +99,13 @@ class GameStore(GObject.Object):
             show_installed_first=False,
     ):
         super(GameStore, self).__init__()
-        self.games = games or pga.get_games(show_installed_first=show_installed_first)
+        self.games = games or CATALOG.get_games()
         if not show_hidden_games:
             # Check if the PGA contains game IDs that the user does not
             # want to see
+            hidden_ids = pga.get_hidden_id_set()
             self.games = [
-                game for game in self.games if game["id"] not in pga.get_hidden_ids()
+                game for game in self.games if game["id"] not in hidden_ids
             ]
 
         self.search_mode = False
@@ -112,6 +116,12 @@ class GameStore(GObject.Object):
         self.filter_text = None
         self.filter_runner = None
         self.filter_platform = None
+        # Iters of the rows by game id and by slug, ListStore iters stay
+        # valid until their row is removed.
+        self.row_iters = {}
+        self.slug_iters = {}
+        # Callbacks of the images being loaded, by game id or slug
+        self.icon_callbacks = {}
         self.store = Gtk.ListStore(
             int,
             str,
@@ -128,7 +138,12 @@ class GameStore(GObject.Object):
             str,
             float,
             str,
+            bool,
         )
+        # Rows are shown according to their visible column, which is only
+        # changed for the games entering or leaving the filters.
+        self.filter_index = GameFilterIndex()
+        self.visible_games = 0  # Bitset of the games shown, by index slot
         sort_col = COL_NAME
         if show_installed_first:
             sort_col = COL_INSTALLED
@@ -137,7 +152,7 @@ class GameStore(GObject.Object):
             self.store.set_sort_column_id(sort_col, Gtk.SortType.ASCENDING)
         self.prevent_sort_update = False  # prevent recursion with signals
         self.modelfilter = self.store.filter_new()
-        self.modelfilter.set_visible_func(self.filter_view)
+        self.modelfilter.set_visible_column(COL_VISIBLE)
         try:
             self.modelsort = Gtk.TreeModelSort.sort_new_with_model(self.modelfilter)
         except AttributeError:
@@ -226,27 +241,40 @@ class GameStore(GObject.Object):
         self.media_loaded = True
         self.emit("media-loaded")
 
-    def filter_view(self, model, _iter, _filter_data=None):
-        """Filter function for the game model"""
-        if self.search_mode:
+    def get_filters(self):
+        return {
+            "text": self.filter_text,
+            "runner": self.filter_runner,
+            "platform": self.filter_platform,
+            "installed": self.filter_installed,
+        }
+
+    def index_game(self, game, name):
+        """Add or update a game in the filter index, return whether it is
+        shown with the current filters.
+        """
+        self.visible_games &= ~self.filter_index.get_bit(game.id)
+        self.filter_index.add(game.id, name, game.runner, game.platform, game.installed)
+        if self.search_mode or self.filter_index.is_match(game.id, **self.get_filters()):
+            self.visible_games |= self.filter_index.get_bit(game.id)
             return True
-        if self.filter_installed:
-            installed = model.get_value(_iter, COL_INSTALLED)
-            if not installed and not self.search_mode:
-                return False
-        if self.filter_text:
-            name = model.get_value(_iter, COL_NAME)
-            if not self.filter_text.lower() in name.lower():
-                return False
-        if self.filter_runner:
-            runner = model.get_value(_iter, COL_RUNNER)
-            if not self.filter_runner == runner:
-                return False
-        if self.filter_platform:
-            platform = model.get_value(_iter, COL_PLATFORM)
-            if platform != self.filter_platform:
-                return False
-        return True
+        return False
+
+    def refilter(self):
+        """Show the games matching the filters. Only the rows of the games
+        whose visibility changes are updated.
+        """
+        if self.search_mode:
+            matches = self.filter_index.all
+        else:
+            matches = self.filter_index.search(**self.get_filters())
+        changed = matches ^ self.visible_games
+        self.visible_games = matches
+        for game_id in self.filter_index.get_keys(changed):
+            store_iter = self.row_iters.get(game_id)
+            if store_iter:
+                visible = bool(matches & self.filter_index.get_bit(game_id))
+                self.store.set_value(store_iter, COL_VISIBLE, visible)
 
     def sort_view(self, key="name", ascending=True):
         """Sort the model on a given column name"""
@@ -274,13 +302,16 @@ class GameStore(GObject.Object):
         self.emit("sorting-changed", key, ascending)
 
     def get_row_by_id(self, game_id, filtered=False):
-        if filtered:
-            store = self.modelsort
-        else:
-            store = self.store
-        for model_row in store:
-            if model_row[COL_ID] == int(game_id):
-                return model_row
+        store_iter = self.row_iters.get(int(game_id))
+        if not store_iter:
+            return None
+        if not filtered:
+            return self.store[store_iter]
+        is_visible, filter_iter = self.modelfilter.convert_child_iter_to_iter(store_iter)
+        if not is_visible:
+            return None
+        _is_sorted, sort_iter = self.modelsort.convert_child_iter_to_iter(filter_iter)
+        return self.modelsort[sort_iter]
 
     def get_row_by_slug(self, slug):
         """Return a row by its slug.
@@ -288,27 +319,28 @@ class GameStore(GObject.Object):
         """
         if not self.search_mode:
             raise RuntimeError("get_row_by_slug can only be used with search_mode")
-        for model_row in self.store:
-            if model_row[COL_SLUG] == slug:
-                return model_row
+        store_iter = self.slug_iters.get(slug)
+        if store_iter:
+            return self.store[store_iter]
 
     def remove_game(self, game_id):
         """Remove a game from the view."""
-        game_index = 0
         for index, game in enumerate(self.games):
             if game["id"] == game_id:
-                game_index = index
+                self.games.pop(index)
                 break
-        if game_index:
-            self.games.pop(game_index)
         else:
             logger.warning("Can't find game %s in game list", game_id)
         row = self.get_row_by_id(game_id)
+        self.visible_games &= ~self.filter_index.get_bit(game_id)
+        self.filter_index.remove(game_id)
         if row:
+            del self.row_iters[row[COL_ID]]
+            self.slug_iters.pop(row[COL_SLUG], None)
             self.store.remove(row.iter)
 
     def update_game_by_id(self, game_id):
-        pga_game = pga.get_game_by_field(game_id, "id")
+        pga_game = CATALOG.get_game(game_id)
         if pga_game:
             return self.update(pga_game)
         return self.remove_game(game_id)
@@ -325,7 +357,7 @@ class GameStore(GObject.Object):
         row[COL_ID] = game.id
         row[COL_SLUG] = game.slug
         row[COL_NAME] = game.name
-        row[COL_ICON] = game.get_pixbuf(self.icon_type)
+        row[COL_ICON] = self.get_icon(game.id, pga_game["slug"], pga_game["installed"])
         row[COL_YEAR] = game.year
         row[COL_RUNNER] = game.runner
         row[COL_RUNNER_HUMAN_NAME] = game.runner_text
@@ -337,6 +369,7 @@ class GameStore(GObject.Object):
         row[COL_INSTALLED_AT_TEXT] = game.installed_at_text
         row[COL_PLAYTIME] = game.playtime
         row[COL_PLAYTIME_TEXT] = game.playtime_text
+        row[COL_VISIBLE] = self.index_game(game, pga_game["name"])
         if not self.has_icon(game.slug):
             self.refresh_icon(game.slug)
 
@@ -352,13 +385,34 @@ class GameStore(GObject.Object):
         if self.search_mode:
             GLib.idle_add(self.update_icon, game_slug)
             return
-        for pga_game in pga.get_games_by_slug(game_slug):
+        for pga_game in CATALOG.get_games(slug=game_slug):
             logger.debug("Updating %s", pga_game["id"])
             GLib.idle_add(self.update, pga_game)
 
     def update_icon(self, game_slug):
         row = self.get_row_by_slug(game_slug)
-        row[COL_ICON] = get_pixbuf_for_game(game_slug, self.icon_type, True)
+        row[COL_ICON] = self.get_icon(row[COL_ID], game_slug, True)
+
+    def get_icon(self, game_id, game_slug, is_installed):
+        """Return the pixbuf of a game for the current icon type. Images not
+        loaded yet are decoded in the background and set on the game's row
+        when ready, a placeholder is returned in the meantime.
+        """
+        row_key = game_slug if self.search_mode else game_id
+
+        def on_icon_loaded(pixbuf):
+            # Only the last image requested for a row is set on it
+            if self.icon_callbacks.get(row_key) is not on_icon_loaded:
+                return
+            del self.icon_callbacks[row_key]
+            if self.search_mode:
+                store_iter = self.slug_iters.get(game_slug)
+            else:
+                store_iter = self.row_iters.get(game_id)
+            if store_iter:
+                self.store.set_value(store_iter, COL_ICON, pixbuf)
+        self.icon_callbacks[row_key] = on_icon_loaded
+        return PIXBUF_LOADER.get_pixbuf(game_slug, self.icon_type, is_installed, on_icon_loaded)
 
     def fetch_icon(self, slug):
         if not self.media_loaded:
@@ -408,7 +462,8 @@ class GameStore(GObject.Object):
             update_desktop_icons()
 
     def add_games_by_ids(self, game_ids):
-        self.add_games(pga.get_games_by_ids(game_ids))
+        games = [CATALOG.get_game(game_id) for game_id in game_ids]
+        self.add_games([game for game in games if game])
 
     def add_game_by_id(self, game_id):
         """Add a game into the store."""
@@ -418,12 +473,12 @@ class GameStore(GObject.Object):
         """Add a PGA game to the store"""
         game = PgaGame(pga_game)
         self.games.append(pga_game)
-        self.store.append(
+        store_iter = self.store.append(
             (
                 game.id,
                 game.slug,
                 game.name,
-                game.get_pixbuf(self.icon_type),
+                self.get_icon(game.id, pga_game["slug"], pga_game["installed"]),
                 game.year,
                 game.runner,
                 game.runner_text,
@@ -435,8 +490,11 @@ class GameStore(GObject.Object):
                 game.installed_at_text,
                 game.playtime,
                 game.playtime_text,
+                self.index_game(game, pga_game["name"]),
             )
         )
+        self.row_iters[game.id] = store_iter
+        self.slug_iters[game.slug] = store_iter
         if not self.has_icon(game.slug):
             self.refresh_icon(game.slug)
 
@@ -451,10 +509,13 @@ class GameStore(GObject.Object):
         if icon_type == self.icon_type:
             return
         self.icon_type = icon_type
+        # Images of the previous icon type still queued aren't needed anymore
+        PIXBUF_LOADER.cancel(self.icon_callbacks.values())
+        self.icon_callbacks.clear()
         for row in self.store:
-            row[COL_ICON] = get_pixbuf_for_game(
+            row[COL_ICON] = self.get_icon(
+                row[COL_ID],
                 row[COL_SLUG],
-                icon_type,
-                is_installed=row[COL_INSTALLED] if not self.search_mode else True,
+                row[COL_INSTALLED] if not self.search_mode else True,
             )
         self.emit("icons-changed", icon_type)
@@ -18,6 +18,7 @@ class DownloadProgressBox(Gtk.Box):
         self.url = params.get("url")
         self.dest = params.get("dest")
         self.referer = params.get("referer")
+        self.hash_type = params.get("hash_type")
         title = params.get("title", "Downloading {}".format(self.url))
 
         self.main_label = Gtk.Label(title)
@@ -56,7 +57,11 @@ class DownloadProgressBox(Gtk.Box):
         if not self.downloader:
             try:
                 self.downloader = Downloader(
-                    self.url, self.dest, referer=self.referer, overwrite=True
+                    self.url,
+                    self.dest,
+                    referer=self.referer,
+                    overwrite=True,
+                    hash_type=self.hash_type,
                 )
             except RuntimeError as ex:
                 from lutris.gui.dialogs import ErrorDialog
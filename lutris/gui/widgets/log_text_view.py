@@ -1,4 +1,61 @@
-from gi.repository import Gtk
+import threading
+
+from gi.repository import GLib, Gtk
+
+from lutris.util.log_capture import LogLines
+
+# Delay in milliseconds between two updates of a log buffer
+FLUSH_INTERVAL = 100
+
+# Lines shown in a log buffer, older lines are removed
+MAX_LINES = 10000
+
+
+class LogBuffer(Gtk.TextBuffer):
+    """Text buffer receiving the output of a command.
+
+    Text can be appended from any thread, it is added to the buffer in a
+    single insert at most every FLUSH_INTERVAL milliseconds. The buffer keeps
+    its last `max_lines` lines.
+    """
+
+    def __init__(self, max_lines=MAX_LINES):
+        super().__init__()
+        self.lines = LogLines(max_lines)
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.flush_source = None
+
+    def append(self, text):
+        """Queue text to add at the end of the buffer"""
+        with self.pending_lock:
+            self.pending.append(text)
+            if not self.flush_source:
+                self.flush_source = GLib.timeout_add(FLUSH_INTERVAL, self.flush)
+
+    def flush(self):
+        """Add the queued text to the buffer"""
+        with self.pending_lock:
+            text = "".join(self.pending)
+            self.pending = []
+            self.flush_source = None
+        removed_lines, text = self.lines.append(text)
+        if removed_lines is None:
+            self.set_text(text)
+            return False
+        if removed_lines:
+            self.delete(self.get_start_iter(), self.get_iter_at_line(removed_lines))
+        self.insert(self.get_end_iter(), text, -1)
+        return False
+
+    def find(self, string, buffer_iter, backwards=False):
+        """Return the start and end iters of the next occurrence of `string`
+        after `buffer_iter`, or the previous one before it.
+        """
+        offset = self.lines.find(string, buffer_iter.get_offset(), backwards)
+        if offset is None:
+            return None
+        return self.get_iter_at_offset(offset), self.get_iter_at_offset(offset + len(string))
 
 
 class LogTextView(Gtk.TextView):
@@ -12,6 +69,7 @@ class LogTextView(Gtk.TextView):
         self.set_monospace(True)
         self.set_left_margin(10)
         self.scroll_max = 0
+        self.scroll_size = None
         self.set_wrap_mode(Gtk.WrapMode.CHAR)
         self.get_style_context().add_class("lutris-logview")
 
@@ -22,6 +80,11 @@ class LogTextView(Gtk.TextView):
 
     def autoscroll(self, *args):
         adj = self.get_vadjustment()
+        # Nothing to do if neither the text nor the view changed size
+        scroll_size = (adj.get_upper(), adj.get_page_size())
+        if scroll_size == self.scroll_size:
+            return
+        self.scroll_size = scroll_size
         if adj.get_value() == self.scroll_max or self.scroll_max == 0:
             adj.set_value(adj.get_upper() - adj.get_page_size())
             self.scroll_max = adj.get_value()
@@ -44,19 +107,26 @@ class LogTextView(Gtk.TextView):
         self.reset_search()
         self.find_next(searched_entry)
 
+    def search(self, text, buffer_iter, backwards=False):
+        """Return the bounds of the next or previous occurrence of `text`,
+        starting over from the other end of the buffer if needed.
+        """
+        if isinstance(self.props.buffer, LogBuffer):
+            return self.props.buffer.find(text, buffer_iter, backwards)
+        flags = Gtk.TextSearchFlags.CASE_INSENSITIVE
+        if backwards:
+            occurence = buffer_iter.backward_search(text, flags, None)
+            if occurence is None:
+                occurence = self.props.buffer.get_end_iter().backward_search(text, flags, None)
+        else:
+            occurence = buffer_iter.forward_search(text, flags, None)
+            if occurence is None:
+                occurence = self.props.buffer.get_start_iter().forward_search(text, flags, None)
+        return occurence
+
     def find_next(self, searched_entry):
         buffer_iter = self.props.buffer.get_iter_at_mark(self.mark)
-        next_occurence = buffer_iter.forward_search(
-            searched_entry.get_text(),
-            Gtk.TextSearchFlags.CASE_INSENSITIVE,
-            None)
-
-        # Found nothing try from the beginning
-        if next_occurence is None:
-            next_occurence = self.props.buffer.get_start_iter().forward_search(
-                searched_entry.get_text(),
-                Gtk.TextSearchFlags.CASE_INSENSITIVE,
-                None)
+        next_occurence = self.search(searched_entry.get_text(), buffer_iter)
 
         # Highlight if result
         if next_occurence is not None:
@@ -69,17 +139,7 @@ class LogTextView(Gtk.TextView):
         buffer_iter = self.props.buffer.get_iter_at_mark(self.mark)
         buffer_iter.backward_chars(len(searched_entry.get_text()))
 
-        previous_occurence = buffer_iter.backward_search(
-            searched_entry.get_text(),
-            Gtk.TextSearchFlags.CASE_INSENSITIVE,
-            None)
-
-        # Found nothing ? Try from the end
-        if previous_occurence is None:
-            previous_occurence = self.props.buffer.get_end_iter().backward_search(
-                searched_entry.get_text(),
-                Gtk.TextSearchFlags.CASE_INSENSITIVE,
-                None)
+        previous_occurence = self.search(searched_entry.get_text(), buffer_iter, backwards=True)
 
         # Highlight if result
         if previous_occurence is not None:
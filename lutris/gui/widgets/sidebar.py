@@ -4,7 +4,7 @@ from gi.repository import Gtk, Pango, GObject
 
 from lutris import runners
 from lutris import platforms
-from lutris import pga
+from lutris.catalog import CATALOG
 from lutris.game import Game
 from lutris.util import datapath
 from lutris.gui.config.runner import RunnerConfigDialog
@@ -134,7 +134,7 @@ class SidebarListBox(Gtk.ListBox):
         super().__init__()
         self.get_style_context().add_class("sidebar")
         self.installed_runners = []
-        self.active_platforms = pga.get_used_platforms()
+        self.active_platforms = CATALOG.get_values("platform")
         self.runners = sorted(runners.__all__)
         self.platforms = sorted(platforms.__all__)
 
@@ -156,7 +156,7 @@ class SidebarListBox(Gtk.ListBox):
             icon = Gtk.Image.new_from_icon_name(
                 runner.lower().replace(" ", "") + "-symbolic", Gtk.IconSize.MENU
             )
-            name = runners.import_runner(runner).human_name
+            name = runners.get_runner_human_name(runner)
             self.add(SidebarRow(runner, "runner", name, icon))
 
         self.add(SidebarRow(None, "platform", "All", None))
@@ -196,6 +196,9 @@ class SidebarListBox(Gtk.ListBox):
             row.set_header(SidebarHeader("Platforms"))
 
     def update(self, *args):
-        self.installed_runners = [runner.name for runner in runners.get_installed()]
-        self.active_platforms = pga.get_used_platforms()
+        self.installed_runners = [
+            runner_name for runner_name in runners.__all__
+            if runners.is_runner_installed(runner_name)
+        ]
+        self.active_platforms = CATALOG.get_values("platform")
         self.invalidate_filter()
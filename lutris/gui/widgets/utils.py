@@ -1,6 +1,10 @@
 """Various utilities using the GObject framework"""
 import os
 import array
+import functools
+import threading
+import concurrent.futures
+from collections import OrderedDict
 try:
     from PIL import Image
 except ImportError:
@@ -18,6 +22,9 @@ BANNER_SIZE = (184, 69)
 BANNER_SMALL_SIZE = (120, 45)
 ICON_SIZE = (32, 32)
 ICON_SMALL_SIZE = (20, 20)
+PIXBUF_CACHE_SIZE = 64 * 1024 * 1024  # Decoded pixels kept in memory, in bytes
+PIXBUF_LOADER_THREADS = 4
+THUMBNAIL_PATH = os.path.join(settings.CACHE_DIR, "thumbnails")
 
 
 IMAGE_SIZES = {
@@ -100,7 +107,11 @@ def get_icon(icon_name, format="image", size=None, icon_type="runner"):
     raise ValueError("Invalid arguments")
 
 
+@functools.lru_cache(maxsize=None)
 def get_overlay(overlay_path, size):
+    """Return the overlay at `overlay_path` scaled to `size`, the pixbuf is
+    shared and must be copied before drawing on it.
+    """
     width, height = size
     transparent_pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(
         overlay_path, width, height
@@ -111,40 +122,247 @@ def get_overlay(overlay_path, size):
     return transparent_pixbuf
 
 
-def get_pixbuf_for_game(game_slug, icon_type, is_installed=True):
+class PixbufCache:
+    """Least recently used pixbufs, up to `max_size` bytes of pixel data"""
+
+    def __init__(self, max_size=PIXBUF_CACHE_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self._pixbufs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the pixbuf stored for `key` or None"""
+        with self._lock:
+            pixbuf = self._pixbufs.get(key)
+            if pixbuf:
+                self._pixbufs.move_to_end(key)
+            return pixbuf
+
+    def add(self, key, pixbuf):
+        """Store a pixbuf, dropping the least recently used ones if needed"""
+        with self._lock:
+            if key in self._pixbufs:
+                self.size -= self._pixbufs.pop(key).get_byte_length()
+            self._pixbufs[key] = pixbuf
+            self.size += pixbuf.get_byte_length()
+            while self.size > self.max_size and len(self._pixbufs) > 1:
+                _key, old_pixbuf = self._pixbufs.popitem(last=False)
+                self.size -= old_pixbuf.get_byte_length()
+
+    def clear(self):
+        with self._lock:
+            self._pixbufs.clear()
+            self.size = 0
+
+
+PIXBUF_CACHE = PixbufCache()
+
+
+def get_default_game_media_path(icon_type):
+    """Return the image used for games without banner or icon"""
     if icon_type.startswith("banner"):
-        default_icon_path = os.path.join(datapath.get(), "media/default_banner.png")
-        icon_path = resources.get_banner_path(game_slug)
-    elif icon_type.startswith("icon"):
-        default_icon_path = os.path.join(datapath.get(), "media/default_icon.png")
-        icon_path = resources.get_icon_path(game_slug)
-    else:
+        return os.path.join(datapath.get(), "media/default_banner.png")
+    return os.path.join(datapath.get(), "media/default_icon.png")
+
+
+def get_game_pixbuf_key(game_slug, icon_type, is_installed=True):
+    """Return what identifies the pixbuf of a game in the caches: the path,
+    modification time and size of its image, the icon type and whether the
+    game is installed.
+    """
+    if icon_type not in IMAGE_SIZES:
         logger.error("Invalid icon type '%s'", icon_type)
         return None
+    icon_path = resources.get_icon_path(game_slug, icon_type)
+    try:
+        stat = os.stat(icon_path)
+    except OSError:
+        icon_path = get_default_game_media_path(icon_type)
+        stat = os.stat(icon_path)
+    return icon_path, stat.st_mtime_ns, stat.st_size, icon_type, bool(is_installed)
 
-    size = IMAGE_SIZES[icon_type]
 
-    pixbuf = get_pixbuf(icon_path, size, fallback=default_icon_path)
+def get_thumbnail_path(key):
+    """Return the path of the thumbnail cached on disk for a pixbuf key, or
+    None for the default images, which don't need one.
+    """
+    icon_path, _mtime, _size, icon_type, is_installed = key
+    if icon_path == get_default_game_media_path(icon_type):
+        return None
+    filename = os.path.splitext(os.path.basename(icon_path))[0]
     if not is_installed:
-        unavailable_game_overlay = os.path.join(datapath.get(), "media/unavailable.png")
-        transparent_pixbuf = get_overlay(unavailable_game_overlay, size).copy()
-        pixbuf.composite(
-            transparent_pixbuf,
-            0,
-            0,
-            size[0],
-            size[1],
-            0,
-            0,
-            1,
-            1,
-            GdkPixbuf.InterpType.NEAREST,
-            100,
+        filename += ".unavailable"
+    return os.path.join(THUMBNAIL_PATH, icon_type, filename + ".png")
+
+
+def read_thumbnail(thumbnail_path, key):
+    """Return the thumbnail at `thumbnail_path` if it was made from the
+    current version of the image.
+    """
+    _icon_path, mtime, size, _icon_type, _is_installed = key
+    try:
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file(thumbnail_path)
+    except GLib.GError:
+        return None
+    if pixbuf.get_option("tEXt::Thumb::MTime") != str(mtime):
+        return None
+    if pixbuf.get_option("tEXt::Thumb::Size") != str(size):
+        return None
+    return pixbuf
+
+
+def save_thumbnail(pixbuf, thumbnail_path, key):
+    """Save a scaled pixbuf along with the version of its source image"""
+    _icon_path, mtime, size, _icon_type, _is_installed = key
+    temp_path = "%s.%s" % (thumbnail_path, threading.get_ident())
+    try:
+        os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+        pixbuf.savev(
+            temp_path, "png", ["tEXt::Thumb::MTime", "tEXt::Thumb::Size"], [str(mtime), str(size)]
         )
-        return transparent_pixbuf
+        os.replace(temp_path, thumbnail_path)
+    except (OSError, GLib.GError) as ex:
+        logger.warning("Failed to save thumbnail %s: %s", thumbnail_path, ex)
+
+
+def load_game_pixbuf(key):
+    """Return the pixbuf identified by `key`, from the memory or thumbnail
+    caches if possible. Can be called from any thread.
+    """
+    pixbuf = PIXBUF_CACHE.get(key)
+    if pixbuf:
+        return pixbuf
+    icon_path, _mtime, _size, icon_type, is_installed = key
+    thumbnail_path = get_thumbnail_path(key)
+    if thumbnail_path:
+        pixbuf = read_thumbnail(thumbnail_path, key)
+    if not pixbuf:
+        size = IMAGE_SIZES[icon_type]
+        pixbuf = get_pixbuf(icon_path, size, fallback=get_default_game_media_path(icon_type))
+        if not is_installed:
+            unavailable_game_overlay = os.path.join(datapath.get(), "media/unavailable.png")
+            transparent_pixbuf = get_overlay(unavailable_game_overlay, size).copy()
+            pixbuf.composite(
+                transparent_pixbuf,
+                0,
+                0,
+                size[0],
+                size[1],
+                0,
+                0,
+                1,
+                1,
+                GdkPixbuf.InterpType.NEAREST,
+                100,
+            )
+            pixbuf = transparent_pixbuf
+        if thumbnail_path:
+            save_thumbnail(pixbuf, thumbnail_path, key)
+    PIXBUF_CACHE.add(key, pixbuf)
     return pixbuf
 
 
+def get_pixbuf_for_game(game_slug, icon_type, is_installed=True):
+    """Return the pixbuf of a game, the pixbuf is shared and must not be
+    modified.
+    """
+    key = get_game_pixbuf_key(game_slug, icon_type, is_installed)
+    if not key:
+        return None
+    return load_game_pixbuf(key)
+
+
+@functools.lru_cache(maxsize=None)
+def get_default_game_pixbuf(icon_type):
+    """Return the placeholder shown while the pixbuf of a game is loaded"""
+    return get_pixbuf(get_default_game_media_path(icon_type), IMAGE_SIZES[icon_type])
+
+
+class PixbufLoader:
+    """Decode the pixbufs of games in background threads.
+
+    Decoded pixbufs are handed to the main loop in batches, with a single
+    idle callback for all the pixbufs decoded since the previous one.
+    """
+
+    def __init__(self, max_workers=PIXBUF_LOADER_THREADS):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self.loading = {}  # Callbacks waiting for a pixbuf, by pixbuf key
+        self.futures = {}
+        self.decoded = []
+        self.lock = threading.Lock()
+        self.flush_scheduled = False
+
+    def get_pixbuf(self, game_slug, icon_type, is_installed, callback):
+        """Return the pixbuf of a game if it is in memory. Otherwise return
+        the default image of `icon_type`, and call `callback` with the pixbuf
+        on the main loop once decoded.
+        """
+        key = get_game_pixbuf_key(game_slug, icon_type, is_installed)
+        if not key:
+            return None
+        pixbuf = PIXBUF_CACHE.get(key)
+        if pixbuf:
+            return pixbuf
+        with self.lock:
+            if key in self.loading:
+                self.loading[key].append(callback)
+            else:
+                self.loading[key] = [callback]
+                self.futures[key] = self.executor.submit(self.load, key)
+        return get_default_game_pixbuf(icon_type)
+
+    def load(self, key):
+        try:
+            pixbuf = load_game_pixbuf(key)
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.error("Failed to load %s: %s", key[0], ex)
+            pixbuf = None
+        with self.lock:
+            self.futures.pop(key, None)
+            callbacks = self.loading.pop(key, [])
+            if not pixbuf or not callbacks:
+                return
+            self.decoded += [(callback, pixbuf) for callback in callbacks]
+            if self.flush_scheduled:
+                return
+            self.flush_scheduled = True
+        GLib.idle_add(self.flush)
+
+    def flush(self):
+        """Hand the decoded pixbufs to their callbacks"""
+        with self.lock:
+            decoded = self.decoded
+            self.decoded = []
+            self.flush_scheduled = False
+        for callback, pixbuf in decoded:
+            callback(pixbuf)
+        return False
+
+    def cancel(self, callbacks):
+        """Drop the requests made with `callbacks`, they won't be called.
+        Pixbufs no other callback waits for aren't decoded.
+        """
+        callbacks = set(callbacks)
+        with self.lock:
+            for key in list(self.loading):
+                self.loading[key] = [
+                    callback for callback in self.loading[key] if callback not in callbacks
+                ]
+                if not self.loading[key]:
+                    del self.loading[key]
+                    future = self.futures.pop(key, None)
+                    if future:
+                        future.cancel()
+            self.decoded = [
+                (callback, pixbuf) for callback, pixbuf in self.decoded if callback not in callbacks
+            ]
+
+
+PIXBUF_LOADER = PixbufLoader()
+
+
 def convert_to_background(background_path, target_size=(320, 1080)):
     """Converts a image to a pane background"""
 
@@ -1,5 +1,6 @@
 """Manipulates installer files"""
 import os
+import hashlib
 from urllib.parse import urlparse
 from lutris import pga
 from lutris import settings
@@ -49,6 +50,11 @@ class InstallerFile:
     def __str__(self):
         return "%s/%s" % (self.game_slug, self.id)
 
+    @property
+    def is_downloadable(self):
+        """Whether the file can be downloaded without waiting on the user or Steam"""
+        return not self.url.startswith(("$WINESTEAM", "$STEAM", "N/A"))
+
     def uses_pga_cache(self, create=False):
         """Determines whether the installer files are stored in a PGA cache
 
@@ -87,7 +93,7 @@ class InstallerFile:
 
     def get_download_info(self):
         """Retrieve the file locally"""
-        if self.url.startswith(("$WINESTEAM", "$STEAM", "N/A")):
+        if not self.is_downloadable:
             raise FileNotAvailable()
         # Check for file availability in PGA
         pga_uri = pga.check_for_file(self.game_slug, self.id)
@@ -102,6 +108,16 @@ class InstallerFile:
         self.dest_file = dest_file
         return self.dest_file
 
+    @property
+    def hash_type(self):
+        """Return the type of the checksum, if it can be computed while downloading"""
+        if not self.checksum or ":" not in self.checksum:
+            return None
+        hash_type = self.checksum.split(":", 1)[0]
+        if hash_type not in hashlib.algorithms_available:
+            return None
+        return hash_type
+
     def check_hash(self):
         """Checks the checksum of `file` and compare it to `value`
 
@@ -117,13 +133,15 @@ class InstallerFile:
         except ValueError:
             raise ScriptingError("Invalid checksum, expected format (type:hash) ", self.checksum)
 
-        if system.get_file_checksum(self.dest_file, hash_type) != expected_hash:
+        # Files hashed while downloaded or in a previous install are not read again
+        if system.get_cached_file_checksum(self.dest_file, hash_type) != expected_hash:
             raise ScriptingError(hash_type.capitalize() + " checksum mismatch ", self.checksum)
 
     def download(self, downloader):
         """Download a file with a given downloader"""
         if self.uses_pga_cache() and system.path_exists(self.dest_file):
             logger.info("File %s already cached", self)
+            self.check_hash()
             return False
 
         if not system.path_exists(self.cache_path):
@@ -132,6 +150,7 @@ class InstallerFile:
             self.url,
             self.dest_file,
             callback=self.check_hash,
-            referer=self.referer
+            referer=self.referer,
+            hash_type=self.hash_type,
         )
         return True
@@ -15,6 +15,7 @@ from lutris.util.display import DISPLAY_MANAGER
 from lutris.util.strings import unpack_dependencies
 from lutris.util.jobs import AsyncCall
 from lutris.util.log import logger
+from lutris.util.downloader import DownloadQueue, MAX_DOWNLOADS
 from lutris.util.steam.log import get_app_state_log
 from lutris.util.http import Request, HTTPError
 from lutris.util.wine.wine import get_wine_version_exe, get_system_wine_version
@@ -407,22 +408,50 @@ class ScriptInterpreter(CommandsMixin):
                     )
                 self.game_dir_created = True
 
-        if len(self.game_files) < len(self.files):
+        pending_files = [
+            installer_file for installer_file in self.files
+            if installer_file.id not in self.game_files
+        ]
+        # Files that can be downloaded right away are fetched together, then
+        # those needing the user or Steam are gathered one after the other.
+        downloadable_files = [
+            installer_file for installer_file in pending_files
+            if installer_file.is_downloadable
+        ]
+        if downloadable_files:
             logger.info(
-                "Downloading file %d of %d", len(self.game_files) + 1, len(self.files)
+                "Downloading %d of %d files", len(downloadable_files), len(self.files)
             )
-            file_index = len(self.game_files)
-            try:
-                current_file = self.files[file_index]
-            except KeyError:
-                raise ScriptingError(
-                    "Error getting file %d in %s" % file_index, self.files
-                )
-            self._download_file(current_file)
+            self._download_files(downloadable_files)
+        elif pending_files:
+            logger.info(
+                "Getting file %d of %d",
+                len(self.files) - len(pending_files) + 1,
+                len(self.files)
+            )
+            self._download_file(pending_files[0])
         else:
             self.current_command = 0
             self._prepare_commands()
 
+    def _download_files(self, installer_files):
+        """Download files referenced in the installer script, several at the
+        same time. The number of simultaneous downloads can be set with the
+        `max_parallel_downloads` setting.
+        """
+        try:
+            max_downloads = int(settings.read_setting("max_parallel_downloads"))
+        except ValueError:
+            max_downloads = MAX_DOWNLOADS
+        download_queue = DownloadQueue(max(max_downloads, 1))
+        for installer_file in installer_files:
+            self.game_files[installer_file.id] = installer_file.get_download_info()
+            installer_file.download(download_queue.add)
+        if download_queue:
+            self.parent.start_downloads(download_queue)
+        else:
+            self.iter_game_files()
+
     def _download_file(self, installer_file):
         """Download a file referenced in the installer script.
 
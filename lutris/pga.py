@@ -2,7 +2,9 @@
 
 import os
 import math
+import functools
 import time
+import sqlite3
 from itertools import chain
 
 from lutris.util.strings import slugify
@@ -53,6 +55,43 @@ DATABASE = {
     ]
 }
 
+# Changes to the database that can't be expressed by adding columns to
+# DATABASE. Each entry brings the database to the next schema version, the
+# current version is stored as the user_version of the database.
+# Never remove or reorder entries, add new ones at the end.
+SCHEMA_MIGRATIONS = [
+    [
+        {
+            "action": "create_index",
+            "table": "games",
+            "columns": ["slug", "configpath"],
+            "unique": True,
+        },
+        {"action": "create_index", "table": "games", "columns": ["installer_slug"]},
+        {"action": "create_index", "table": "games", "columns": ["configpath"]},
+        {
+            # Partial index, also used by queries on `steamid is not null`
+            "action": "create_index",
+            "table": "games",
+            "columns": ["steamid"],
+            "where": "steamid is not null",
+        },
+        {"action": "create_index", "table": "games", "columns": ["runner"]},
+        {"action": "create_index", "table": "games", "columns": ["platform"]},
+        {"action": "create_index", "table": "store_games", "columns": ["store", "appid"]},
+    ],
+]
+
+# Functions called with the ids of the games written to the database,
+# or with None when any game may have changed.
+GAME_CHANGE_CALLBACKS = []
+
+
+def notify_games_changed(game_ids=None):
+    """Let the caches of the games table know about changes to it"""
+    for callback in GAME_CHANGE_CALLBACKS:
+        callback(game_ids)
+
 
 def get_schema(tablename):
     """
@@ -124,11 +163,84 @@ def migrate(table, schema):
     return migrated_fields
 
 
+def create_index(table, columns, unique=False, where=None):
+    """Create an index on a table. If a unique index can't be created because
+    of existing duplicates, a regular index is created instead.
+    """
+    logger.info("Creating index on %s (%s)", table, ", ".join(columns))
+    try:
+        sql.create_index(PGA_DB, table, columns, unique=unique, where=where)
+    except sqlite3.IntegrityError:
+        logger.warning("Duplicate values in %s (%s), the index won't be unique",
+                       table, ", ".join(columns))
+        sql.create_index(PGA_DB, table, columns, where=where)
+
+
+def drop_index(name):
+    logger.info("Dropping index %s", name)
+    sql.drop_index(PGA_DB, name)
+
+
+def rebuild_table(table):
+    """Recreate a table from its definition in DATABASE, keeping its data and
+    its indexes. This allows changing the type of existing columns.
+    """
+    logger.info("Rebuilding table %s", table)
+    indexes = sql.get_indexes(PGA_DB, table)
+    columns = [
+        column["name"] for column in get_schema(table)
+        if column["name"] in {field["name"] for field in DATABASE[table]}
+    ]
+    tmp_table = "%s_tmp" % table
+    with sql.db_transaction(PGA_DB) as cursor:
+        sql.cursor_execute(cursor, "DROP TABLE IF EXISTS %s" % tmp_table)
+        create_table(tmp_table, DATABASE[table])
+        sql.cursor_execute(cursor, "INSERT INTO {0} ({2}) SELECT {2} FROM {1}".format(
+            tmp_table, table, ", ".join(columns)
+        ))
+        sql.cursor_execute(cursor, "DROP TABLE %s" % table)
+        sql.cursor_execute(cursor, "ALTER TABLE %s RENAME TO %s" % (tmp_table, table))
+        for index_query in indexes.values():
+            sql.cursor_execute(cursor, index_query)
+    notify_games_changed()
+
+
+SCHEMA_ACTIONS = {
+    "create_index": create_index,
+    "drop_index": drop_index,
+    "rebuild_table": rebuild_table,
+}
+
+
+def migrate_schema(migrations=None):
+    """Apply the schema migrations that haven't been applied to the database yet
+
+    Args:
+        migrations (list): Migrations to apply, defaults to SCHEMA_MIGRATIONS
+
+    Returns:
+        int: The schema version of the database
+    """
+    if migrations is None:
+        migrations = SCHEMA_MIGRATIONS
+    version = sql.get_user_version(PGA_DB)
+    for migration in migrations[version:]:
+        with sql.db_transaction(PGA_DB):
+            for operation in migration:
+                params = dict(operation)
+                SCHEMA_ACTIONS[params.pop("action")](**params)
+            version += 1
+            sql.set_user_version(PGA_DB, version)
+    return version
+
+
 def syncdb():
     """Update the database to the current version, making necessary changes
     for backwards compatibility."""
     for table in DATABASE:
         migrate(table, DATABASE[table])
+    migrate_schema()
+    notify_games_changed()
 
 
 def get_games(
@@ -252,7 +364,9 @@ def add_game(name, **game_data):
     game_data["installed_at"] = int(time.time())
     if "slug" not in game_data:
         game_data["slug"] = slugify(name)
-    return sql.db_insert(PGA_DB, "games", game_data)
+    game_id = sql.db_insert(PGA_DB, "games", game_data)
+    notify_games_changed([game_id])
+    return game_id
 
 
 def add_games_bulk(games):
@@ -265,7 +379,153 @@ def add_games_bulk(games):
         Returns:
             list: List of inserted game ids
     """
-    return [sql.db_insert(PGA_DB, "games", game) for game in games]
+    with sql.db_transaction(PGA_DB) as cursor:
+        game_ids = insert_games(cursor, games)
+    notify_games_changed(game_ids)
+    return game_ids
+
+
+def insert_games(cursor, games):
+    """Insert games with as few statements as possible. Must be called from
+    within a transaction so the ids given by SQLite can't be taken by another
+    connection.
+
+    Returns:
+        list: Ids of the inserted games, in the same order as `games`
+    """
+    game_ids = [None] * len(games)
+    batches = {}
+    for index, game in enumerate(games):
+        if game.get("id"):
+            game_ids[index] = sql.cursor_execute(
+                cursor,
+                "insert into games({}) values ({})".format(
+                    ", ".join(game), ", ".join("?" * len(game))
+                ),
+                tuple(game.values())
+            ).lastrowid
+            continue
+        columns = tuple(key for key in game if key != "id")
+        batches.setdefault(columns, []).append(index)
+    for columns, indexes in batches.items():
+        last_id = sql.cursor_execute(cursor, "select max(id) from games").fetchone()[0] or 0
+        cursor.executemany(
+            "insert into games({}) values ({})".format(
+                ", ".join(columns), ", ".join("?" * len(columns))
+            ),
+            [tuple(games[index][column] for column in columns) for index in indexes]
+        )
+        inserted_ids = [
+            row[0] for row in sql.cursor_execute(
+                cursor, "select id from games where id > ? order by id", (last_id, )
+            ).fetchall()
+        ]
+        for index, game_id in zip(indexes, inserted_ids):
+            game_ids[index] = game_id
+    return game_ids
+
+
+def update_games(cursor, games):
+    """Update games, matched by their id, batching games setting the same fields"""
+    batches = {}
+    for game in games:
+        columns = tuple(key for key in game if key != "id")
+        batches.setdefault(columns, []).append(game)
+    for columns, batch in batches.items():
+        if not columns:
+            continue
+        cursor.executemany(
+            "update games set {} where id=?".format(
+                ", ".join("%s=?" % column for column in columns)
+            ),
+            [tuple(game[column] for column in columns) + (game["id"], ) for game in batch]
+        )
+
+
+def upsert_games(games, match_on=None):
+    """Add or update several games in a single transaction
+
+    Games are matched against the library the same way `add_or_update` does,
+    unless `match_on` names a field whose value identifies a game (steamid,
+    gogid, ...). Games matching each other within `games` are merged.
+    The "id" key of each dict in `games` is set to the id of its game.
+
+    Args:
+        games (list): list of games in dict format
+        match_on (str): Optional field used to match existing games
+
+    Returns:
+        tuple: Lists of the inserted game ids and of the updated game ids
+    """
+    if not games:
+        return [], []
+    installed_at = int(time.time())
+    with sql.db_transaction(PGA_DB) as cursor:
+        if match_on:
+            values = {game.get(match_on) for game in games} - {None}
+            games_by_value = {}
+            for game in get_games_by_field_values(match_on, values):
+                games_by_value.setdefault(game[match_on], game)
+        else:
+            ids = {game.get("id") for game in games} - {None}
+            slugs = {game.get("slug") or slugify(game.get("name")) for game in games}
+            games_by_id = {game["id"]: game for game in get_games_by_field_values("id", ids)}
+            games_by_slug = {}
+            for game in get_games_by_field_values("slug", slugs - {None, ""}):
+                games_by_id[game["id"]] = game
+                games_by_slug.setdefault(game["slug"], []).append(game)
+
+        # Games not yet inserted are given negative ids so that following games
+        # matching them get merged into them.
+        inserts = []
+        updates = {}
+        for game in games:
+            if match_on:
+                match = games_by_value.get(game.get(match_on))
+                game_id = match["id"] if match else None
+            else:
+                game_id = match_game(game, games_by_id, games_by_slug)
+            if game_id is None:
+                row = {key: value for key, value in game.items() if key != "id" or value}
+                row.setdefault("slug", slugify(row.get("name")))
+                row.setdefault("installed_at", installed_at)
+                inserts.append(row)
+                game_id = -len(inserts)
+                pending = dict(row, id=game_id)
+                if match_on:
+                    if pending.get(match_on) is not None:
+                        games_by_value.setdefault(pending[match_on], pending)
+                else:
+                    for key in ("installed", "configpath", "runner"):
+                        pending.setdefault(key, None)
+                    games_by_slug.setdefault(pending["slug"], []).append(pending)
+            elif game_id < 0:
+                inserts[-game_id - 1].update(
+                    {key: value for key, value in game.items() if key != "id"}
+                )
+            else:
+                updates.setdefault(game_id, {}).update(game)
+                updates[game_id]["id"] = game_id
+            game["id"] = game_id
+
+        inserted_ids = insert_games(cursor, inserts)
+        update_games(cursor, list(updates.values()))
+
+    for game in games:
+        if game["id"] < 0:
+            game["id"] = inserted_ids[-game["id"] - 1]
+    notify_games_changed(inserted_ids + list(updates))
+    return inserted_ids, list(updates)
+
+
+def get_games_by_field_values(field, values):
+    """Return the games whose `field` has one of the given values"""
+    values = list(values)
+    size = 999
+    return list(chain.from_iterable(
+        sql.db_select(PGA_DB, "games", condition=(field, values[page * size: page * size + size]))
+        for page in range(math.ceil(len(values) / size))
+    ))
 
 
 def add_or_update(**params):
@@ -279,22 +539,33 @@ def add_or_update(**params):
     if game_id:
         params["id"] = game_id
         sql.db_update(PGA_DB, "games", params, ("id", game_id))
+        notify_games_changed([game_id])
         return game_id
     return add_game(**params)
 
 
 def get_matching_game(params):
     """Tries to match given parameters with an existing game"""
-    # Always match by ID if provided
+    games_by_id = {}
     if params.get("id"):
         game = get_game_by_field(params["id"], "id")
         if game:
-            return game["id"]
+            games_by_id[game["id"]] = game
+    slug = params.get("slug") or slugify(params.get("name"))
+    return match_game(params, games_by_id, {slug: get_games_by_slug(slug)} if slug else {})
+
+
+def match_game(params, games_by_id, games_by_slug):
+    """Return the id of the game matching `params` among the given games"""
+    # Always match by ID if provided
+    if params.get("id"):
+        if params["id"] in games_by_id:
+            return params["id"]
         logger.warning("Game ID %s provided but couldn't be matched", params["id"])
     slug = params.get("slug") or slugify(params.get("name"))
     if not slug:
         raise ValueError("Can't add or update without an identifier")
-    for game in get_games_by_slug(slug):
+    for game in games_by_slug.get(slug, []):
         if game["installed"]:
             if game["configpath"] == params.get("configpath"):
                 return game["id"]
@@ -310,10 +581,12 @@ def get_matching_game(params):
 def delete_game(game_id):
     """Delete a game from the PGA."""
     sql.db_delete(PGA_DB, "games", "id", game_id)
+    notify_games_changed([game_id])
 
 
 def set_uninstalled(game_id):
     sql.db_update(PGA_DB, "games", {"installed": 0, "runner": ""}, ("id", game_id))
+    notify_games_changed([game_id])
 
 
 def add_source(uri):
@@ -332,13 +605,14 @@ def read_sources():
 
 
 def write_sources(sources):
-    db_sources = read_sources()
-    for uri in db_sources:
-        if uri not in sources:
-            sql.db_delete(PGA_DB, "sources", "uri", uri)
-    for uri in sources:
-        if uri not in db_sources:
-            sql.db_insert(PGA_DB, "sources", {"uri": uri})
+    with sql.db_transaction(PGA_DB):
+        db_sources = read_sources()
+        for uri in db_sources:
+            if uri not in sources:
+                sql.db_delete(PGA_DB, "sources", "uri", uri)
+        for uri in sources:
+            if uri not in db_sources:
+                sql.db_insert(PGA_DB, "sources", {"uri": uri})
 
 
 def check_for_file(game, file_id):
@@ -420,14 +694,30 @@ def get_used_platforms_game_count():
 
 def get_hidden_ids():
     """Return a list of game IDs to be excluded from the library view"""
-    # Load the ignore string and filter out empty strings to prevent issues
     ignores_raw = settings.read_setting("library_ignores",
                                         section="lutris",
-                                        default="").split(",")
-    ignores = [ignore for ignore in ignores_raw if not ignore == ""]
+                                        default="")
+    return sorted(parse_hidden_ids(ignores_raw))
+
+
+def get_hidden_id_set():
+    """Return the set of game IDs to be excluded from the library view"""
+    ignores_raw = settings.read_setting("library_ignores",
+                                        section="lutris",
+                                        default="")
+    return parse_hidden_ids(ignores_raw)
+
+
+@functools.lru_cache(maxsize=1)
+def parse_hidden_ids(ignores_raw):
+    """Return the game IDs of the library_ignores setting, parsed again only
+    when the setting changes.
+    """
+    # Filter out empty strings to prevent issues
+    ignores = [ignore for ignore in ignores_raw.split(",") if not ignore == ""]
 
     # Turn the strings into integers
-    return [int(game_id) for game_id in ignores]
+    return frozenset(int(game_id) for game_id in ignores)
 
 
 def set_hidden_ids(games):
@@ -9,8 +9,7 @@ __all__ = defaultdict(list)
 
 def _init_platforms():
     for runner_name in runners.__all__:
-        runner = runners.import_runner(runner_name)()
-        for platform in runner.platforms:
+        for platform in runners.get_runner_platforms(runner_name):
             __all__[platform].append(runner_name)
 
 
@@ -1,4 +1,9 @@
 """Generic runner functions."""
+import os
+from collections import namedtuple
+
+from lutris import settings
+from lutris.runners.manifest import RUNNER_MANIFESTS
 # from lutris.util.log import logger
 
 __all__ = (
@@ -91,11 +96,88 @@ def import_task(runner, task):
     return getattr(runner_module, task)
 
 
+# Static description of a runner, the option lists must be treated as read only
+RunnerInfo = namedtuple("RunnerInfo", (
+    "name",
+    "human_name",
+    "platforms",
+    "game_options",
+    "runner_options",
+    "system_options_override",
+))
+
+# Runner descriptions, filled on first access
+_RUNNER_INFOS = {}
+
+
+def get_runner_info(runner_name):
+    """Return the RunnerInfo of a runner. The runner module is only imported
+    the first time a runner is looked up.
+    """
+    if runner_name not in _RUNNER_INFOS:
+        runner_class = import_runner(runner_name)
+        runner = None
+        fields = {}
+        for field in RunnerInfo._fields[1:]:
+            value = getattr(runner_class, field)
+            if not value or isinstance(value, property):
+                # Some runners build these attributes when instanciated
+                runner = runner or runner_class()
+                value = getattr(runner, field)
+            fields[field] = value if isinstance(value, str) else tuple(value)
+        _RUNNER_INFOS[runner_name] = RunnerInfo(name=runner_name, **fields)
+    return _RUNNER_INFOS[runner_name]
+
+
+def clear_runner_info(runner_name):
+    """Forget the RunnerInfo of a runner. Needed when the runner versions
+    installed change, some defaults of the options depend on them.
+    """
+    _RUNNER_INFOS.pop(runner_name, None)
+
+
+def get_runner_manifest(runner_name):
+    """Return the RunnerManifest of a runner, without importing its module"""
+    if runner_name not in __all__:
+        raise InvalidRunner("Invalid runner name '%s'" % runner_name)
+    return RUNNER_MANIFESTS[runner_name]
+
+
+def get_runner_human_name(runner_name):
+    """Return the human readable name of a runner, an empty string for
+    unknown runners
+    """
+    try:
+        return get_runner_manifest(runner_name).human_name
+    except InvalidRunner:
+        return ""
+
+
+def get_runner_platforms(runner_name):
+    """Return the platforms supported by a runner"""
+    platforms = get_runner_manifest(runner_name).platforms
+    if platforms is None:
+        platforms = get_runner_info(runner_name).platforms
+    return platforms
+
+
+def is_runner_installed(runner_name):
+    """Return whether a runner is installed. The runner module is only
+    imported if the manifest doesn't give enough information to tell, or
+    if the runner has a configuration that could set a custom executable.
+    """
+    executable = get_runner_manifest(runner_name).executable
+    runner_config_path = os.path.join(settings.CONFIG_DIR, "runners/%s.yml" % runner_name)
+    if executable and not os.path.exists(runner_config_path):
+        return os.path.exists(os.path.join(settings.RUNNER_DIR, executable))
+    return import_runner(runner_name)().is_installed()
+
+
 def get_installed(sort=True):
     """Return a list of installed runners (class instances)."""
-    installed = []
-    for runner_name in __all__:
-        runner = import_runner(runner_name)()
-        if runner.is_installed():
-            installed.append(runner)
+    installed = [
+        import_runner(runner_name)()
+        for runner_name in __all__
+        if is_runner_installed(runner_name)
+    ]
     return sorted(installed) if sort else installed
@@ -0,0 +1,325 @@
+"""Static description of the runners, readable without importing their modules.
+
+Each entry gives the human readable name of a runner, its platforms and the
+path of its executable relative to the runners directory. The executable is
+None for runners that need their module to tell if they are installed, the
+platforms are None when they are computed by the runner.
+The values must be kept in sync with the runner classes, see test_runners.
+"""
+from collections import namedtuple
+
+RunnerManifest = namedtuple("RunnerManifest", ("name", "human_name", "platforms", "executable"))
+
+RUNNER_MANIFESTS = {
+    "linux": RunnerManifest(
+        name="linux",
+        human_name="Linux",
+        platforms=("Linux",),
+        executable=None,
+    ),
+    "steam": RunnerManifest(
+        name="steam",
+        human_name="Steam",
+        platforms=("Linux",),
+        executable=None,
+    ),
+    "browser": RunnerManifest(
+        name="browser",
+        human_name="Browser",
+        platforms=("Web",),
+        executable=None,
+    ),
+    "web": RunnerManifest(
+        name="web",
+        human_name="Web",
+        platforms=("Web",),
+        executable="web/electron/electron",
+    ),
+    "wine": RunnerManifest(
+        name="wine",
+        human_name="Wine",
+        platforms=("Windows",),
+        executable=None,
+    ),
+    "winesteam": RunnerManifest(
+        name="winesteam",
+        human_name="Wine Steam",
+        platforms=("Windows",),
+        executable=None,
+    ),
+    "dosbox": RunnerManifest(
+        name="dosbox",
+        human_name="DOSBox",
+        platforms=("MS-DOS",),
+        executable="dosbox/bin/dosbox",
+    ),
+    "mame": RunnerManifest(
+        name="mame",
+        human_name="MAME",
+        platforms=("Arcade",),
+        executable="mame/mame",
+    ),
+    "mess": RunnerManifest(
+        name="mess",
+        human_name="MESS",
+        platforms=(
+            "Acorn Atom",
+            "Adventure Vision",
+            "Amstrad CPC 464",
+            "Amstrad CPC 6128",
+            "Amstrad GX4000",
+            "Apple I",
+            "Apple II",
+            "Apple IIGS",
+            "Arcadia 2001",
+            "Bally Professional Arcade",
+            "BBC Micro",
+            "Casio PV-1000",
+            "Casio PV-2000",
+            "Chintendo Vii",
+            "Coleco Adam",
+            "Commodore 64",
+            "Creatronic Mega Duck",
+            "DEC PDP-1",
+            "Epoch Game Pocket Computer",
+            "Epoch Super Cassette Vision",
+            "Fairchild Channel F",
+            "Fujitsu FM 7",
+            "Fujitsu FM Towns",
+            "Funtech Super ACan",
+            "Game.com",
+            "Hartung Game Master",
+            "IBM PCjr",
+            "Intellivision",
+            "Interton VC 4000",
+            "Matra Alice",
+            "Mattel Aquarius",
+            "Memotech MTX",
+            "Milton Bradley MicroVision",
+            "NEC PC-8801",
+            "NEC PC-88VA",
+            "RCA Studio II",
+            "Sam Coupe",
+            "SEGA Computer 3000",
+            "Sega Pico",
+            "Sega SG-1000",
+            "Sharp MZ-2500",
+            "Sharp MZ-700",
+            "Sharp X1",
+            "Sinclair ZX Spectrum",
+            "Sinclair ZX Spectrum 128",
+            "Sony SMC777",
+            "Spectravision SVI-318",
+            "Tatung Einstein",
+            "Thomson MO5",
+            "Thomson MO6",
+            "Tomy Tutor",
+            "TRS-80 Color Computer",
+            "Videopac Plus G7400",
+            "VTech CreatiVision",
+            "Watara Supervision",
+        ),
+        executable="mess/mess",
+    ),
+    "mednafen": RunnerManifest(
+        name="mednafen",
+        human_name="Mednafen",
+        platforms=(
+            "Nintendo Game Boy (Color)",
+            "Nintendo Game Boy Advance",
+            "Sega Game Gear",
+            "Sega Genesis/Mega Drive",
+            "Atari Lynx",
+            "Sega Master System",
+            "SNK Neo Geo Pocket (Color)",
+            "Nintendo NES",
+            "NEC PC Engine TurboGrafx-16",
+            "NEC PC-FX",
+            "Sony PlayStation",
+            "Sega Saturn",
+            "Nintendo SNES",
+            "Bandai WonderSwan",
+            "Nintendo Virtual Boy",
+        ),
+        executable="mednafen/bin/mednafen",
+    ),
+    "scummvm": RunnerManifest(
+        name="scummvm",
+        human_name="ScummVM",
+        platforms=("Linux",),
+        executable="scummvm/bin/scummvm",
+    ),
+    "residualvm": RunnerManifest(
+        name="residualvm",
+        human_name="ResidualVM",
+        platforms=("Linux",),
+        executable="residualvm/residualvm",
+    ),
+    "libretro": RunnerManifest(
+        name="libretro",
+        human_name="Libretro",
+        platforms=None,
+        executable=None,
+    ),
+    "ags": RunnerManifest(
+        name="ags",
+        human_name="Adventure Game Studio",
+        platforms=("Linux",),
+        executable="ags/ags.sh",
+    ),
+    "fsuae": RunnerManifest(
+        name="fsuae",
+        human_name="FS-UAE",
+        platforms=(
+            "Amiga 500",
+            "Amiga 500+",
+            "Amiga 600",
+            "Amiga 1000",
+            "Amiga 1200",
+            "Amiga 1200",
+            "Amiga 4000",
+            "Amiga CD32",
+            "Commodore CDTV",
+        ),
+        executable="fs-uae/fs-uae",
+    ),
+    "vice": RunnerManifest(
+        name="vice",
+        human_name="Vice",
+        platforms=(
+            "Commodore 64",
+            "Commodore 128",
+            "Commodore VIC20",
+            "Commodore PET",
+            "Commodore Plus/4",
+            "Commodore CBM II",
+        ),
+        executable=None,
+    ),
+    "stella": RunnerManifest(
+        name="stella",
+        human_name="Stella",
+        platforms=("Atari 2600",),
+        executable="stella/bin/stella",
+    ),
+    "atari800": RunnerManifest(
+        name="atari800",
+        human_name="Atari800",
+        platforms=("Atari 8bit computers",),
+        executable="atari800/bin/atari800",
+    ),
+    "hatari": RunnerManifest(
+        name="hatari",
+        human_name="Hatari",
+        platforms=("Atari ST",),
+        executable="hatari/bin/hatari",
+    ),
+    "virtualjaguar": RunnerManifest(
+        name="virtualjaguar",
+        human_name="Virtual Jaguar",
+        platforms=("Atari Jaguar",),
+        executable="virtualjaguar/virtualjaguar",
+    ),
+    "snes9x": RunnerManifest(
+        name="snes9x",
+        human_name="Snes9x",
+        platforms=("Nintendo SNES",),
+        executable="snes9x/bin/snes9x-gtk",
+    ),
+    "mupen64plus": RunnerManifest(
+        name="mupen64plus",
+        human_name="Mupen64Plus",
+        platforms=("Nintendo 64",),
+        executable="mupen64plus/mupen64plus",
+    ),
+    "dolphin": RunnerManifest(
+        name="dolphin",
+        human_name="Dolphin",
+        platforms=("Nintendo Gamecube", "Nintendo Wii"),
+        executable="dolphin/dolphin-emu",
+    ),
+    "desmume": RunnerManifest(
+        name="desmume",
+        human_name="DeSmuME",
+        platforms=("Nintendo DS",),
+        executable="desmume/bin/desmume",
+    ),
+    "citra": RunnerManifest(
+        name="citra",
+        human_name="Citra",
+        platforms=("Nintendo 3DS",),
+        executable="citra/citra-qt",
+    ),
+    "yuzu": RunnerManifest(
+        name="yuzu",
+        human_name="Yuzu",
+        platforms=("Nintendo Switch",),
+        executable="yuzu/yuzu",
+    ),
+    "ppsspp": RunnerManifest(
+        name="ppsspp",
+        human_name="PPSSPP",
+        platforms=("Sony PlayStation Portable",),
+        executable="ppsspp/PPSSPPSDL",
+    ),
+    "pcsx2": RunnerManifest(
+        name="pcsx2",
+        human_name="PCSX2",
+        platforms=("Sony PlayStation 2",),
+        executable="pcsx2/PCSX2",
+    ),
+    "rpcs3": RunnerManifest(
+        name="rpcs3",
+        human_name="RPCS3",
+        platforms=("Sony PlayStation 3",),
+        executable="rpcs3/rpcs3",
+    ),
+    "osmose": RunnerManifest(
+        name="osmose",
+        human_name="Osmose",
+        platforms=("Sega Master System",),
+        executable="osmose/osmose",
+    ),
+    "dgen": RunnerManifest(
+        name="dgen",
+        human_name="DGen",
+        platforms=("Sega Genesis",),
+        executable="dgen/bin/dgen",
+    ),
+    "reicast": RunnerManifest(
+        name="reicast",
+        human_name="Reicast",
+        platforms=("Sega Dreamcast",),
+        executable="reicast/reicast.elf",
+    ),
+    "pico8": RunnerManifest(
+        name="pico8",
+        human_name="PICO-8",
+        platforms=("PICO-8",),
+        executable=None,
+    ),
+    "frotz": RunnerManifest(
+        name="frotz",
+        human_name="Frotz",
+        platforms=("Z-Machine",),
+        executable="frotz/frotz",
+    ),
+    "jzintv": RunnerManifest(
+        name="jzintv",
+        human_name="jzIntv",
+        platforms=("Intellivision",),
+        executable="jzintv/bin/jzintv",
+    ),
+    "o2em": RunnerManifest(
+        name="o2em",
+        human_name="O2EM",
+        platforms=("Magnavox Odyssey²", "Phillips C52", "Phillips Videopac+", "Brandt Jopac"),
+        executable="o2em/o2em",
+    ),
+    "zdoom": RunnerManifest(
+        name="zdoom",
+        human_name="ZDoom",
+        platforms=("Linux",),
+        executable=None,
+    ),
+}
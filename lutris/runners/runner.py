@@ -4,14 +4,15 @@ import os
 from gi.repository import Gtk
 
 from lutris import pga, settings, runtime
-from lutris.config import LutrisConfig
+from lutris.config import LutrisConfig, clear_config_caches
 from lutris.gui import dialogs
 from lutris.command import MonitoredCommand
-from lutris.util.extract import extract_archive, ExtractFailure
+from lutris.util.downloader import ArchiveDownloader
+from lutris.util.extract import extract_archive, get_tar_stream_mode, ExtractFailure
 from lutris.util.log import logger
 from lutris.util import system
 from lutris.util.http import Request
-from lutris.runners import RunnerInstallationError
+from lutris.runners import RunnerInstallationError, clear_runner_info
 
 
 class Runner:
@@ -292,7 +293,7 @@ class Runner:
             self.name,
             " (version: %s)" % version if version else "",
         )
-        request = Request("{}/api/runners/{}".format(settings.SITE_URL, self.name))
+        request = Request("{}/api/runners/{}".format(settings.SITE_URL, self.name), cache=True)
         runner_info = request.get().json
         if not runner_info:
             logger.error("Failed to get runner information")
@@ -365,6 +366,17 @@ class Runner:
         runner_archive = os.path.join(settings.CACHE_DIR, tarball_filename)
         if not dest:
             dest = settings.RUNNER_DIR
+        if get_tar_stream_mode(tarball_filename):
+            # Extracted while downloaded, the archive isn't written to disk
+            archive_downloader = ArchiveDownloader(url, dest, merge_single=merge_single)
+            downloader(
+                url,
+                dest,
+                self.on_archive_extracted,
+                {"archive_downloader": archive_downloader, "callback": callback},
+                downloader=archive_downloader,
+            )
+            return
         downloader(url, runner_archive, self.extract, {
             "archive": runner_archive,
             "dest": dest,
@@ -381,11 +393,24 @@ class Runner:
             logger.error("Failed to extract the archive %s file may be corrupt", archive)
             raise RunnerInstallationError("Failed to extract {}: {}".format(archive, ex))
         os.remove(archive)
+        self.on_extracted(callback)
+
+    def on_archive_extracted(self, archive_downloader=None, callback=None):
+        """Called once an archive extracted while downloaded is done, the
+        download may have failed or been cancelled.
+        """
+        if archive_downloader.state != archive_downloader.COMPLETED or not archive_downloader.extracted:
+            raise RunnerInstallationError("Failed to extract {}".format(archive_downloader.url))
+        self.on_extracted(callback)
 
+    def on_extracted(self, callback=None):
+        """Called once the runner is extracted"""
         if self.name == "wine":
             logger.debug("Clearing wine version cache")
             from lutris.util.wine.wine import get_wine_versions
             get_wine_versions.cache_clear()
+            clear_runner_info(self.name)
+        clear_config_caches()
 
         if callback:
             callback()
@@ -402,6 +427,7 @@ class Runner:
         runner_path = os.path.join(settings.RUNNER_DIR, self.name)
         if os.path.isdir(runner_path):
             system.remove_folder(runner_path)
+        clear_config_caches()
 
     def find_option(self, options_group, option_name):
         """Retrieve an option dict if it exists in the group"""
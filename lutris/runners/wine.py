@@ -12,6 +12,7 @@ from lutris.runners.runner import Runner
 from lutris.util.jobs import thread_safe_call
 from lutris.util import system
 from lutris.util.log import logger
+from lutris.util.process import get_pids_using_files
 from lutris.util.strings import parse_version, split_arguments
 from lutris.util.display import DISPLAY_MANAGER
 from lutris.util.graphics.vkquery import is_vulkan_supported
@@ -20,7 +21,6 @@ from lutris.util.wine.x360ce import X360ce
 from lutris.util.wine import dxvk
 from lutris.util.wine import nine
 from lutris.util.wine.wine import (
-    POL_PATH,
     WINE_DIR,
     WINE_PATHS,
     detect_arch,
@@ -29,6 +29,7 @@ from lutris.util.wine.wine import (
     esync_display_version_warning,
     get_default_version,
     get_overrides_env,
+    get_playonlinux,
     get_proton_paths,
     get_real_executable,
     get_system_wine_version,
@@ -588,7 +589,7 @@ class wine(Runner):
                     return os.path.join(proton_path, version, "dist/bin/wine")
         if version.startswith("PlayOnLinux"):
             version, arch = version.split()[1].rsplit("-", 1)
-            return os.path.join(POL_PATH, "wine", "linux-" + arch, version, "bin/wine")
+            return os.path.join(get_playonlinux(), "wine", "linux-" + arch, version, "bin/wine")
         if version == "custom":
             return self.runner_config.get("custom_wine_path", "")
         return os.path.join(WINE_DIR, version, "bin/wine")
@@ -727,9 +728,9 @@ class wine(Runner):
         )
         return True
 
-    def set_regedit_keys(self):
+    def set_regedit_keys(self, prefix_manager=None):
         """Reset regedit keys according to config."""
-        prefix_manager = WinePrefixManager(self.prefix_path)
+        prefix_manager = prefix_manager or WinePrefixManager(self.prefix_path)
         # Those options are directly changed with the prefix manager and skip
         # any calls to regedit.
         managed_keys = {
@@ -738,23 +739,23 @@ class wine(Runner):
             "Desktop": prefix_manager.set_virtual_desktop,
             "WineDesktop": prefix_manager.set_desktop_size,
         }
-
-        for key, path in self.reg_keys.items():
-            value = self.runner_config.get(key) or "auto"
-            if not value or value == "auto" and key not in managed_keys.keys():
-                prefix_manager.clear_registry_subkeys(path, key)
-            elif key in self.runner_config:
-                if key in managed_keys.keys():
-                    # Do not pass fallback 'auto' value to managed keys
-                    if value == "auto":
-                        value = None
-                    managed_keys[key](value)
-                    continue
-                # Convert numeric strings to integers so they are saved as dword
-                if value.isdigit():
-                    value = int(value)
-
-                prefix_manager.set_registry_key(path, key, value)
+        with prefix_manager.registry_session():
+            for key, path in self.reg_keys.items():
+                value = self.runner_config.get(key) or "auto"
+                if not value or value == "auto" and key not in managed_keys.keys():
+                    prefix_manager.clear_registry_subkeys(path, key)
+                elif key in self.runner_config:
+                    if key in managed_keys.keys():
+                        # Do not pass fallback 'auto' value to managed keys
+                        if value == "auto":
+                            value = None
+                        managed_keys[key](value)
+                        continue
+                    # Convert numeric strings to integers so they are saved as dword
+                    if value.isdigit():
+                        value = int(value)
+
+                    prefix_manager.set_registry_key(path, key, value)
 
     def toggle_dxvk(self, enable, version=None, dxvk_manager: dxvk.DXVKManager = None):
         # manual version only sets the dlls to native
@@ -791,10 +792,12 @@ class wine(Runner):
         if not system.path_exists(os.path.join(self.prefix_path, "user.reg")):
             create_prefix(self.prefix_path, arch=self.wine_arch)
         prefix_manager = WinePrefixManager(self.prefix_path)
-        if self.runner_config.get("autoconf_joypad", True):
-            prefix_manager.configure_joypads()
-        self.sandbox(prefix_manager)
-        self.set_regedit_keys()
+        # Read and write the registry once for all the changes
+        with prefix_manager.registry_session():
+            if self.runner_config.get("autoconf_joypad", True):
+                prefix_manager.configure_joypads()
+            self.sandbox(prefix_manager)
+            self.set_regedit_keys(prefix_manager)
         self.setup_x360ce(self.runner_config.get("x360ce-path"))
         if self.runner_config.get("vkd3d"):
             dxvk_manager = dxvk.VKD3DManager
@@ -880,17 +883,15 @@ class wine(Runner):
             exe = self.get_executable()
         if not exe.startswith("/"):
             exe = system.find_executable(exe)
-        pids = system.get_pids_using_file(exe)
+        paths = [exe]
         if self.wine_arch == "win64" and os.path.basename(exe) == "wine":
-            pids = pids | system.get_pids_using_file(exe + "64")
+            paths.append(exe + "64")
 
         # Add wineserver PIDs to the mix (at least one occurence of fuser not
         # picking the games's PID from wine/wine64 but from wineserver for some
         # unknown reason.
-        pids = pids | system.get_pids_using_file(
-            os.path.join(os.path.dirname(exe), "wineserver")
-        )
-        return pids
+        paths.append(os.path.join(os.path.dirname(exe), "wineserver"))
+        return get_pids_using_files(paths)
 
     def setup_x360ce(self, x360ce_path):
         if not x360ce_path:
@@ -5,8 +5,8 @@ import time
 from gi.repository import GLib
 from lutris.settings import RUNTIME_DIR, RUNTIME_URL
 from lutris.util import http, jobs, system
-from lutris.util.downloader import Downloader
-from lutris.util.extract import extract_archive
+from lutris.util.downloader import ArchiveDownloader, Downloader
+from lutris.util.extract import extract_archive, get_tar_stream_mode
 from lutris.util.log import logger
 from lutris.util.system import LINUX_SYSTEM
 
@@ -70,7 +70,13 @@ class Runtime:
 
         url = remote_runtime_info["url"]
         archive_path = os.path.join(RUNTIME_DIR, os.path.basename(url))
-        downloader = Downloader(url, archive_path, overwrite=True)
+        if get_tar_stream_mode(archive_path):
+            # Extracted while downloaded, the archive isn't written to disk
+            downloader = ArchiveDownloader(
+                url, RUNTIME_DIR, merge_single=False, replace_path=self.local_runtime_path
+            )
+        else:
+            downloader = Downloader(url, archive_path, overwrite=True)
         downloader.start()
         GLib.timeout_add(100, self.check_download_progress, downloader)
         return downloader
@@ -86,7 +92,10 @@ class Runtime:
 
         downloader.check_progress()
         if downloader.state == downloader.COMPLETED:
-            self.on_downloaded(downloader.dest)
+            if isinstance(downloader, ArchiveDownloader):
+                self.on_installed()
+            else:
+                self.on_downloaded(downloader.dest)
             return False
         return True
 
@@ -115,9 +124,13 @@ class Runtime:
             return
         archive_path, _destination_path = result
         os.unlink(archive_path)
+        self.on_installed()
+        return False
+
+    def on_installed(self):
+        """Actions taken once a runtime is extracted in place"""
         self.set_updated_at()
         self.updater.notify_finish(self)
-        return False
 
 
 class RuntimeUpdater:
@@ -149,7 +162,7 @@ class RuntimeUpdater:
 
     @staticmethod
     def _iter_remote_runtimes():
-        request = http.Request(RUNTIME_URL)
+        request = http.Request(RUNTIME_URL, cache=True)
         try:
             response = request.get()
         except http.HTTPError as ex:
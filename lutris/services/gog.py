@@ -343,9 +343,8 @@ class GOGSyncer:
         if not gog_ids:
             return ([], [])
         lutris_games = api.get_api_games(gog_ids, query_type="gogid")
-        added_games = []
-        for game in lutris_games:
-            game_data = {
+        games_data = [
+            {
                 "name": game["name"],
                 "slug": game["slug"],
                 "year": game["year"],
@@ -354,7 +353,10 @@ class GOGSyncer:
                     "gogid"
                 ),  # GOG IDs will be added at a later stage in the API
             }
-            added_games.append(pga.add_or_update(**game_data))
+            for game in lutris_games
+        ]
+        pga.upsert_games(games_data)
+        added_games = [game_data["id"] for game_data in games_data]
         if not full:
             return added_games, games
         return added_games, []
@@ -203,16 +203,18 @@ class HumbleBundleSyncer:
         if not humbleids:
             return ([], [])
         lutris_games = api.get_api_games(humbleids, query_type="humblestoreid")
-        added_games = []
-        for game in lutris_games:
-            game_data = {
+        games_data = [
+            {
                 "name": game["name"],
                 "slug": game["slug"],
                 "year": game["year"],
                 "updated": game["updated"],
                 "humblestoreid": game["humblestoreid"],
             }
-            added_games.append(pga.add_or_update(**game_data))
+            for game in lutris_games
+        ]
+        pga.upsert_games(games_data)
+        added_games = [game_data["id"] for game_data in games_data]
         if not full:
             return added_games, games
         return added_games, []
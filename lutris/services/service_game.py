@@ -38,8 +38,8 @@ class ServiceGame:
             return int(self.appid)
         return None
 
-    def install(self, updated_info=None):
-        """Add an installed game to the library
+    def get_install_params(self, updated_info=None):
+        """Return the fields of the library entry for this game
 
         Params:
             updated_info (dict): Optional dictonary containing existing data not to overwrite
@@ -50,19 +50,47 @@ class ServiceGame:
         else:
             name = self.name
             slug = self.slug
-        self.game_id = pga.add_or_update(
-            id=self.game_id,
-            name=name,
-            runner=self.runner,
-            slug=slug,
-            steamid=self.steamid,
-            installed=1,
-            configpath=self.config_id,
-            installer_slug=self.installer_slug,
-        )
+        return {
+            "id": self.game_id,
+            "name": name,
+            "runner": self.runner,
+            "slug": slug,
+            "steamid": self.steamid,
+            "installed": 1,
+            "configpath": self.config_id,
+            "installer_slug": self.installer_slug,
+        }
+
+    def install(self, updated_info=None):
+        """Add an installed game to the library
+
+        Params:
+            updated_info (dict): Optional dictonary containing existing data not to overwrite
+        """
+        self.game_id = pga.add_or_update(**self.get_install_params(updated_info))
         self.create_config()
         return self.game_id
 
+    @staticmethod
+    def install_many(service_games):
+        """Add several installed games to the library in a single transaction
+
+        Params:
+            service_games (list): List of (ServiceGame, updated_info) tuples
+
+        Returns:
+            list: The game ids, in the same order as `service_games`
+        """
+        games = [
+            service_game.get_install_params(updated_info)
+            for service_game, updated_info in service_games
+        ]
+        pga.upsert_games(games)
+        for (service_game, _updated_info), game in zip(service_games, games):
+            service_game.game_id = game["id"]
+            service_game.create_config()
+        return [game["id"] for game in games]
+
     def uninstall(self):
         """Uninstall a game from Lutris"""
         return pga.add_or_update(id=self.game_id, installed=0)
@@ -2,7 +2,7 @@
 import os
 import re
 
-from lutris import pga
+from lutris.catalog import CATALOG
 from lutris.config import make_game_config_id, LutrisConfig
 from lutris.util.steam.appmanifest import AppManifest, get_appmanifests
 from lutris.util.steam.config import get_steamapps_paths
@@ -81,9 +81,7 @@ class SteamSyncer:
     def lutris_games(self):
         """Return all Steam games present in the Lutris library"""
         if not self._lutris_games:
-            self._lutris_games = pga.get_games_where(
-                steamid__isnull=False, steamid__not=""
-            )
+            self._lutris_games = CATALOG.get_games_with("steamid")
         return self._lutris_games
 
     @property
@@ -108,10 +106,9 @@ class SteamSyncer:
 
     def get_pga_game(self, game):
         """Return a PGA game if one is found"""
-        for pga_game in self.lutris_games:
+        for pga_game in CATALOG.get_games(steamid=game.appid):
             if (
-                    str(pga_game["steamid"]) == game.appid
-                    and (pga_game["runner"] == self.runner or not pga_game["runner"])
+                    (pga_game["runner"] == self.runner or not pga_game["runner"])
                     and not pga_game["installed"]
             ):
                 return pga_game
@@ -119,7 +116,7 @@ class SteamSyncer:
     def sync(self, games, full=False):
         """Syncs Steam games to Lutris"""
         available_ids = set()  # Set of Steam appids seen while browsing AppManifests
-        added_games = []
+        installs = []
         for game in games:
             steamid = game.appid
             available_ids.add(steamid)
@@ -131,13 +128,14 @@ class SteamSyncer:
                         and pga_game["installed"] != 1
                         and pga_game["installed"]
                 ):
-                    added_games.append(game.install())
+                    installs.append((game, None))
 
             if steamid not in self.lutris_steamids:
-                added_games.append(game.install())
+                installs.append((game, None))
             else:
                 if pga_game:
-                    added_games.append(game.install(pga_game))
+                    installs.append((game, pga_game))
+        added_games = SteamGame.install_many(installs)
 
         if not full:
             return added_games, games
@@ -145,12 +143,8 @@ class SteamSyncer:
         removed_games = []
         unavailable_ids = self.lutris_steamids.difference(available_ids)
         for steamid in unavailable_ids:
-            for pga_game in self.lutris_games:
-                if (
-                        str(pga_game["steamid"]) == steamid
-                        and pga_game["installed"]
-                        and pga_game["runner"] == self.runner
-                ):
+            for pga_game in CATALOG.get_games(steamid=steamid):
+                if pga_game["installed"] and pga_game["runner"] == self.runner:
                     game = SteamGame.new_from_lutris_id(pga_game["id"])
                     game.uninstall()
                     removed_games.append(pga_game["id"])
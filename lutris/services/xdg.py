@@ -7,7 +7,7 @@ import re
 
 from gi.repository import Gio
 
-from lutris import pga
+from lutris.catalog import CATALOG
 from lutris.util import system
 from lutris.util.log import logger
 from lutris.util.strings import slugify
@@ -133,7 +133,7 @@ class XDGSyncer:
     @property
     def lutris_games(self):
         """Iterates through Lutris games imported from XDG"""
-        for game in pga.get_games_where(
+        for game in CATALOG.get_games(
                 runner=XDGGame.runner, installer_slug=XDGGame.installer_slug, installed=1
         ):
             yield game
@@ -184,13 +184,13 @@ class XDGSyncer:
         """
         installed_games = {game["slug"]: game for game in self.lutris_games}
         available_games = set()
-        added_games = []
+        installs = []
         removed_games = []
         for xdg_game in games:
             available_games.add(xdg_game.slug)
             if xdg_game.slug not in installed_games.keys():
-                game_id = xdg_game.install()
-                added_games.append(game_id)
+                installs.append((xdg_game, None))
+        added_games = XDGGame.install_many(installs)
 
         if not full:
             return added_games, games
@@ -3,12 +3,16 @@
 import os
 from lutris.util.log import logger
 from lutris import pga
+from lutris.catalog import CATALOG
 from lutris.game import Game
 from lutris import settings
 from lutris.util.system import create_folder
 from lutris.util.graphics import drivers
 from lutris.util.graphics import vkquery
+from lutris.util.jobs import DEFERRED_TASKS, thread_safe_call
 from lutris.util.linux import LINUX_SYSTEM
+from lutris.util.profiling import STARTUP_PROFILER
+from lutris.util.wine.dxvk import init_dxvk_versions
 from lutris.gui.dialogs import DontShowAgainDialog
 
 
@@ -41,12 +45,16 @@ def init_db():
 
 def init_lutris():
     """Run full initialization of Lutris"""
-    init_dirs()
-    init_db()
+    with STARTUP_PROFILER.phase("init directories"):
+        init_dirs()
+    with STARTUP_PROFILER.phase("init database"):
+        init_db()
 
 
 def check_driver():
-    """Report on the currently running driver"""
+    """Report on the currently running driver.
+    Runs in a worker thread, see schedule_all_checks.
+    """
     driver_info = {}
     if drivers.is_nvidia():
         driver_info = drivers.get_nvidia_driver_info()
@@ -85,7 +93,7 @@ def check_driver():
     if drivers.is_outdated():
         setting = "hide-outdated-nvidia-driver-warning"
         if settings.read_setting(setting) != "True":
-            DontShowAgainDialog(
+            thread_safe_call(lambda: DontShowAgainDialog(
                 setting,
                 "Your Nvidia driver is outdated.",
                 secondary_message="You are currently running driver %s which does not "
@@ -93,11 +101,13 @@ def check_driver():
                 "Please upgrade your driver as described in our "
                 "<a href='https://github.com/lutris/lutris/wiki/Installing-drivers'>"
                 "installation guide</a>" % driver_info["nvrm"]["version"],
-            )
+            ))
 
 
 def check_libs(all_components=False):
-    """Checks that required libraries are installed on the system"""
+    """Checks that required libraries are installed on the system.
+    Runs in a worker thread, see schedule_all_checks.
+    """
     missing_libs = LINUX_SYSTEM.get_missing_libs()
     if all_components:
         components = LINUX_SYSTEM.requirements
@@ -114,7 +124,7 @@ def check_libs(all_components=False):
     if missing_vulkan_libs:
         setting = "dismiss-missing-vulkan-library-warning"
         if settings.read_setting(setting) != "True":
-            DontShowAgainDialog(
+            thread_safe_call(lambda: DontShowAgainDialog(
                 setting,
                 "Missing vulkan libraries",
                 secondary_message="Lutris was unable to detect Vulkan support for "
@@ -123,7 +133,7 @@ def check_libs(all_components=False):
                 "To install it, please use the following guide: "
                 "<a href='https://github.com/lutris/lutris/wiki/Installing-drivers'>"
                 "Installing Graphics Drivers</a>" % " and ".join(missing_vulkan_libs),
-            )
+            ))
 
 
 def check_vulkan():
@@ -154,8 +164,7 @@ def fill_missing_platforms():
     """Sets the platform on games where it's missing.
     This should never happen.
     """
-    pga_games = pga.get_games(filter_installed=True)
-    for pga_game in pga_games:
+    for pga_game in CATALOG.get_games(installed=1):
         if pga_game.get("platform") or not pga_game["runner"]:
             continue
         game = Game(game_id=pga_game["id"])
@@ -165,10 +174,14 @@ def fill_missing_platforms():
             game.save(metadata_only=True)
 
 
-def run_all_checks():
-    """Run all startup checks"""
-    check_driver()
-    check_libs()
-    check_vulkan()
-    check_donate()
-    fill_missing_platforms()
+def schedule_all_checks():
+    """Run the startup checks once the main window is shown. The probes run
+    in a worker thread, the checks changing games or showing dialogs on
+    their own run in the main loop.
+    """
+    DEFERRED_TASKS.add("driver check", check_driver)
+    DEFERRED_TASKS.add("library check", check_libs)
+    DEFERRED_TASKS.add("vulkan check", check_vulkan)
+    DEFERRED_TASKS.add("DXVK versions", init_dxvk_versions)
+    DEFERRED_TASKS.add("donation reminder", check_donate, threaded=False)
+    DEFERRED_TASKS.add("missing platforms", fill_missing_platforms, threaded=False)
@@ -38,12 +38,15 @@ def sync_game_details(remote_library):
     """
     if not remote_library:
         return set()
-    updated = set()
+    updates = []
+    local_games = {}
+    for game in pga.get_games_by_field_values("slug", {game["slug"] for game in remote_library}):
+        local_games.setdefault(game["slug"], game)
 
     for remote_game in remote_library:
         slug = remote_game["slug"]
         sync_required = False
-        local_game = pga.get_game_by_field(slug, "slug")
+        local_game = local_games.get(slug)
         if not local_game:
             continue
         if local_game["updated"] and remote_game["updated"] > local_game["updated"]:
@@ -54,16 +57,15 @@ def sync_game_details(remote_library):
             continue
 
         logger.debug("Syncing details for %s", slug)
-        game_id = pga.add_or_update(
-            id=local_game["id"],
-            name=local_game["name"],
-            runner=local_game["runner"],
-            slug=slug,
-            year=remote_game["year"],
-            updated=remote_game["updated"],
-            steamid=remote_game["steamid"],
-        )
-        updated.add(game_id)
+        updates.append({
+            "id": local_game["id"],
+            "name": local_game["name"],
+            "runner": local_game["runner"],
+            "slug": slug,
+            "year": remote_game["year"],
+            "updated": remote_game["updated"],
+            "steamid": remote_game["steamid"],
+        })
 
         if not local_game.get("has_custom_banner") and remote_game["banner_url"]:
             path = resources.get_banner_path(slug)
@@ -72,6 +74,8 @@ def sync_game_details(remote_library):
             path = resources.get_icon_path(slug)
             resources.download_media(remote_game["icon_url"], path, overwrite=True)
 
+    pga.upsert_games(updates)
+    updated = {game["id"] for game in updates}
     if updated:
         logger.debug("%d games updated", len(updated))
     return updated
@@ -492,14 +492,12 @@ def with_runner_overrides(runner_slug):
     """Return system options updated with overrides from given runner."""
     options = system_options
     try:
-        runner = runners.import_runner(runner_slug)
+        runner_info = runners.get_runner_info(runner_slug)
     except runners.InvalidRunner:
         return options
-    if not getattr(runner, "system_options_override"):
-        runner = runner()
-    if runner.system_options_override:
+    if runner_info.system_options_override:
         opts_dict = OrderedDict((opt["option"], opt) for opt in options)
-        for option in runner.system_options_override:
+        for option in runner_info.system_options_override:
             key = option["option"]
             if opts_dict.get(key):
                 opts_dict[key] = opts_dict[key].copy()
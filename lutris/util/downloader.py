@@ -1,9 +1,14 @@
 import os
+import json
 import time
+import hashlib
+import threading
+import concurrent.futures
+from urllib.parse import urlparse
 import requests
 
 from lutris import __version__
-from lutris.util import jobs
+from lutris.util import extract, jobs, system
 from lutris.util.log import logger
 
 # `time.time` can skip ahead or even go backwards if the current
@@ -12,6 +17,44 @@ from lutris.util.log import logger
 # download speeds.
 get_time = time.monotonic
 
+# Size of the blocks read from the network and written to disk
+CHUNK_SIZE = 1024 * 1024
+
+# Number of connections used to download a file from servers supporting
+# range requests
+MAX_CONNECTIONS = 4
+
+# Files smaller than 2 segments are downloaded with a single connection
+MIN_SEGMENT_SIZE = 16 * 1024 * 1024
+
+# Delay in seconds between two updates of the resume journal
+JOURNAL_INTERVAL = 5
+
+# Number of files a DownloadQueue downloads at the same time
+MAX_DOWNLOADS = 3
+
+
+def get_segments(size, count):
+    """Split `size` bytes in at most `count` segments of at least
+    MIN_SEGMENT_SIZE bytes. Segments are [start, end, downloaded] lists, the
+    end being excluded.
+    """
+    count = max(1, min(count, size // MIN_SEGMENT_SIZE))
+    bounds = [size * index // count for index in range(count + 1)]
+    return [[bounds[index], bounds[index + 1], 0] for index in range(count)]
+
+
+def format_time_left(seconds):
+    """Return a duration in seconds as a string"""
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%d:%02d:%02d" % (hours, minutes, seconds)
+
+
+def get_validator(response):
+    """Return the value identifying the version of a remote file"""
+    return response.headers.get("ETag") or response.headers.get("Last-Modified")
+
 
 class Downloader:
     """Non-blocking downloader.
@@ -19,18 +62,29 @@ class Downloader:
     Do start() then check_progress() at regular intervals.
     Download is done when check_progress() returns 1.0.
     Stop with cancel().
+
+    Large files served with range support are downloaded in segments over
+    several connections. The progress of each segment is kept in a journal
+    next to the destination file, a download that failed is resumed the
+    next time the same URL is downloaded to the same destination.
+
+    If `hash_type` is given, the file is hashed as it is written. The
+    checksum is available in `checksum` once the download is completed and
+    is recorded next to the file.
     """
 
     (INIT, DOWNLOADING, CANCELLED, ERROR, COMPLETED) = list(range(5))
 
-    def __init__(self, url, dest, overwrite=False, referer=None, callback=None):
+    def __init__(self, url, dest, overwrite=False, referer=None, callback=None, hash_type=None):
         self.url = url
         self.dest = dest
         self.overwrite = overwrite
         self.referer = referer
-        self.stop_request = None
+        self.journal_path = dest + ".journal"
+        self.stop_request = threading.Event()
         self.thread = None
         self.callback = callback
+        self.keep_files = False  # Set when cancelled to resume later
 
         # Read these after a check_progress()
         self.state = self.INIT
@@ -48,18 +102,22 @@ class Downloader:
         self.last_speeds = []
         self.speed_check_time = 0
         self.time_left_check_time = 0
-        self.file_pointer = None
+        self.size_lock = threading.Lock()
+        self.segments = []  # Ranges downloaded in parallel
+        self.hash_type = hash_type
+        self.hasher = None
+        self.hash_offset = 0  # Bytes hashed, from the start of the file
+        self.hash_lock = threading.Lock()
+        self.checksum = None
 
     def start(self):
         """Start download job."""
         logger.debug("Starting download of:\n %s", self.url)
         self.state = self.DOWNLOADING
         self.last_check_time = get_time()
-        if self.overwrite and os.path.isfile(self.dest):
+        if self.overwrite and os.path.isfile(self.dest) and not os.path.isfile(self.journal_path):
             os.remove(self.dest)
-        self.file_pointer = open(self.dest, "wb")
         self.thread = jobs.AsyncCall(self.async_download, self.on_done)
-        self.stop_request = self.thread.stop_request
 
     def check_progress(self):
         """Append last downloaded chunk to dest file and store stats.
@@ -69,26 +127,29 @@ class Downloader:
             self.get_stats()
         return self.progress_fraction
 
-    def cancel(self):
-        """Request download stop and remove destination file."""
+    def cancel(self, keep_files=False):
+        """Request download stop and remove destination file. With
+        `keep_files`, the file and its journal are kept to resume the
+        download later.
+        """
         logger.debug("Download of %s cancelled", self.url)
         self.state = self.CANCELLED
-        if self.stop_request:
-            self.stop_request.set()
-        if self.file_pointer:
-            self.file_pointer.close()
-            self.file_pointer = None
-        if os.path.isfile(self.dest):
-            os.remove(self.dest)
+        self.keep_files = keep_files
+        self.stop_request.set()
+        if not keep_files:
+            self.remove_files()
+
+    def remove_files(self):
+        """Remove the destination file, with its journal and checksum"""
+        for path in (self.dest, self.journal_path, system.get_checksums_path(self.dest)):
+            if os.path.isfile(path):
+                os.remove(path)
 
     def on_done(self, _result, error):
         if error:
             logger.error("Download failed: %s", error)
             self.state = self.ERROR
             self.error = error
-            if self.file_pointer:
-                self.file_pointer.close()
-                self.file_pointer = None
             return
 
         if self.state == self.CANCELLED:
@@ -102,27 +163,195 @@ class Downloader:
             self.progress_fraction = 1.0
             self.progress_percentage = 100
         self.state = self.COMPLETED
-        self.file_pointer.close()
-        self.file_pointer = None
         if self.callback:
             self.callback()
 
-    def async_download(self, stop_request=None):
+    def get_headers(self):
+        """Return the headers sent with the requests"""
         headers = requests.utils.default_headers()
         headers["User-Agent"] = "Lutris/%s" % __version__
         if self.referer:
             headers["Referer"] = self.referer
+        return headers
+
+    def async_download(self):
+        try:
+            self.download()
+        finally:
+            # The files may have been created after cancel() removed them
+            if self.state == self.CANCELLED and not self.keep_files:
+                self.remove_files()
+
+    def download(self):
+        headers = self.get_headers()
         response = requests.get(self.url, headers=headers, stream=True)
         if response.status_code != 200:
             logger.info("%s returned a %s error" % (self.url, response.status_code))
         response.raise_for_status()
+        if self.stop_request.is_set():
+            response.close()
+            return
         self.full_size = int(response.headers.get("Content-Length", "").strip() or 0)
-        for chunk in response.iter_content(chunk_size=1024 * 1024):
-            if not self.file_pointer:
+        if self.hash_type:
+            self.hasher = hashlib.new(self.hash_type)
+        if (
+                self.full_size >= 2 * MIN_SEGMENT_SIZE
+                and response.headers.get("Accept-Ranges") == "bytes"
+                and "Content-Encoding" not in response.headers
+        ):
+            response.close()
+            headers["Accept-Encoding"] = "identity"
+            self.download_segments(response.url, headers, get_validator(response))
+        else:
+            self.download_stream(response)
+        if self.hasher and not self.stop_request.is_set():
+            self.checksum = self.hasher.hexdigest()
+            system.save_file_checksum(self.dest, self.hash_type, self.checksum)
+
+    def download_stream(self, response):
+        """Write the body of `response` to the destination file"""
+        with open(self.dest, "wb") as dest_file:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if self.stop_request.is_set():
+                    break
+                if chunk:
+                    self.downloaded_size += len(chunk)
+                    dest_file.write(chunk)
+                    if self.hasher:
+                        self.hasher.update(chunk)
+
+    def download_segments(self, url, headers, validator):
+        """Download the file in segments, each in its own thread, writing
+        them in place in the destination file.
+        """
+        segments = self.load_journal(validator)
+        if segments:
+            logger.info("Resuming download of %s", self.url)
+            file_desc = os.open(self.dest, os.O_RDWR)
+        else:
+            segments = get_segments(self.full_size, MAX_CONNECTIONS)
+            if os.path.isfile(self.journal_path):
+                os.remove(self.journal_path)
+            file_desc = os.open(self.dest, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.posix_fallocate(file_desc, 0, self.full_size)
+            except OSError:
+                # Not supported by the file system
+                os.ftruncate(file_desc, self.full_size)
+        self.downloaded_size = sum(segment[2] for segment in segments)
+        self.segments = segments
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                futures = [
+                    executor.submit(self.download_segment, url, headers, file_desc, segment)
+                    for segment in segments
+                    if segment[2] < segment[1] - segment[0]
+                ]
+                pending = futures
+                while pending:
+                    done, pending = concurrent.futures.wait(
+                        pending,
+                        timeout=JOURNAL_INTERVAL,
+                        return_when=concurrent.futures.FIRST_EXCEPTION
+                    )
+                    if any(future.exception() for future in done):
+                        # Stop the other segments, the download is resumed
+                        # from the journal on the next try.
+                        self.stop_request.set()
+                    self.save_journal(file_desc, validator, segments)
+                for future in futures:
+                    future.result()
+            if self.hasher:
+                self.update_hash(file_desc)
+        finally:
+            os.close(file_desc)
+        if self.stop_request.is_set():
+            return
+        if self.downloaded_size != self.full_size:
+            raise RuntimeError("Incomplete download of %s" % self.url)
+        if os.path.isfile(self.journal_path):
+            os.remove(self.journal_path)
+
+    def download_segment(self, url, headers, file_desc, segment):
+        """Download the rest of a segment"""
+        start, end, downloaded = segment
+        headers = dict(headers, Range="bytes=%d-%d" % (start + downloaded, end - 1))
+        response = requests.get(url, headers=headers, stream=True)
+        response.raise_for_status()
+        if response.status_code != 206:
+            response.close()
+            raise RuntimeError("%s doesn't support range requests" % self.url)
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if self.stop_request.is_set():
                 break
-            if chunk:
+            chunk = chunk[:end - start - segment[2]]
+            offset = start + segment[2]
+            os.pwrite(file_desc, chunk, offset)
+            segment[2] += len(chunk)
+            with self.size_lock:
                 self.downloaded_size += len(chunk)
-                self.file_pointer.write(chunk)
+            if self.hasher:
+                self.update_hash(file_desc, offset, chunk)
+            if start + segment[2] == end:
+                break
+        response.close()
+
+    def update_hash(self, file_desc, offset=None, chunk=None):
+        """Hash the data written since the last call, in the order of the
+        file. A chunk written right after the data already hashed is used
+        directly, the data written further in the file is read back when
+        the previous segments are complete.
+        """
+        with self.hash_lock:
+            if offset == self.hash_offset:
+                self.hasher.update(chunk)
+                self.hash_offset += len(chunk)
+            for start, _end, downloaded in self.segments:
+                while start <= self.hash_offset < start + downloaded:
+                    data = os.pread(
+                        file_desc,
+                        min(CHUNK_SIZE, start + downloaded - self.hash_offset),
+                        self.hash_offset
+                    )
+                    self.hasher.update(data)
+                    self.hash_offset += len(data)
+
+    def load_journal(self, validator):
+        """Return the segments of a previous download of the same file"""
+        if not validator:
+            # Without it, a modified file can't be told apart
+            return None
+        try:
+            with open(self.journal_path) as journal_file:
+                journal = json.load(journal_file)
+        except (OSError, ValueError):
+            return None
+        if (
+                journal.get("url") != self.url
+                or journal.get("size") != self.full_size
+                or journal.get("validator") != validator
+        ):
+            logger.debug("The file at %s changed, download restarted", self.url)
+            return None
+        if not os.path.isfile(self.dest) or os.path.getsize(self.dest) != self.full_size:
+            return None
+        return journal.get("segments")
+
+    def save_journal(self, file_desc, validator, segments):
+        """Record the progress of the segments"""
+        if (self.state == self.CANCELLED and not self.keep_files) or not validator:
+            return
+        journal = {
+            "url": self.url,
+            "size": self.full_size,
+            "validator": validator,
+            "segments": [list(segment) for segment in segments],
+        }
+        # The journal can't be ahead of the data on disk
+        os.fdatasync(file_desc)
+        with open(self.journal_path + ".tmp", "w") as journal_file:
+            json.dump(journal, journal_file)
+        os.replace(self.journal_path + ".tmp", self.journal_path)
 
     def get_stats(self):
         """Calculate and store download stats."""
@@ -170,7 +399,226 @@ class Downloader:
             return self.time_left
 
         average_time_left = (self.full_size - self.downloaded_size) / self.average_speed
-        minutes, seconds = divmod(average_time_left, 60)
-        hours, minutes = divmod(minutes, 60)
         self.time_left_check_time = get_time()
-        return "%d:%02d:%02d" % (hours, minutes, seconds)
+        return format_time_left(average_time_left)
+
+
+class DownloadQueue:
+    """Downloads of several files, `max_downloads` at a time.
+
+    The queue can be used in place of a Downloader, it reports the total
+    progress of its files. The callbacks given with the files aren't called,
+    they are kept in `callbacks` to be run once all the files are downloaded.
+    """
+
+    (INIT, DOWNLOADING, CANCELLED, ERROR, COMPLETED) = list(range(5))
+
+    def __init__(self, max_downloads=MAX_DOWNLOADS):
+        self.max_downloads = max_downloads
+        self.downloaders = []
+        self.callbacks = []
+
+        # Read these after a check_progress()
+        self.state = self.INIT
+        self.error = None
+        self.downloaded_size = 0  # Bytes
+        self.full_size = 0  # Bytes, of the files whose download started
+        self.progress_fraction = 0
+        self.progress_percentage = 0
+        self.speed = 0
+        self.average_speed = 0
+        self.time_left = "00:00:00"
+
+    def __len__(self):
+        return len(self.downloaders)
+
+    def add(self, url, dest, callback=None, data=None, referer=None, hash_type=None):
+        """Add a file to download, the arguments are the same as those of the
+        downloader used by InstallerFile.download
+        """
+        self.downloaders.append(
+            Downloader(url, dest, overwrite=True, referer=referer, hash_type=hash_type)
+        )
+        if callback:
+            self.callbacks.append((callback, data or {}))
+
+    def start(self):
+        """Start the first downloads"""
+        self.state = self.DOWNLOADING
+        self.start_downloads()
+
+    def start_downloads(self):
+        """Start queued downloads, up to `max_downloads` at the same time"""
+        active_count = len(self.get_active_downloaders())
+        for downloader in self.downloaders:
+            if active_count >= self.max_downloads:
+                break
+            if downloader.state == downloader.INIT:
+                downloader.start()
+                active_count += 1
+
+    def get_active_downloaders(self):
+        return [
+            downloader for downloader in self.downloaders
+            if downloader.state == downloader.DOWNLOADING
+        ]
+
+    def check_progress(self):
+        """Update the downloads, start the next ones and store stats.
+
+        :return: progress (between 0.0 and 1.0)"""
+        if self.state != self.DOWNLOADING:
+            return self.progress_fraction
+        for downloader in self.get_active_downloaders():
+            downloader.check_progress()
+        failed = [
+            downloader for downloader in self.downloaders
+            if downloader.state == downloader.ERROR
+        ]
+        if failed:
+            self.state = self.ERROR
+            self.error = failed[0].error
+            # The other files are kept, to resume them on the next try
+            self.cancel_downloads(keep_files=True)
+            return self.progress_fraction
+        self.start_downloads()
+
+        active_downloaders = self.get_active_downloaders()
+        self.speed = sum(downloader.speed for downloader in active_downloaders)
+        self.average_speed = sum(downloader.average_speed for downloader in active_downloaders)
+        self.downloaded_size = sum(downloader.downloaded_size for downloader in self.downloaders)
+        self.full_size = sum(downloader.full_size for downloader in self.downloaders)
+        if all(downloader.state == downloader.COMPLETED for downloader in self.downloaders):
+            self.state = self.COMPLETED
+            self.progress_fraction = 1.0
+        elif self.full_size:
+            self.progress_fraction = min(float(self.downloaded_size) / float(self.full_size), 1.0)
+            if self.average_speed:
+                self.time_left = format_time_left(
+                    max(self.full_size - self.downloaded_size, 0) / self.average_speed
+                )
+        self.progress_percentage = self.progress_fraction * 100
+        return self.progress_fraction
+
+    def cancel_downloads(self, keep_files=False):
+        """Stop the downloads in progress"""
+        for downloader in self.get_active_downloaders():
+            downloader.cancel(keep_files=keep_files)
+
+    def cancel(self):
+        """Stop the downloads in progress and remove their files"""
+        logger.debug("Downloads cancelled")
+        self.state = self.CANCELLED
+        self.cancel_downloads()
+
+
+class ResponseStream:
+    """Body of a download read as a file object, used to extract archives
+    while they are downloaded.
+    """
+
+    def __init__(self, downloader, response):
+        self.downloader = downloader
+        self.chunks = response.iter_content(chunk_size=CHUNK_SIZE)
+        self.chunk = b""
+        self.offset = 0
+
+    def next_chunk(self):
+        """Return the next block of the download, empty once it is over"""
+        if self.downloader.stop_request.is_set():
+            return b""
+        for chunk in self.chunks:
+            if chunk:
+                self.downloader.downloaded_size += len(chunk)
+                if self.downloader.hasher:
+                    self.downloader.hasher.update(chunk)
+                return chunk
+        return b""
+
+    def read(self, size=-1):
+        parts = []
+        while size:
+            if self.offset == len(self.chunk):
+                self.chunk = self.next_chunk()
+                self.offset = 0
+                if not self.chunk:
+                    break
+            end = len(self.chunk) if size < 0 else min(len(self.chunk), self.offset + size)
+            parts.append(self.chunk[self.offset:end])
+            if size > 0:
+                size -= end - self.offset
+            self.offset = end
+        return b"".join(parts)
+
+
+class ArchiveDownloader(Downloader):
+    """Downloader extracting a tar archive to `dest` while it is downloaded,
+    without writing the archive to disk.
+
+    The extracted files are moved in place once the whole archive is read
+    and its checksum, if given as "type:value", is verified. `replace_path`
+    is removed just before, to replace a previous version of the files.
+    """
+
+    def __init__(
+            self,
+            url,
+            dest,
+            merge_single=True,
+            checksum=None,
+            replace_path=None,
+            referer=None,
+            callback=None,
+    ):  # pylint: disable=too-many-arguments
+        hash_type, _sep, expected_checksum = (checksum or "").partition(":")
+        super().__init__(url, dest, referer=referer, callback=callback, hash_type=hash_type or None)
+        self.expected_checksum = expected_checksum
+        self.merge_single = merge_single
+        self.replace_path = replace_path
+        self.mode = extract.get_tar_stream_mode(urlparse(url).path) or "r|*"
+        self.extracted = False
+
+    def cancel(self):
+        """Request download stop, the files extracted so far are removed."""
+        logger.debug("Download of %s cancelled", self.url)
+        self.state = self.CANCELLED
+        self.stop_request.set()
+
+    def async_download(self):
+        response = requests.get(self.url, headers=self.get_headers(), stream=True)
+        if response.status_code != 200:
+            logger.info("%s returned a %s error" % (self.url, response.status_code))
+        response.raise_for_status()
+        self.full_size = int(response.headers.get("Content-Length", "").strip() or 0)
+        if self.hash_type:
+            self.hasher = hashlib.new(self.hash_type)
+        os.makedirs(self.dest, exist_ok=True)
+        stream = ResponseStream(self, response)
+        try:
+            temp_dir = extract.extract_tar_stream(stream, self.dest, self.mode)
+        except extract.ExtractFailure:
+            if self.stop_request.is_set():
+                return
+            raise
+        # Read what follows the end of the archive, for the checksum
+        while stream.read(CHUNK_SIZE):
+            pass
+        if self.stop_request.is_set():
+            system.remove_folder(temp_dir)
+            return
+        if self.hasher:
+            self.checksum = self.hasher.hexdigest()
+            if self.expected_checksum and self.checksum != self.expected_checksum:
+                system.remove_folder(temp_dir)
+                raise RuntimeError("%s checksum mismatch for %s" % (self.hash_type, self.url))
+        if self.replace_path and os.path.exists(self.replace_path):
+            system.remove_folder(self.replace_path)
+        extract.move_extracted(temp_dir, self.dest, self.merge_single)
+        self.extracted = True
+
+    def get_stats(self):
+        super().get_stats()
+        if not self.extracted:
+            # The download is done once the files are in place
+            self.progress_fraction = min(self.progress_fraction, 0.99)
+            self.progress_percentage = self.progress_fraction * 100
@@ -1,16 +1,45 @@
 import os
 import errno
+import concurrent.futures
 import uuid
 import shutil
 import tarfile
 import subprocess
 import gzip
+import lzma
 import zlib
 from lutris.util import system
 from lutris.util.log import logger
 from lutris import settings
 
 
+# Extensions of the tar archives that can be extracted while downloaded
+TAR_STREAM_MODES = (
+    (".tar.gz", "r|gz"),
+    (".tgz", "r|gz"),
+    (".tar.xz", "r|xz"),
+    (".txz", "r|xz"),
+    (".tar.bz2", "r|bz2"),
+    (".tbz", "r|bz2"),
+    (".tar", "r|"),
+)
+
+# Size of the blocks read from a tar archive extracted as a stream
+TAR_STREAM_BUFFER_SIZE = 1024 * 1024
+
+# Threads writing the files of a tar archive
+EXTRACT_THREADS = min(8, (os.cpu_count() or 1) * 2)
+
+# Files of a tar archive larger than this are extracted by tarfile directly
+MAX_THREADED_FILE_SIZE = 4 * 1024 * 1024
+
+# Data of a tar archive read but not written yet
+MAX_PENDING_SIZE = 64 * 1024 * 1024
+
+# Size of the blocks decompressed at once from gzip files
+GZIP_BLOCK_SIZE = 1024 * 1024
+
+
 class ExtractFailure(Exception):
     """Exception raised when and archive fails to extract"""
 
@@ -114,12 +143,20 @@ def extract_archive(path, to_directory=".", merge_single=True, extractor=None):
         raise RuntimeError("Could not extract `%s` - unknown format specified" % path)
 
     temp_name = ".extract-" + random_id()
-    temp_path = temp_dir = os.path.join(to_directory, temp_name)
+    temp_path = os.path.join(to_directory, temp_name)
     try:
         _do_extract(path, temp_path, opener, mode, extractor)
     except (OSError, zlib.error, tarfile.ReadError, EOFError) as ex:
         logger.error("Extraction failed: %s", ex)
         raise ExtractFailure(str(ex))
+    move_extracted(temp_path, to_directory, merge_single)
+    logger.debug("Finished extracting %s to %s", path, to_directory)
+    return path, to_directory
+
+
+def move_extracted(temp_dir, to_directory, merge_single=True):
+    """Move the files extracted in `temp_dir` to their destination"""
+    temp_path = temp_dir
     if merge_single:
         extracted = os.listdir(temp_path)
         if len(extracted) == 1:
@@ -148,7 +185,7 @@ def extract_archive(path, to_directory=".", merge_single=True, extractor=None):
                     shutil.move(source_path, destination_path)
                 elif os.path.isdir(destination_path):
                     try:
-                        system.merge_folders(source_path, destination_path)
+                        system.merge_folders(source_path, destination_path, move=True)
                     except OSError as ex:
                         logger.error(
                             "Failed to merge to destination %s: %s",
@@ -159,8 +196,109 @@ def extract_archive(path, to_directory=".", merge_single=True, extractor=None):
             else:
                 shutil.move(source_path, destination_path)
         system.remove_folder(temp_dir)
-    logger.debug("Finished extracting %s to %s", path, to_directory)
-    return path, to_directory
+
+
+def get_tar_stream_mode(path):
+    """Return the mode to read the tar archive at `path` as a stream, None if
+    it isn't a tar archive.
+    """
+    for extension, mode in TAR_STREAM_MODES:
+        if path.endswith(extension):
+            return mode
+    return None
+
+
+def extract_tar_stream(stream, to_directory=".", mode="r|*"):
+    """Extract a tar archive read from a file object, such as a download in
+    progress. The files are extracted to a temporary folder in
+    `to_directory`, whose path is returned, move_extracted puts them in place.
+    """
+    temp_dir = os.path.join(to_directory, ".extract-" + random_id())
+    try:
+        with tarfile.open(fileobj=stream, mode=mode, bufsize=TAR_STREAM_BUFFER_SIZE) as handler:
+            extract_tar(handler, temp_dir)
+    except (OSError, zlib.error, lzma.LZMAError, tarfile.TarError, EOFError) as ex:
+        system.remove_folder(temp_dir)
+        logger.error("Extraction failed: %s", ex)
+        raise ExtractFailure(str(ex))
+    except Exception:
+        system.remove_folder(temp_dir)
+        raise
+    return temp_dir
+
+
+def extract_tar(handler, dest):
+    """Extract an open tar archive to `dest`.
+
+    The archive is read in order, in the calling thread. Regular files up to
+    MAX_THREADED_FILE_SIZE are written by a pool of threads, the other
+    members are extracted by tarfile as they come. At most
+    MAX_PENDING_SIZE bytes are waiting to be written at any time.
+    """
+    dest = os.path.realpath(dest)
+    os.makedirs(dest, exist_ok=True)
+    directories = []
+    pending = set()
+    pending_names = set()
+    pending_size = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=EXTRACT_THREADS) as executor:
+        for member in handler:
+            path = os.path.abspath(os.path.join(dest, member.name))
+            # Follow the symbolic links extracted before, a member written
+            # through one of them could land anywhere.
+            path = os.path.join(os.path.realpath(os.path.dirname(path)), os.path.basename(path))
+            if not _is_inside(dest, path):
+                raise ExtractFailure("%s is outside of the destination" % member.name)
+            if member.islnk() and not _is_inside(dest, os.path.realpath(os.path.join(dest, member.linkname))):
+                raise ExtractFailure("%s links outside of the destination" % member.name)
+            if member.isreg() and member.size <= MAX_THREADED_FILE_SIZE:
+                if member.name in pending_names or pending_size > MAX_PENDING_SIZE:
+                    _wait_for_writes(pending)
+                    pending_names.clear()
+                    pending_size = 0
+                data = handler.extractfile(member).read()
+                pending.add(executor.submit(_write_tar_member, member, data, path))
+                pending_names.add(member.name)
+                pending_size += member.size
+                continue
+            if member.islnk() or member.name in pending_names:
+                # The file targeted by a hard link must be written
+                _wait_for_writes(pending)
+                pending_names.clear()
+                pending_size = 0
+            if os.path.islink(path) and not member.issym():
+                # tarfile would write through the link
+                os.unlink(path)
+            # Directory attributes are set at the end, like extractall does
+            handler.extract(member, dest, set_attrs=not member.isdir())
+            if member.isdir():
+                directories.append((member, path))
+        _wait_for_writes(pending)
+    for member, path in sorted(directories, key=lambda directory: directory[1], reverse=True):
+        handler.utime(member, path)
+        handler.chmod(member, path)
+
+
+def _is_inside(dest, path):
+    return os.path.commonpath([dest, path]) == dest
+
+
+def _write_tar_member(member, data, path):
+    """Write a regular file of a tar archive"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.islink(path):
+        os.unlink(path)
+    with open(path, "wb") as dest_file:
+        dest_file.write(data)
+    os.chmod(path, member.mode & 0o7777)
+    os.utime(path, (member.mtime, member.mtime))
+
+
+def _wait_for_writes(pending):
+    """Wait for the pending file writes, raising their errors"""
+    for future in concurrent.futures.as_completed(pending):
+        future.result()
+    pending.clear()
 
 
 def _do_extract(archive, dest, opener, mode=None, extractor=None):
@@ -171,9 +309,8 @@ def _do_extract(archive, dest, opener, mode=None, extractor=None):
     elif opener == "innoextract":
         extract_gog(archive, dest)
     else:
-        handler = opener(archive, mode)
-        handler.extractall(dest)
-        handler.close()
+        with opener(archive, mode) as handler:
+            extract_tar(handler, dest)
 
 
 def extract_exe(path, dest):
@@ -240,13 +377,8 @@ def decompress_gz(file_path, dest_path=None):
     else:
         dest_filename = file_path[:-3]
 
-    gzipped_file = gzip.open(file_path, "rb")
-    file_content = gzipped_file.read()
-    gzipped_file.close()
-
-    dest_file = open(dest_filename, "wb")
-    dest_file.write(file_content)
-    dest_file.close()
+    with gzip.open(file_path, "rb") as gzipped_file, open(dest_filename, "wb") as dest_file:
+        shutil.copyfileobj(gzipped_file, dest_file, GZIP_BLOCK_SIZE)
 
     return dest_path
 
@@ -1,13 +1,29 @@
+"""HTTP requests, sent through a shared pool of keep-alive connections"""
+import os
 import json
-import socket
-import urllib.request
-import urllib.error
+import functools
+import threading
 import urllib.parse
-from ssl import CertificateError
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from lutris.settings import SITE_URL, VERSION, PROJECT
+from lutris.util import http_cache, system
 from lutris.util.log import logger
 
+POOL_HOSTS = 10  # Hosts whose connections are kept
+POOL_SIZE = 16  # Connections kept per host
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5  # Seconds, doubled on each retry
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset(["GET", "HEAD"])
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
 
 class HTTPError(Exception):
     """Exception raised on request failures"""
@@ -17,6 +33,54 @@ class UnauthorizedAccess(Exception):
     """Exception raised for 401 HTTP errors"""
 
 
+def get_retry_policy():
+    """Return how failed requests are retried: connection errors for any
+    request, timeouts and server errors only for requests without a body.
+    """
+    params = {
+        "total": MAX_RETRIES,
+        "backoff_factor": RETRY_BACKOFF,
+        "status_forcelist": RETRY_STATUSES,
+        "raise_on_status": False,
+    }
+    try:
+        return Retry(allowed_methods=RETRY_METHODS, **params)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=RETRY_METHODS, **params)
+
+
+@functools.lru_cache(maxsize=64)
+def get_proxies(origin):
+    """Return the proxies set in the environment for an origin, read once
+    instead of on each request.
+    """
+    return requests.utils.get_environ_proxies(origin)
+
+
+def get_session():
+    """Return the session shared by all requests, its connections are
+    pooled per host and kept alive between requests.
+    """
+    global _SESSION  # pylint: disable=global-statement
+    with _SESSION_LOCK:
+        if not _SESSION:
+            session = requests.Session()
+            session.trust_env = False
+            # Cookies are given with each request, the shared session must
+            # not keep the ones set by responses.
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(
+                pool_connections=POOL_HOSTS,
+                pool_maxsize=POOL_SIZE,
+                max_retries=get_retry_policy(),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+        return _SESSION
+
+
 class Request:
     def __init__(
             self,
@@ -25,7 +89,15 @@ class Request:
             stop_request=None,
             headers=None,
             cookies=None,
+            cache=False,
     ):
+        """Arguments:
+            timeout (float or tuple): Seconds to wait for the server, or a
+                                      (connect, read) tuple of timeouts
+            stop_request (threading.Event): Interrupts the download of the body
+            cache (bool): Keep the response in the HTTP cache, it is then
+                          only downloaded again when it changed
+        """
 
         if not url:
             raise ValueError("An URL is required!")
@@ -46,80 +118,197 @@ class Request:
         self.downloaded_size = 0
         self.headers = {"User-Agent": self.user_agent}
         self.response_headers = None
+        self.info = None
         if headers is None:
             headers = {}
         if not isinstance(headers, dict):
             raise TypeError("HTTP headers needs to be a dict ({})".format(headers))
         self.headers.update(headers)
-        if cookies:
-            cookie_processor = urllib.request.HTTPCookieProcessor(cookies)
-            self.opener = urllib.request.build_opener(cookie_processor)
-        else:
-            self.opener = None
+        self.cookies = cookies
+        self.cache = cache
+        self.from_cache = False
+        self._response = None
+        self._cached_path = None  # Body of a response served from the cache
+        self._cache_key = None  # Set while the body is to be cached once read
+        self._received_size = 0  # Bytes of the body received, before decoding
 
     @property
     def user_agent(self):
         return "{} {}".format(PROJECT, VERSION)
 
-    def get(self, data=None):
+    @property
+    def origin(self):
+        url = urllib.parse.urlsplit(self.url)
+        return "{}://{}".format(url.scheme, url.netloc)
+
+    def get(self, data=None, stream=False):
+        """Send the request, a POST if `data` is given.
+
+        The body of the response is read unless `stream` is set, it is then
+        read when it is written to a file or decoded.
+        """
         logger.debug("GET %s", self.url)
-        req = urllib.request.Request(url=self.url, data=data, headers=self.headers)
+        headers = self.headers
+        cache_entry = None
+        if self.cache:
+            cache_key = http_cache.get_key(self.url, data)
+            cache_entry = http_cache.HTTP_CACHE.get(cache_key)
+            if cache_entry and cache_entry.is_fresh:
+                return self._load_cached(cache_entry, stream)
+            if cache_entry:
+                headers = dict(headers, **cache_entry.get_validators())
         try:
-            if self.opener:
-                request = self.opener.open(req, timeout=self.timeout)
-            else:
-                request = urllib.request.urlopen(req, timeout=self.timeout)
-        except (urllib.error.HTTPError, CertificateError) as error:
-            if error.code == 401:
-                raise UnauthorizedAccess("Access to %s denied" % self.url)
+            response = get_session().request(
+                "POST" if data else "GET",
+                self.url,
+                data=data,
+                headers=headers,
+                cookies=self.cookies,
+                timeout=self.timeout,
+                proxies=get_proxies(self.origin),
+                stream=True,
+            )
+        except requests.exceptions.SSLError as error:
             raise HTTPError("Request to %s failed: %s" % (self.url, error))
-        except (socket.timeout, urllib.error.URLError) as error:
+        except requests.exceptions.RequestException as error:
             raise HTTPError("Unable to connect to server %s: %s" % (self.url, error))
-        if request.getcode() > 200:
-            logger.debug("Server responded with status code %s", request.getcode())
+        if response.status_code == 304 and cache_entry:
+            response.close()
+            return self._load_cached(http_cache.HTTP_CACHE.refresh(cache_entry, response.headers), stream)
+        if response.status_code == 401:
+            response.close()
+            raise UnauthorizedAccess("Access to %s denied" % self.url)
+        if response.status_code >= 400:
+            response.close()
+            raise HTTPError("Request to %s failed: HTTP Error %s: %s" % (
+                self.url, response.status_code, response.reason
+            ))
+        if response.status_code > 200:
+            logger.debug("Server responded with status code %s", response.status_code)
         try:
-            self.total_size = int(request.info().get("Content-Length").strip())
-        except AttributeError:
+            self.total_size = int(response.headers["Content-Length"].strip())
+        except (KeyError, ValueError):
             logger.warning("Failed to read response's content length")
             self.total_size = 0
 
-        self.response_headers = request.getheaders()
-        self.status_code = request.getcode()
+        if self.cookies is not None:
+            requests.cookies.extract_cookies_to_jar(self.cookies, response.request, response.raw)
+        self.response_headers = list(response.headers.items())
+        self.info = response.headers
+        self.status_code = response.status_code
         if self.status_code > 299:
             logger.warning("Request responded with code %s", self.status_code)
-        self.content = b"".join(self._iter_chunks(request))
-        self.info = request.info()
-        request.close()
+        self._response = response
+        if self.cache and http_cache.is_storable(response.headers):
+            self._cache_key = cache_key
+        if not stream:
+            self.read()
         return self
 
-    def _iter_chunks(self, request):
-        while 1:
+    def _load_cached(self, cache_entry, stream):
+        """Use the response stored in the cache"""
+        logger.debug("Using cached response of %s", self.url)
+        self.from_cache = True
+        self.status_code = 200
+        self.info = requests.structures.CaseInsensitiveDict(cache_entry.headers)
+        self.response_headers = list(cache_entry.headers.items())
+        self.total_size = cache_entry.size
+        self.downloaded_size = cache_entry.size
+        self._cached_path = cache_entry.body_path
+        if not stream:
+            self.read()
+        return self
+
+    def _pop_cached_path(self):
+        cached_path = self._cached_path
+        self._cached_path = None
+        if cached_path and not os.path.exists(cached_path):
+            raise HTTPError("Cached response of %s is missing" % self.url)
+        return cached_path
+
+    def _is_complete(self):
+        if self.stop_request and self.stop_request.is_set():
+            return False
+        # Content-Length is the size of the body as sent, before its
+        # Content-Encoding is decoded.
+        return not self.total_size or self._received_size == self.total_size
+
+    def read(self):
+        """Read the body of a streamed response"""
+        cached_path = self._pop_cached_path()
+        if cached_path:
+            with open(cached_path, "rb") as body_file:
+                self.content = body_file.read()
+        elif self._response:
+            self.content = b"".join(self._iter_chunks())
             if self.stop_request and self.stop_request.is_set():
                 self.content = b""
-                return self
-            try:
-                chunk = request.read(self.buffer_size)
-            except socket.timeout:
-                raise HTTPError("Request timed out")
-            self.downloaded_size += len(chunk)
-            if not chunk:
-                return
-            yield chunk
+            elif self._cache_key and self._is_complete():
+                http_cache.HTTP_CACHE.store_content(self._cache_key, self.url, self.info, self.content)
+
+    def _iter_chunks(self):
+        response = self._response
+        self._response = None
+        try:
+            for chunk in response.iter_content(self.buffer_size):
+                if self.stop_request and self.stop_request.is_set():
+                    return
+                self.downloaded_size += len(chunk)
+                yield chunk
+        except requests.exceptions.RequestException as error:
+            raise HTTPError("Request to %s interrupted: %s" % (self.url, error))
+        finally:
+            self._received_size = response.raw.tell()
+            response.close()
 
     def post(self, data):
         raise NotImplementedError
 
     def write_to_file(self, path):
-        content = self.content
-        if content:
-            with open(path, "wb") as dest_file:
-                dest_file.write(content)
+        """Write the body of the response to `path`. The body of streamed
+        responses is written as it is received, and moved to `path` once
+        complete.
+        """
+        cached_path = self._pop_cached_path()
+        if cached_path:
+            if cached_path != path:
+                system.copy_file(cached_path, path)
+            return
+        if not self._response:
+            content = self.content
+            if content:
+                with open(path, "wb") as dest_file:
+                    dest_file.write(content)
+            return
+        tmp_path = "%s.%d.tmp" % (path, threading.get_ident())
+        dest_file = None
+        try:
+            for chunk in self._iter_chunks():
+                if not dest_file:
+                    dest_file = open(tmp_path, "wb")
+                dest_file.write(chunk)
+        except BaseException:
+            if dest_file:
+                dest_file.close()
+                os.remove(tmp_path)
+            raise
+        if not dest_file:
+            return
+        dest_file.close()
+        if self.stop_request and self.stop_request.is_set():
+            os.remove(tmp_path)
+            return
+        os.replace(tmp_path, path)
+        if self._cache_key and self._is_complete():
+            http_cache.HTTP_CACHE.store_file(self._cache_key, self.url, self.info, path)
 
     @property
     def json(self):
+        self.read()
         if self.content:
             try:
-                return json.loads(self.text)
+                # Decoded from the bytes, without making a str copy first
+                return json.loads(self.content)
             except json.decoder.JSONDecodeError:
                 raise ValueError(
                     "Invalid response ({}:{}): {}".format(
@@ -130,6 +319,7 @@ class Request:
 
     @property
     def text(self):
+        self.read()
         if self.content:
             return self.content.decode()
         return ""
@@ -0,0 +1,245 @@
+"""Cache of HTTP responses, kept on disk and revalidated with the server"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+
+from lutris import settings
+from lutris.util import sql
+from lutris.util.log import logger
+
+CACHE_PATH = os.path.join(settings.CACHE_DIR, "http")
+
+# Headers kept with the cached responses
+STORED_HEADERS = ("Content-Type", "Content-Length", "ETag", "Last-Modified", "Cache-Control", "Expires")
+
+
+def get_key(url, data=None):
+    """Return the cache key of a request. The Lutris API is queried with POST
+    requests, their body is part of the key.
+    """
+    key = hashlib.sha1(url.encode("utf-8"))
+    if data:
+        key.update(b"\0")
+        key.update(data if isinstance(data, bytes) else str(data).encode("utf-8"))
+    return key.hexdigest()
+
+
+def parse_cache_control(value):
+    """Return the directives of a Cache-Control header as a dict"""
+    directives = {}
+    for directive in (value or "").split(","):
+        name, _sep, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"')
+    return directives
+
+
+def get_expiry(headers, now):
+    """Return the time until which a response can be used without asking the
+    server, `now` if it has to be revalidated on each request.
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return now
+    try:
+        max_age = int(directives["max-age"])
+    except (KeyError, ValueError):
+        pass
+    else:
+        try:
+            age = int(headers.get("Age") or 0)
+        except ValueError:
+            age = 0
+        return now + max(max_age - age, 0)
+    try:
+        return parsedate_to_datetime(headers["Expires"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return now
+
+
+def is_storable(headers):
+    """Return whether a response can be cached: it has to be revalidated
+    with an ETag or a last modification date, or it has a lifetime.
+    """
+    if "no-store" in parse_cache_control(headers.get("Cache-Control")):
+        return False
+    if headers.get("ETag") or headers.get("Last-Modified"):
+        return True
+    now = time.time()
+    return get_expiry(headers, now) > now
+
+
+class CacheEntry:
+    """Response stored in the cache"""
+
+    def __init__(self, key, url, body_path, size, etag, last_modified, expires, headers):
+        self.key = key
+        self.url = url
+        self.body_path = body_path
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+        self.headers = headers
+
+    @property
+    def is_fresh(self):
+        return self.expires > time.time()
+
+    def get_validators(self):
+        """Return the headers asking the server whether the response changed"""
+        validators = {}
+        if self.etag:
+            validators["If-None-Match"] = self.etag
+        if self.last_modified:
+            validators["If-Modified-Since"] = self.last_modified
+        return validators
+
+
+class HTTPCache:
+    """Responses stored on disk, indexed in a SQLite database by request.
+
+    Bodies are stored in the cache directory, unless they were written to a
+    file, the file is then used as the body. An entry is dropped when its
+    body is deleted or modified.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db_path = os.path.join(path, "index.db")
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _init_db(self):
+        with self._lock:
+            if self._ready:
+                return
+            os.makedirs(os.path.join(self.path, "bodies"), exist_ok=True)
+            with sql.db_cursor(self.db_path) as cursor:
+                sql.cursor_execute(
+                    cursor,
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, url TEXT, body_path TEXT, size INTEGER, "
+                    "mtime_ns INTEGER, etag TEXT, last_modified TEXT, expires REAL, headers TEXT)"
+                )
+            self._ready = True
+
+    def get_body_path(self, key):
+        return os.path.join(self.path, "bodies", key)
+
+    def get(self, key):
+        """Return the entry of a request, None if it isn't cached"""
+        self._init_db()
+        try:
+            rows = sql.db_select(self.db_path, "responses", condition=("key", key))
+        except sqlite3.Error:
+            return None
+        if not rows:
+            return None
+        row = rows[0]
+        try:
+            stat = os.stat(row["body_path"])
+        except OSError:
+            stat = None
+        if not stat or (stat.st_size, stat.st_mtime_ns) != (row["size"], row["mtime_ns"]):
+            logger.debug("Cached response of %s was modified", row["url"])
+            self.remove(key)
+            return None
+        return CacheEntry(
+            key,
+            row["url"],
+            row["body_path"],
+            row["size"],
+            row["etag"],
+            row["last_modified"],
+            row["expires"],
+            json.loads(row["headers"]),
+        )
+
+    def store_content(self, key, url, headers, content):
+        """Store a response whose body was read in memory"""
+        body_path = self.get_body_path(key)
+        self._init_db()
+        tmp_path = "%s.%d.tmp" % (body_path, threading.get_ident())
+        try:
+            with open(tmp_path, "wb") as body_file:
+                body_file.write(content)
+            os.replace(tmp_path, body_path)
+        except OSError as ex:
+            logger.warning("Failed to cache response of %s: %s", url, ex)
+            return
+        self.store_file(key, url, headers, body_path)
+
+    def store_file(self, key, url, headers, body_path):
+        """Store a response whose body was written to `body_path`"""
+        self._init_db()
+        stat = os.stat(body_path)
+        expires = get_expiry(headers, time.time())
+        headers = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        try:
+            with sql.db_cursor(self.db_path) as cursor:
+                sql.cursor_execute(
+                    cursor,
+                    "INSERT OR REPLACE INTO responses "
+                    "(key, url, body_path, size, mtime_ns, etag, last_modified, expires, headers) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key, url, body_path, stat.st_size, stat.st_mtime_ns,
+                        headers.get("ETag"), headers.get("Last-Modified"),
+                        expires, json.dumps(headers)
+                    )
+                )
+        except sqlite3.Error:
+            pass
+
+    def refresh(self, entry, headers):
+        """Update an entry the server responded with 304 Not Modified to,
+        with the headers of the response.
+        """
+        entry.headers.update({
+            name: headers[name] for name in STORED_HEADERS
+            if name in headers and name != "Content-Length"
+        })
+        entry.etag = entry.headers.get("ETag")
+        entry.last_modified = entry.headers.get("Last-Modified")
+        entry.expires = get_expiry(dict(entry.headers, Age=headers.get("Age")), time.time())
+        try:
+            sql.db_update(
+                self.db_path,
+                "responses",
+                {
+                    "etag": entry.etag,
+                    "last_modified": entry.last_modified,
+                    "expires": entry.expires,
+                    "headers": json.dumps(entry.headers),
+                },
+                ("key", entry.key)
+            )
+        except sqlite3.Error:
+            pass
+        return entry
+
+    def remove(self, key):
+        try:
+            sql.db_delete(self.db_path, "responses", "key", key)
+        except sqlite3.Error:
+            pass
+        body_path = self.get_body_path(key)
+        if os.path.exists(body_path):
+            os.remove(body_path)
+
+    def clear(self):
+        """Remove every response from the cache, files used as bodies are kept"""
+        self._init_db()
+        with sql.db_cursor(self.db_path) as cursor:
+            sql.cursor_execute(cursor, "DELETE FROM responses")
+        bodies_path = os.path.join(self.path, "bodies")
+        for filename in os.listdir(bodies_path):
+            os.remove(os.path.join(bodies_path, filename))
+
+
+HTTP_CACHE = HTTPCache(CACHE_PATH)
@@ -4,6 +4,7 @@ import threading
 from gi.repository import GLib
 
 from lutris.util.log import logger
+from lutris.util.profiling import STARTUP_PROFILER
 
 
 class AsyncCall(threading.Thread):
@@ -56,3 +57,79 @@ def thread_safe_call(func):
     GLib.idle_add(synchronized_call, func, event, result)
     event.wait()
     return result[0]
+
+
+class DeferredTasks:
+    """Tasks that are not needed to show the main window, run once it has
+    been painted.
+
+    Threaded tasks run one after the other in a worker thread, in the order
+    they were added. Tasks that need the main loop, for example to show
+    dialogs, run from idle callbacks. Tasks added after start() run right away.
+    """
+
+    def __init__(self):
+        self.tasks = []
+        self.started = False
+        self.pending_count = 0
+        self.finished_callback = None
+        self._lock = threading.Lock()
+
+    def add(self, name, func, threaded=True):
+        """Add a task, `func` is called without arguments"""
+        with self._lock:
+            self.pending_count += 1
+            self.tasks.append((name, func, threaded))
+            if not self.started:
+                return
+        self._dispatch()
+
+    def start(self, finished_callback=None):
+        """Run the pending tasks, then `finished_callback` in the main loop"""
+        with self._lock:
+            if self.started:
+                return
+            self.started = True
+            self.finished_callback = finished_callback
+            if not self.pending_count:
+                GLib.idle_add(self._on_finished)
+                return
+        self._dispatch()
+
+    def _dispatch(self):
+        with self._lock:
+            tasks = self.tasks
+            self.tasks = []
+        threaded_tasks = [task for task in tasks if task[2]]
+        if threaded_tasks:
+            AsyncCall(self._run_tasks, None, threaded_tasks)
+        for task in tasks:
+            if not task[2]:
+                GLib.idle_add(self._run_task, task, priority=GLib.PRIORITY_LOW)
+
+    def _run_tasks(self, tasks):
+        for task in tasks:
+            self._run_task(task)
+
+    def _run_task(self, task):
+        name, func, _threaded = task
+        try:
+            with STARTUP_PROFILER.phase(name):
+                func()
+        except Exception as ex:  # pylint: disable=broad-except
+            logger.exception("Deferred task %s failed: %s", name, ex)
+        with self._lock:
+            self.pending_count -= 1
+            finished = not self.pending_count
+        if finished:
+            GLib.idle_add(self._on_finished)
+        return False
+
+    def _on_finished(self):
+        callback, self.finished_callback = self.finished_callback, None
+        if callback:
+            callback()
+        return False
+
+
+DEFERRED_TASKS = DeferredTasks()
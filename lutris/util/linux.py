@@ -7,9 +7,12 @@ import json
 import platform
 import resource
 import subprocess
+import threading
 from collections import defaultdict, Counter
 
+from lutris import settings
 from lutris.util.log import logger
+from lutris.util.profiling import STARTUP_PROFILER
 
 try:
     from distro import linux_distribution
@@ -82,11 +85,72 @@ SYSTEM_COMPONENTS = {
     },
 }
 
+# File storing the results of the system probes between runs
+SYSTEM_CACHE_PATH = os.path.join(settings.CACHE_DIR, "system.json")
+
+# Version of the system cache format, bump it when changing what is stored
+SYSTEM_CACHE_VERSION = 1
+
+# Path to the cache of ldconfig, rebuilt when libraries are installed
+LDCONFIG_CACHE_PATH = "/etc/ld.so.cache"
+
+
+def get_path_mtime(path):
+    """Return the modification time of a path, None if it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def get_gpu_driver_versions():
+    """Return a description of the graphics drivers in use, changing when
+    they are updated. Only reads from /proc and /sys.
+    """
+    versions = []
+    try:
+        with open("/proc/driver/nvidia/version") as version_file:
+            versions.append(version_file.readline().strip())
+    except OSError:
+        pass
+    if not os.path.exists("/sys/class/drm"):
+        return versions
+    for card in drivers.get_gpus():
+        driver = drivers.get_gpu_info(card).get("DRIVER")
+        if not driver:
+            continue
+        try:
+            with open("/sys/module/%s/version" % driver) as version_file:
+                driver = "%s %s" % (driver, version_file.read().strip())
+        except OSError:
+            pass
+        versions.append(driver)
+    return versions
+
+
+def get_system_cache_key():
+    """Return a value that changes when the results of the system probes
+    might have changed: installed libraries, programs in the PATH, kernel
+    or graphics drivers.
+    """
+    paths = os.environ.get("PATH", "").split(os.pathsep) + LinuxSystem.sbin_folders
+    return {
+        "version": SYSTEM_CACHE_VERSION,
+        "ldconfig": get_path_mtime(LDCONFIG_CACHE_PATH),
+        "paths": [[path, get_path_mtime(path)] for path in paths],
+        "kernel": platform.release(),
+        "gpu_drivers": get_gpu_driver_versions(),
+    }
+
 
 class LinuxSystem:
-    """Global cache for system commands"""
+    """Global cache for system commands.
 
-    _cache = {}
+    The results of the probes running external programs (lookup of
+    commands, ldconfig, glxinfo) are saved to `cache_path` and reused until
+    the system changes, see get_system_cache_key. Everything is computed
+    the first time it's needed.
+    """
 
     multiarch_lib_folders = [
         ("/lib", "/lib64"),
@@ -108,29 +172,105 @@ class LinuxSystem:
 
     flatpak_info_path = "/.flatpak-info"
 
-    def __init__(self):
-        for key in ("COMMANDS", "TERMINALS"):
-            self._cache[key] = {}
-            for command in SYSTEM_COMPONENTS[key]:
-                command_path = shutil.which(command)
-                if not command_path:
-                    command_path = self.get_sbin_path(command)
-                if command_path:
-                    self._cache[key][command] = command_path
+    sbin_folders = ["/sbin", "/usr/sbin"]
 
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
         # Detect if system is 64bit capable
         self.is_64_bit = sys.maxsize > 2 ** 32
         self.arch = self.get_arch()
-        self.shared_libraries = self.get_shared_libraries()
-        self.populate_libraries()
-        self.populate_sound_fonts()
         self.soft_limit, self.hard_limit = self.get_file_limits()
-        self.glxinfo = self.get_glxinfo()
+        self._lock = threading.RLock()
+        self._probes = None
+        self._probes_key = None
+        self._cache = {}
+
+    def read_probe_cache(self):
+        """Return the probe results saved by a previous run if the system
+        hasn't changed since.
+        """
+        self._probes_key = get_system_cache_key()
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path) as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict) or cache.get("key") != self._probes_key:
+            return {}
+        return cache.get("probes", {})
+
+    def write_probe_cache(self):
+        """Save the probe results, replacing the cache file atomically"""
+        if not self.cache_path:
+            return
+        temp_path = "%s.%d.tmp" % (self.cache_path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, "w") as cache_file:
+                json.dump({"key": self._probes_key, "probes": self._probes}, cache_file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as ex:
+            logger.warning("Failed to save the system cache to %s: %s", self.cache_path, ex)
+
+    def get_probe_result(self, name, probe):
+        """Return the result of a probe, running it if it isn't cached.
+        Probes return None when they fail, failures aren't saved.
+        """
+        with self._lock:
+            if self._probes is None:
+                self._probes = self.read_probe_cache()
+            if name not in self._probes:
+                result = probe()
+                if result is None:
+                    return result
+                self._probes[name] = result
+                self.write_probe_cache()
+            return self._probes[name]
+
+    def get_cached(self, name, func):
+        """Return the value of a field computed on first access"""
+        with self._lock:
+            if name not in self._cache:
+                self._cache[name] = func()
+            return self._cache[name]
+
+    def find_commands(self, component):
+        """Return the paths of the commands of a component of SYSTEM_COMPONENTS"""
+        commands = {}
+        for command in SYSTEM_COMPONENTS[component]:
+            command_path = shutil.which(command)
+            if not command_path:
+                command_path = self.get_sbin_path(command)
+            if command_path:
+                commands[command] = command_path
+        return commands
 
-    @staticmethod
-    def get_sbin_path(command):
+    @property
+    def commands(self):
+        return self.get_probe_result("commands", lambda: self.find_commands("COMMANDS"))
+
+    @property
+    def terminals(self):
+        return self.get_probe_result("terminals", lambda: self.find_commands("TERMINALS"))
+
+    @property
+    def shared_libraries(self):
+        return self.get_cached("shared_libraries", self.get_shared_libraries)
+
+    @property
+    def libraries(self):
+        return self.get_cached("libraries", self.get_libraries)
+
+    @property
+    def soundfonts(self):
+        return self.get_cached("soundfonts", self.get_soundfont_files)
+
+    @classmethod
+    def get_sbin_path(cls, command):
         """Some distributions don't put sbin directories in $PATH"""
-        path_candidates = ["/sbin", "/usr/sbin"]
+        path_candidates = cls.sbin_folders
         for candidate in path_candidates:
             command_path = os.path.join(candidate, command)
             if os.path.exists(command_path):
@@ -239,11 +379,22 @@ class LinuxSystem:
                 if "/dev/%s" % partition["name"] == path_drive:
                     return partition["fstype"]
 
+    @property
+    def glxinfo(self):
+        """GlxInfo instance, glxinfo is only run the first time it's needed"""
+        return self.get_cached("glxinfo", self.get_glxinfo)
+
+    def get_glxinfo_output(self):
+        if not self.get("glxinfo"):
+            return None
+        return glxinfo.GlxInfo.get_glxinfo_output() or None
+
     def get_glxinfo(self):
         """Return a GlxInfo instance if the gfxinfo tool is available"""
-        if not self.get("glxinfo"):
+        output = self.get_probe_result("glxinfo", self.get_glxinfo_output)
+        if not output:
             return
-        _glxinfo = glxinfo.GlxInfo()
+        _glxinfo = glxinfo.GlxInfo(output)
         if not hasattr(_glxinfo, "display"):
             logger.warning("Invalid glxinfo received")
             return
@@ -260,15 +411,15 @@ class LinuxSystem:
 
     def get(self, command):
         """Return a system command path if available"""
-        return self._cache["COMMANDS"].get(command)
+        return self.commands.get(command)
 
     def get_terminals(self):
         """Return list of installed terminals"""
-        return list(self._cache["TERMINALS"].values())
+        return list(self.terminals.values())
 
     def get_soundfonts(self):
         """Return path of available soundfonts"""
-        return self._cache["SOUNDFONTS"]
+        return self.soundfonts
 
     def get_lib_folders(self):
         """Return shared library folders, sorted by most used to least used"""
@@ -302,6 +453,9 @@ class LinuxSystem:
 
     def get_ldconfig_libs(self):
         """Return a list of available libraries, as returned by `ldconfig -p`."""
+        return self.get_probe_result("ldconfig", self.run_ldconfig) or []
+
+    def run_ldconfig(self):
         ldconfig = self.get("ldconfig")
         if not ldconfig:
             logger.error("Could not detect ldconfig on this system")
@@ -314,7 +468,7 @@ class LinuxSystem:
             )
         except subprocess.CalledProcessError as ex:
             logger.error("Failed to get libraries from ldconfig: %s", ex)
-            return []
+            return None
         return [line.strip("\t") for line in output if line.startswith("\t")]
 
     def get_shared_libraries(self):
@@ -333,30 +487,34 @@ class LinuxSystem:
             shared_libraries[lib.name].append(lib)
         return shared_libraries
 
-    def populate_libraries(self):
-        """Populates the LIBRARIES cache with what is found on the system"""
-        self._cache["LIBRARIES"] = {}
+    def get_libraries(self):
+        """Return the required libraries found on the system, by architecture
+        and requirement
+        """
+        libraries = {}
         for arch in self.runtime_architectures:
-            self._cache["LIBRARIES"][arch] = defaultdict(list)
+            libraries[arch] = defaultdict(list)
         for req in self.requirements:
             for lib in SYSTEM_COMPONENTS["LIBRARIES"][req]:
                 for shared_lib in self.shared_libraries[lib]:
-                    self._cache["LIBRARIES"][shared_lib.arch][req].append(lib)
+                    libraries[shared_lib.arch][req].append(lib)
+        return libraries
 
-    def populate_sound_fonts(self):
-        """Populates the soundfont cache"""
-        self._cache["SOUNDFONTS"] = []
+    def get_soundfont_files(self):
+        """Return the soundfonts found in the soundfont folders"""
+        soundfonts = []
         for folder in self.soundfont_folders:
             if not os.path.exists(folder):
                 continue
             for soundfont in os.listdir(folder):
-                self._cache["SOUNDFONTS"].append(soundfont)
+                soundfonts.append(soundfont)
+        return soundfonts
 
     def get_missing_requirement_libs(self, req):
         """Return a list of sets of missing libraries for each supported architecture"""
         required_libs = set(SYSTEM_COMPONENTS["LIBRARIES"][req])
         return [
-            list(required_libs - set(self._cache["LIBRARIES"][arch][req]))
+            list(required_libs - set(self.libraries[arch][req]))
             for arch in self.runtime_architectures
         ]
 
@@ -420,7 +578,8 @@ class SharedLibrary:
         return "%s (%s)" % (self.name, self.arch)
 
 
-LINUX_SYSTEM = LinuxSystem()
+with STARTUP_PROFILER.phase("system probe"):
+    LINUX_SYSTEM = LinuxSystem(cache_path=SYSTEM_CACHE_PATH)
 
 
 def gather_system_info():
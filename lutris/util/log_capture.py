@@ -0,0 +1,199 @@
+"""Capture of the output of games and installer commands"""
+import os
+from collections import deque
+
+from lutris.util.log import logger
+
+# Characters of output kept in memory, older lines are written to the log file
+MAX_MEMORY_SIZE = 2 * 1024 * 1024
+
+# Size after which the log file is rotated, the previous one is kept as .1
+MAX_FILE_SIZE = 50 * 1024 * 1024
+
+# Text without line break is cut into lines of this length
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class LogCapture:
+    """Output of a command, kept in a ring of blocks of complete lines.
+
+    When the output in memory goes over `max_size` characters, the oldest
+    lines are moved to the log file at `path`, if given, otherwise they are
+    dropped. Lines containing one of the watched strings are remembered as
+    the output comes in, so errors can be reported without reading the
+    whole output once the command has exited.
+    """
+
+    def __init__(self, path=None, max_size=MAX_MEMORY_SIZE, max_file_size=MAX_FILE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self.blocks = deque()
+        self.size = 0
+        self.partial_line = ""
+        self.matches = {}
+        self.log_file = None
+        self.file_size = 0
+
+    def watch(self, string):
+        """Remember the first line containing `string`"""
+        self.matches.setdefault(string, None)
+
+    def get_match(self, string):
+        """Return the first line containing a watched string, None if the
+        string didn't appear in the output.
+        """
+        return self.matches.get(string)
+
+    def write(self, text):
+        """Add output to the capture"""
+        text = self.partial_line + text
+        line_end = text.rfind("\n") + 1
+        self.partial_line = text[line_end:]
+        if len(self.partial_line) > MAX_LINE_LENGTH:
+            line_end = len(text)
+            self.partial_line = ""
+        if line_end:
+            self.add_lines(text[:line_end])
+
+    def add_lines(self, text):
+        """Add complete lines, given as a single string"""
+        for string, match in self.matches.items():
+            if match is None and string in text:
+                self.matches[string] = next(line for line in text.split("\n") if string in line)
+        self.blocks.append(text)
+        self.size += len(text)
+        if self.size > self.max_size:
+            self.evict_lines()
+
+    def evict_lines(self):
+        """Move the oldest lines out of memory"""
+        evicted = []
+        while self.size > self.max_size and self.blocks:
+            block = self.blocks.popleft()
+            # Keep the end of the block if it's enough, starting at a line
+            line_start = block.find("\n", self.size - self.max_size - 1) + 1
+            if 0 < line_start < len(block):
+                self.blocks.appendleft(block[line_start:])
+                block = block[:line_start]
+            self.size -= len(block)
+            evicted.append(block)
+        self.spill("".join(evicted))
+
+    def spill(self, text):
+        """Write lines that don't fit in memory to the log file"""
+        if not self.path:
+            return
+        try:
+            if not self.log_file:
+                self.open_log_file()
+            elif self.file_size + len(text) > self.max_file_size:
+                self.log_file.close()
+                self.rotate()
+            self.log_file.write(text)
+            self.file_size += len(text)
+        except OSError as ex:
+            logger.error("Failed to write the log to %s: %s", self.path, ex)
+            self.path = None
+
+    def open_log_file(self):
+        """Open the log file, replacing the one of the previous run"""
+        if self.file_size:
+            # Output written after the capture was closed
+            self.log_file = open(self.path, "a", errors="replace")
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.rotate()
+
+    def rotate(self):
+        """Keep the current log file as a backup and start a new one"""
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + ".1")
+        self.log_file = open(self.path, "w", errors="replace")
+        self.file_size = 0
+
+    def get_text(self):
+        """Return the output kept in memory"""
+        return "".join(self.blocks) + self.partial_line
+
+    def close(self):
+        """Flush the remaining output. If part of the output was written to
+        the log file, the lines kept in memory are added so the file is
+        complete.
+        """
+        if self.partial_line:
+            partial_line, self.partial_line = self.partial_line, ""
+            self.add_lines(partial_line)
+        if self.log_file:
+            self.spill(self.get_text())
+            self.log_file.close()
+            self.log_file = None
+
+
+class LogLines:
+    """Text shown in a log view, kept as a list of lines.
+
+    The lines are the same as those of the view's text buffer, so positions
+    found here are valid buffer offsets. At most `max_lines` lines are kept,
+    older lines are dropped. Searches run on a lowercase copy of the text,
+    built on the first search after the text changed.
+    """
+
+    def __init__(self, max_lines):
+        self.max_lines = max_lines
+        self.lines = [""]
+        self._search_text = None
+
+    def append(self, text):
+        """Add text at the end, dropping the lines that don't fit.
+
+        Return the number of lines to remove from the start of the view and
+        the text to add at its end. When none of the previous lines are kept,
+        the number of lines is None and the text replaces the whole view.
+        """
+        self._search_text = None
+        parts = text.split("\n")
+        excess = len(self.lines) + len(parts) - 1 - self.max_lines
+        if excess < len(self.lines):
+            excess = max(excess, 0)
+            del self.lines[:excess]
+            self.lines[-1] += parts[0]
+            self.lines.extend(parts[1:])
+            return excess, text
+        self.lines = parts[-self.max_lines:]
+        return None, "\n".join(self.lines)
+
+    def get_text(self):
+        """Return the text, as shown in the view"""
+        return "\n".join(self.lines)
+
+    def get_search_text(self):
+        """Return the text searches run on"""
+        if self._search_text is None:
+            text = self.get_text()
+            self._search_text = text.lower()
+            if len(self._search_text) != len(text):
+                # Some characters change length when lowercased, offsets
+                # wouldn't match the buffer anymore.
+                self._search_text = text
+        return self._search_text
+
+    def find(self, string, offset, backwards=False):
+        """Return the offset of the next occurrence of `string` after
+        `offset`, or the previous one ending before it if `backwards` is set.
+        The search starts over from the other end of the text if nothing is
+        found. Return None if `string` isn't in the text.
+        """
+        if not string:
+            return None
+        text = self.get_search_text()
+        string = string.lower()
+        if backwards:
+            position = text.rfind(string, 0, offset)
+            if position == -1:
+                position = text.rfind(string)
+        else:
+            position = text.find(string, offset)
+            if position == -1:
+                position = text.find(string)
+        return None if position == -1 else position
@@ -2,7 +2,9 @@
 import os
 import shlex
 
-from lutris.util.process import Process
+from lutris.util.log import logger
+from lutris.util.process import ProcessTable
+from lutris.util.process_watcher import get_process_watcher
 
 # Processes that are considered sufficiently self-managing by the
 # monitoring system. These are not considered game processes for
@@ -40,6 +42,9 @@ class ProcessMonitor:
         exclude_processes = self.parse_process_list(exclude_processes)
 
         self.unmonitored_processes = (exclude_processes | SYSTEM_PROCESSES) - include_processes
+        self.watcher = None
+        self.watched_pids = set()
+        self.watch_forks = True
 
     @staticmethod
     def parse_process_list(process_list):
@@ -53,14 +58,14 @@ class ProcessMonitor:
 
     @staticmethod
     def iterate_all_processes():
-        return Process(os.getpid()).iter_children()
+        return ProcessTable.snapshot().iter_children(os.getpid())
 
     def iterate_game_processes(self):
         for child in self.iterate_all_processes():
             if child.state == 'Z':
                 continue
 
-            if child.name and child.name not in self.unmonitored_processes:
+            if child.comm and child.comm not in self.unmonitored_processes:
                 yield child
 
     def iterate_monitored_processes(self):
@@ -68,12 +73,43 @@ class ProcessMonitor:
             if child.state == 'Z':
                 continue
 
-            if child.name not in self.unmonitored_processes:
+            if child.comm not in self.unmonitored_processes:
                 yield child
 
     def is_game_alive(self):
         """Returns whether at least one nonexcluded process exists"""
-        return next(self.iterate_game_processes(), None) is not None
+        return self.find_process(self.iterate_game_processes())
 
     def are_monitored_processes_alive(self):
-        return next(self.iterate_monitored_processes(), None) is not None
+        return self.find_process(self.iterate_monitored_processes())
+
+    def find_process(self, processes):
+        """Return whether `processes` yields a process, and remember which
+        processes wait() should watch: the exit of the process found
+        changes the result, otherwise any process starting might.
+        """
+        process = next(processes, None)
+        self.watch_forks = process is None
+        if process:
+            self.watched_pids = {process.pid}
+        else:
+            # The pidfd of a zombie is always readable, watching it would
+            # wake wait() up right away until the zombie is reaped.
+            self.watched_pids = {
+                child.pid for child in self.iterate_all_processes()
+                if child.state != 'Z'
+            }
+            self.watched_pids.add(os.getpid())
+        return process is not None
+
+    def wait(self):
+        """Sleep until the result of the last check may have changed"""
+        if not self.watcher:
+            self.watcher = get_process_watcher()
+            logger.debug("Watching processes with %s", self.watcher.name)
+        self.watcher.wait(self.watched_pids, self.watch_forks)
+
+    def close(self):
+        if self.watcher:
+            self.watcher.close()
+            self.watcher = None
@@ -1,5 +1,16 @@
 """Class to manipulate a process"""
 import os
+import re
+import time
+from collections import namedtuple
+
+# Fields of /proc/<pid>/stat needed to follow processes, comm is the name of
+# the executable, truncated to 15 characters
+ProcessInfo = namedtuple("ProcessInfo", ("pid", "ppid", "comm", "state", "starttime"))
+
+# Seconds during which the processes found using a set of files are reused
+FILE_USERS_CACHE_TTL = 1.0
+FILE_USERS_CACHE = {}
 
 
 class InvalidPid(Exception):
@@ -100,3 +111,153 @@ class Process:
         for child in self.children:
             yield child
             yield from child.iter_children()
+
+
+def read_process_info(pid, proc_path="/proc"):
+    """Return the ProcessInfo of a process, None if it doesn't exist"""
+    try:
+        with open(os.path.join(proc_path, str(pid), "stat"), "rb") as stat_file:
+            _stat = stat_file.read().decode(errors="replace")
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    name_end = _stat.rfind(")")
+    fields = _stat[name_end + 1:].split()
+    return ProcessInfo(
+        pid=int(pid),
+        ppid=int(fields[1]),
+        comm=_stat[_stat.find("(") + 1:name_end],
+        state=fields[0],
+        starttime=int(fields[19]),
+    )
+
+
+class ProcessTable:
+    """Snapshot of the processes running on the system, taken with one pass
+    over /proc and one read of each process's stat file.
+    """
+
+    def __init__(self, processes):
+        self.processes = {process.pid: process for process in processes}
+        self.children = {}
+        for process in self.processes.values():
+            self.children.setdefault(process.ppid, []).append(process.pid)
+
+    @classmethod
+    def snapshot(cls, proc_path="/proc"):
+        """Return the processes currently running"""
+        processes = []
+        with os.scandir(proc_path) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                process = read_process_info(entry.name, proc_path)
+                if process:
+                    processes.append(process)
+        return cls(processes)
+
+    def __contains__(self, pid):
+        return pid in self.processes
+
+    def __iter__(self):
+        return iter(self.processes.values())
+
+    def __len__(self):
+        return len(self.processes)
+
+    def get(self, pid):
+        """Return the ProcessInfo of `pid`, None if it wasn't running"""
+        return self.processes.get(pid)
+
+    def iter_children(self, pid):
+        """Iterator that yields all the descendants of process `pid`, each
+        process being followed by its own descendants.
+        """
+        pending = list(reversed(self.children.get(pid, [])))
+        while pending:
+            process = self.processes[pending.pop()]
+            yield process
+            pending.extend(reversed(self.children.get(process.pid, [])))
+
+    def find(self, pattern):
+        """Return the processes whose name matches the regular expression
+        `pattern`, ordered by pid like pgrep.
+        """
+        regex = re.compile(pattern)
+        return [process for process in sorted(self.processes.values()) if regex.search(process.comm)]
+
+
+def is_mapping_files(maps, file_ids, paths):
+    """Return whether the content of a /proc/<pid>/maps file, given as bytes,
+    has a mapping of one of the files, identified by (device, inode) or path.
+    """
+    for line in maps.splitlines():
+        fields = line.split(None, 5)
+        if len(fields) < 6:
+            continue
+        if fields[5] in paths:
+            return True
+        major, minor = fields[3].split(b":")
+        if (os.makedev(int(major, 16), int(minor, 16)), int(fields[4])) in file_ids:
+            return True
+    return False
+
+
+def scan_file_users(file_paths, proc_path="/proc"):
+    """Return the pids of the processes running or mapping any of the files,
+    looking at the exe link and maps file of each process.
+    """
+    file_ids = set()
+    paths = set()
+    for path in file_paths:
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            continue
+        file_ids.add((file_stat.st_dev, file_stat.st_ino))
+        paths.add(os.fsencode(os.path.realpath(path)))
+    if not file_ids:
+        return set()
+    # Mappings are only parsed when the maps file mentions one of the files
+    needles = paths | {b" %d " % inode for _device, inode in file_ids}
+    pids = set()
+    with os.scandir(proc_path) as entries:
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                exe_stat = os.stat(os.path.join(entry.path, "exe"))
+            except OSError:
+                pass
+            else:
+                if (exe_stat.st_dev, exe_stat.st_ino) in file_ids:
+                    pids.add(entry.name)
+                    continue
+            try:
+                with open(os.path.join(entry.path, "maps"), "rb") as maps_file:
+                    maps = maps_file.read()
+            except OSError:
+                continue
+            if any(needle in maps for needle in needles) and is_mapping_files(maps, file_ids, paths):
+                pids.add(entry.name)
+    return pids
+
+
+def get_pids_using_files(file_paths, proc_path="/proc"):
+    """Return the pids, as strings, of the processes using any of the files.
+
+    Like fuser, only the processes the user is allowed to inspect are
+    found. Unlike it, open file descriptors are not checked: the files are
+    expected to be executables or libraries. Results are reused for
+    FILE_USERS_CACHE_TTL seconds.
+    """
+    key = (frozenset(file_paths), proc_path)
+    now = time.monotonic()
+    cached = FILE_USERS_CACHE.get(key)
+    if cached and now - cached[0] < FILE_USERS_CACHE_TTL:
+        return set(cached[1])
+    pids = scan_file_users(file_paths, proc_path)
+    for cached_key, (cache_time, _pids) in list(FILE_USERS_CACHE.items()):
+        if now - cache_time >= FILE_USERS_CACHE_TTL:
+            del FILE_USERS_CACHE[cached_key]
+    FILE_USERS_CACHE[key] = (now, pids)
+    return set(pids)
@@ -0,0 +1,232 @@
+"""Wait for processes to start or exit without polling /proc in a busy loop.
+
+Three backends are available, the best one supported is picked:
+the proc connector sends an event for each fork, exec and exit on the
+system but needs CAP_NET_ADMIN, pidfds notify the exit of known processes
+and polling checks the processes at an interval that grows while
+nothing changes.
+"""
+import os
+import time
+import errno
+import select
+import socket
+import struct
+
+from lutris.util.log import logger
+
+# Netlink proc connector constants, from linux/connector.h and linux/cn_proc.h
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_NONE = 0
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+PROC_EVENT_EXIT = 0x80000000
+NLMSG_DONE = 3
+
+NLMSG_HEADER = struct.Struct("=IHHII")
+CN_MSG_HEADER = struct.Struct("=IIIIHH")
+PROC_EVENT_HEADER = struct.Struct("=IIQ")
+PROC_EVENT_PIDS = struct.Struct("=II")
+PROC_EVENT_FORK_PIDS = struct.Struct("=IIII")
+
+
+class ProcessWatcher:
+    """Wait by sleeping. The interval starts short when the watched processes
+    change and doubles each time they don't.
+    """
+    name = "polling"
+    min_interval = 0.1
+    max_interval = 0.5
+
+    def __init__(self):
+        self.pids = set()
+        self.interval = self.min_interval
+        self.watch_forks = True
+
+    def watch(self, pids, watch_forks=True):
+        """Set the processes to watch, adjusting the wait interval.
+        When `watch_forks` is False, only their exit matters.
+        """
+        self.watch_forks = watch_forks
+        pids = set(pids)
+        if pids == self.pids:
+            self.interval = min(self.interval * 2, self.max_interval)
+        else:
+            self.interval = self.min_interval
+        self.pids = pids
+
+    def wait(self, pids, watch_forks=True):
+        """Wait until one of the processes in `pids` may have changed"""
+        self.watch(pids, watch_forks)
+        time.sleep(self.interval)
+
+    def close(self):
+        """Release the resources used by the watcher"""
+
+
+class PidfdProcessWatcher(ProcessWatcher):
+    """Wait for the exit of the watched processes with pidfds, new processes
+    are still found by polling.
+    """
+    name = "pidfd"
+    max_interval = 2.0
+
+    def __init__(self):
+        super().__init__()
+        self.pidfds = {}
+        self.poller = select.poll()
+        self.exited = False
+
+    @staticmethod
+    def is_available():
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+        except (AttributeError, OSError):
+            return False
+        return True
+
+    def watch(self, pids, watch_forks=True):
+        super().watch(pids, watch_forks)
+        self.exited = False
+        for pid in set(self.pidfds) - self.pids:
+            pidfd = self.pidfds.pop(pid)
+            self.poller.unregister(pidfd)
+            os.close(pidfd)
+        for pid in self.pids - set(self.pidfds):
+            try:
+                pidfd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                self.exited = True
+                continue
+            self.pidfds[pid] = pidfd
+            self.poller.register(pidfd, select.POLLIN)
+
+    def wait(self, pids, watch_forks=True):
+        self.watch(pids, watch_forks)
+        if not self.exited:
+            self.poller.poll(self.interval * 1000)
+
+    def close(self):
+        self.watch(set())
+
+
+class NetlinkProcessWatcher(ProcessWatcher):
+    """Wait for events sent by the kernel proc connector: a watched process
+    forking, executing a program, changing its name or exiting.
+    """
+    name = "netlink"
+    # Events can be dropped when the socket buffer is full, so the processes
+    # are still checked from time to time
+    max_interval = 5.0
+    ack_timeout = 0.2
+
+    def __init__(self):
+        super().__init__()
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            self.sock.bind((0, CN_IDX_PROC))
+            self.send_control(PROC_CN_MCAST_LISTEN)
+            self.wait_for_ack()
+        except OSError:
+            self.sock.close()
+            raise
+
+    @staticmethod
+    def is_available():
+        """The proc connector only accepts listeners from the initial user
+        namespace, which sandboxes such as Flatpak are not in.
+        """
+        try:
+            with open("/proc/self/uid_map") as uid_map:
+                return uid_map.read().split() == ["0", "0", "4294967295"]
+        except OSError:
+            return False
+
+    def send_control(self, operation):
+        cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, 4, 0)
+        payload = cn_msg + struct.pack("=I", operation)
+        header = NLMSG_HEADER.pack(NLMSG_HEADER.size + len(payload), NLMSG_DONE, 0, 0, os.getpid())
+        self.sock.send(header + payload)
+
+    def wait_for_ack(self):
+        """Wait for the kernel to accept the subscription"""
+        deadline = time.monotonic() + self.ack_timeout
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or not select.select([self.sock], [], [], timeout)[0]:
+                raise OSError(errno.ETIMEDOUT, "No reply from the proc connector")
+            for what, data in self.read_events():
+                if what == PROC_EVENT_NONE:
+                    error = struct.unpack_from("=I", data)[0]
+                    if error:
+                        raise OSError(error, os.strerror(error))
+                    return
+
+    def read_events(self):
+        """Return the events of the next message as (type, data) tuples"""
+        message = self.sock.recv(65536)
+        events = []
+        offset = 0
+        while offset + NLMSG_HEADER.size <= len(message):
+            length = NLMSG_HEADER.unpack_from(message, offset)[0]
+            if length < NLMSG_HEADER.size:
+                break
+            event_offset = offset + NLMSG_HEADER.size + CN_MSG_HEADER.size
+            if event_offset + PROC_EVENT_HEADER.size <= offset + length:
+                what = PROC_EVENT_HEADER.unpack_from(message, event_offset)[0]
+                data_offset = event_offset + PROC_EVENT_HEADER.size
+                events.append((what, message[data_offset:offset + length]))
+            offset += (length + 3) & ~3
+        return events
+
+    def is_watched_event(self, what, data):
+        if what == PROC_EVENT_FORK:
+            _parent_pid, parent_tgid, _child_pid, _child_tgid = PROC_EVENT_FORK_PIDS.unpack_from(data)
+            return self.watch_forks and parent_tgid in self.pids
+        if what in (PROC_EVENT_EXEC, PROC_EVENT_COMM, PROC_EVENT_EXIT):
+            pid, tgid = PROC_EVENT_PIDS.unpack_from(data)
+            # Threads exiting don't matter, only whole processes do
+            return tgid in self.pids and (what != PROC_EVENT_EXIT or pid == tgid)
+        return False
+
+    def wait(self, pids, watch_forks=True):
+        self.watch(pids, watch_forks)
+        deadline = time.monotonic() + self.interval
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or not select.select([self.sock], [], [], timeout)[0]:
+                return
+            try:
+                events = self.read_events()
+            except OSError as ex:
+                if ex.errno == errno.ENOBUFS:
+                    # Events were lost, check the processes
+                    return
+                raise
+            for what, data in events:
+                if self.is_watched_event(what, data):
+                    return
+
+    def close(self):
+        try:
+            self.send_control(PROC_CN_MCAST_IGNORE)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def get_process_watcher():
+    """Return the best process watcher supported by the system"""
+    if NetlinkProcessWatcher.is_available():
+        try:
+            return NetlinkProcessWatcher()
+        except OSError as ex:
+            logger.debug("Process events unavailable: %s", ex)
+    if PidfdProcessWatcher.is_available():
+        return PidfdProcessWatcher()
+    return ProcessWatcher()
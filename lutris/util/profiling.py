@@ -0,0 +1,60 @@
+"""Timing of the startup phases of Lutris, reported with --profile-startup"""
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Record the wall time of the startup phases.
+
+    Phases are always recorded, recording one is cheap. The report is only
+    printed when Lutris is started with --profile-startup. Times are
+    relative to the import of this module, which is the first thing the
+    lutris script does.
+    """
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.enabled = "--profile-startup" in sys.argv
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def add_phase(self, name, start, end):
+        """Record a phase given its start and end times (from time.monotonic)"""
+        thread_name = threading.current_thread().name
+        with self._lock:
+            self.phases.append((start - self.start_time, end - start, name, thread_name))
+
+    @contextmanager
+    def phase(self, name):
+        """Record the time spent in the block"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, start, time.monotonic())
+
+    def mark(self, name):
+        """Record an event, such as the first paint of the main window"""
+        now = time.monotonic()
+        self.add_phase(name, now, now)
+
+    def get_report(self):
+        """Return the recorded phases, ordered by start time, as text"""
+        lines = ["%10s %10s  %s" % ("start", "duration", "phase")]
+        with self._lock:
+            phases = sorted(self.phases)
+        for start, duration, name, thread_name in phases:
+            if thread_name != "MainThread":
+                name = "%s [%s]" % (name, thread_name)
+            lines.append("%8.1fms %8.1fms  %s" % (start * 1000, duration * 1000, name))
+        return "\n".join(lines)
+
+    def report(self):
+        """Print the report if the startup is being profiled"""
+        if self.enabled:
+            print(self.get_report(), file=sys.stderr)
+
+
+STARTUP_PROFILER = StartupProfiler()
@@ -35,15 +35,13 @@ def update_desktop_icons():
 
 
 def download_media(url, dest, overwrite=False):
-    """Save a remote media locally"""
-    if system.path_exists(dest):
-        if overwrite:
-            os.remove(dest)
-        else:
-            return dest
+    """Save a remote media locally. When overwriting, the media is only
+    downloaded again if it changed on the server.
+    """
+    if system.path_exists(dest) and not overwrite:
+        return dest
     try:
-        request = Request(url).get()
+        Request(url, cache=True).get(stream=True).write_to_file(dest)
     except HTTPError:
         return
-    request.write_to_file(dest)
     return dest
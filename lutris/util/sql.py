@@ -1,43 +1,143 @@
-import time
+import os
+import atexit
 import sqlite3
+import threading
 from lutris.util.log import logger
 
-# Number of attempts to retry failed queries
-DB_RETRIES = 5
+# Time in seconds SQLite waits on a locked database before giving up
+DB_TIMEOUT = 10
+
+# Pragmas applied to every new connection
+DB_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", -8000),
+)
+
+# Connections are reused for the lifetime of a thread, one per database path
+_local = threading.local()
+
+
+class PooledConnection:
+    """A persistent connection to a SQLite database owned by a single thread"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT, isolation_level=None)
+        self.file_id = get_file_id(db_path)
+        self.transaction_depth = 0
+        for pragma, value in DB_PRAGMAS:
+            result = self.conn.execute("PRAGMA %s=%s" % (pragma, value)).fetchone()
+            if pragma == "journal_mode" and result and result[0].lower() != "wal":
+                logger.debug("WAL mode unavailable for %s, using %s", db_path, result[0])
+
+    @property
+    def is_stale(self):
+        """Return True if the database file was deleted or replaced since the
+        connection was opened.
+        """
+        return get_file_id(self.db_path) != self.file_id
+
+    def close(self):
+        self.conn.close()
+
+
+def get_file_id(path):
+    """Return a value identifying the file at path, None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def get_connection(db_path):
+    """Return the connection to `db_path` for the current thread, opening it
+    if needed.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    connection = connections.get(db_path)
+    if connection and not connection.transaction_depth and connection.is_stale:
+        connection.close()
+        connection = None
+    if not connection:
+        connection = PooledConnection(db_path)
+        connections[db_path] = connection
+    return connection
+
+
+def close_connections(db_path=None):
+    """Close the connections opened by the current thread.
+    If `db_path` is given, only the connection to this database is closed.
+    """
+    connections = getattr(_local, "connections", {})
+    for path in list(connections):
+        if db_path and path != db_path:
+            continue
+        connections.pop(path).close()
+
+
+atexit.register(close_connections)
 
 
 class db_cursor(object):
+    """Cursor on the pooled connection to the database.
+    Statements are committed as they run unless a transaction is in progress.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.cursor = None
+
+    def __enter__(self):
+        self.cursor = get_connection(self.db_path).conn.cursor()
+        return self.cursor
+
+    def __exit__(self, type, value, traceback):
+        self.cursor.close()
+
+
+class db_transaction(object):
+    """Run every statement issued in the block in a single transaction.
+    Transactions can be nested, only the outermost one commits or rolls back.
+    """
     def __init__(self, db_path):
         self.db_path = db_path
+        self.connection = None
+        self.cursor = None
 
     def __enter__(self):
-        self.db_conn = sqlite3.connect(self.db_path)
-        cursor = self.db_conn.cursor()
-        return cursor
+        self.connection = get_connection(self.db_path)
+        if not self.connection.transaction_depth:
+            self.connection.conn.execute("BEGIN IMMEDIATE")
+        self.connection.transaction_depth += 1
+        self.cursor = self.connection.conn.cursor()
+        return self.cursor
 
     def __exit__(self, type, value, traceback):
-        self.db_conn.commit()
-        self.db_conn.close()
+        self.cursor.close()
+        self.connection.transaction_depth -= 1
+        if self.connection.transaction_depth:
+            return
+        if type is None:
+            self.connection.conn.execute("COMMIT")
+        else:
+            self.connection.conn.execute("ROLLBACK")
 
 
 def cursor_execute(cursor, query, params=None):
-    """Function used to retry queries in case an error occurs"""
-    i = 0
+    """Execute a query, logging it if it fails. Waiting on a locked
+    database is handled by SQLite itself, see DB_TIMEOUT.
+    """
     if params is None:
         params = ()
-    while True:
-        try:
-            return cursor.execute(query, params)
-        except sqlite3.OperationalError as ex:
-            i += 1
-            if i == DB_RETRIES:
-                raise
-            else:
-                logger.error(
-                    "SQL query '%s' failed. %d retries remaining", query, DB_RETRIES - i
-                )
-                logger.error(ex)
-                time.sleep(1)
+    try:
+        return cursor.execute(query, params)
+    except sqlite3.OperationalError as ex:
+        logger.error("SQL query '%s' failed: %s", query, ex)
+        raise
 
 
 def db_insert(db_path, table, fields):
@@ -137,3 +237,52 @@ def add_field(db_path, tablename, field):
     )
     with db_cursor(db_path) as cursor:
         cursor.execute(query)
+
+
+def get_index_name(tablename, columns):
+    return "idx_%s_%s" % (tablename, "_".join(columns))
+
+
+def get_indexes(db_path, tablename):
+    """Return the explicitly created indexes of a table as a dict of
+    index names and their SQL statements
+    """
+    with db_cursor(db_path) as cursor:
+        rows = cursor_execute(
+            cursor,
+            "select name, sql from sqlite_master "
+            "where type='index' and tbl_name=? and sql is not null",
+            (tablename, )
+        ).fetchall()
+    return dict(rows)
+
+
+def create_index(db_path, tablename, columns, unique=False, name=None, where=None):
+    """Create an index on `columns`, restricted to the rows matching the
+    `where` condition if one is given.
+    """
+    query = "CREATE %sINDEX IF NOT EXISTS %s ON %s (%s)" % (
+        "UNIQUE " if unique else "",
+        name or get_index_name(tablename, columns),
+        tablename,
+        ", ".join(columns),
+    )
+    if where:
+        query += " WHERE %s" % where
+    with db_cursor(db_path) as cursor:
+        cursor_execute(cursor, query)
+
+
+def drop_index(db_path, name):
+    with db_cursor(db_path) as cursor:
+        cursor_execute(cursor, "DROP INDEX IF EXISTS %s" % name)
+
+
+def get_user_version(db_path):
+    with db_cursor(db_path) as cursor:
+        return cursor_execute(cursor, "PRAGMA user_version").fetchone()[0]
+
+
+def set_user_version(db_path, version):
+    with db_cursor(db_path) as cursor:
+        cursor_execute(cursor, "PRAGMA user_version=%d" % int(version))
@@ -1,4 +1,6 @@
 """System utilities"""
+import json
+import fcntl
 import hashlib
 import signal
 import os
@@ -9,6 +11,16 @@ import subprocess
 
 from lutris.util.linux import LINUX_SYSTEM
 from lutris.util.log import logger
+from lutris.util.process import ProcessTable, get_pids_using_files
+
+# Size of the blocks read when computing the checksum of a file
+CHECKSUM_BUFFER_SIZE = 1024 * 1024
+
+# Size of the blocks copied at once when the data can't be shared
+COPY_BUFFER_SIZE = 16 * 1024 * 1024
+
+# ioctl sharing the data of a file with another one (reflink)
+FICLONE = 0x40049409
 
 
 def execute(command, env=None, cwd=None, log_errors=False, quiet=False, shell=False):
@@ -80,12 +92,54 @@ def get_md5_hash(filename):
 def get_file_checksum(filename, hash_type):
     """Return the checksum of type `hash_type` for a given filename"""
     hasher = hashlib.new(hash_type)
-    with open(filename, "rb") as input_file:
-        for chunk in iter(lambda: input_file.read(4096), b""):
-            hasher.update(chunk)
+    buffer = bytearray(CHECKSUM_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(filename, "rb", buffering=0) as input_file:
+        for size in iter(lambda: input_file.readinto(buffer), 0):
+            hasher.update(view[:size])
     return hasher.hexdigest()
 
 
+def get_checksums_path(filename):
+    """Return the path of the file keeping the checksums of `filename`"""
+    return filename + ".checksums"
+
+
+def read_file_checksums(filename):
+    """Return the checksums recorded for a file, if it didn't change since"""
+    file_stat = os.stat(filename)
+    try:
+        with open(get_checksums_path(filename)) as checksums_file:
+            checksums = json.load(checksums_file)
+    except (OSError, ValueError):
+        checksums = {}
+    if checksums.get("size") != file_stat.st_size or checksums.get("mtime") != file_stat.st_mtime_ns:
+        checksums = {"size": file_stat.st_size, "mtime": file_stat.st_mtime_ns}
+    return checksums
+
+
+def save_file_checksum(filename, hash_type, value):
+    """Record the checksum of a file next to it"""
+    checksums = read_file_checksums(filename)
+    checksums[hash_type] = value
+    try:
+        with open(get_checksums_path(filename), "w") as checksums_file:
+            json.dump(checksums, checksums_file)
+    except OSError as ex:
+        logger.warning("Failed to save the checksum of %s: %s", filename, ex)
+
+
+def get_cached_file_checksum(filename, hash_type):
+    """Return the checksum of type `hash_type` for a given filename, reusing
+    the one recorded next to it if the file didn't change since.
+    """
+    checksum = read_file_checksums(filename).get(hash_type)
+    if not checksum:
+        checksum = get_file_checksum(filename, hash_type)
+        save_file_checksum(filename, hash_type, checksum)
+    return checksum
+
+
 def find_executable(exec_name):
     """Return the absolute path of an executable"""
     if not exec_name:
@@ -103,10 +157,9 @@ def get_pid(program, multiple=False):
     :param bool multiple: If True and multiple instances of the program exist,
         return all of them; if False only return the first one.
     """
-    pids = execute(["pgrep", program])
-    if not pids.strip():
+    pids = [str(process.pid) for process in ProcessTable.snapshot().find(program)]
+    if not pids:
         return
-    pids = pids.split()
     if multiple:
         return pids
     return pids[0]
@@ -166,10 +219,39 @@ def substitute(string_template, variables):
     return template.safe_substitute(variables)
 
 
-def merge_folders(source, destination):
-    """Merges the content of source to destination"""
+def copy_file(source, destination):
+    """Copy a file and its permissions, sharing its data with a reflink
+    when the file system supports it, otherwise copying it in the kernel.
+    """
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        try:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        except OSError:
+            copy_file_data(source_file, destination_file)
+    shutil.copymode(source, destination)
+
+
+def copy_file_data(source_file, destination_file):
+    """Copy the content of a file object to another one"""
+    if not hasattr(os, "copy_file_range"):
+        shutil.copyfileobj(source_file, destination_file, COPY_BUFFER_SIZE)
+        return
+    try:
+        while os.copy_file_range(source_file.fileno(), destination_file.fileno(), COPY_BUFFER_SIZE):
+            pass
+    except OSError:
+        # Not supported between these file systems
+        shutil.copyfileobj(source_file, destination_file, COPY_BUFFER_SIZE)
+
+
+def merge_folders(source, destination, move=False):
+    """Merges the content of source to destination. If `move` is set, files
+    are moved instead of copied, renamed when both folders are on the same
+    file system.
+    """
     logger.debug("Merging %s into %s", source, destination)
     source = os.path.abspath(source)
+    same_device = move and os.stat(source).st_dev == os.stat(destination).st_dev
     for (dirpath, dirnames, filenames) in os.walk(source):
         source_relpath = dirpath[len(source):].strip("/")
         dst_abspath = os.path.join(destination, source_relpath)
@@ -184,9 +266,16 @@ def merge_folders(source, destination):
             # logger.debug("Copying %s", filename)
             if not os.path.exists(dst_abspath):
                 os.makedirs(dst_abspath)
-            shutil.copy(
-                os.path.join(dirpath, filename), os.path.join(dst_abspath, filename)
-            )
+            source_path = os.path.join(dirpath, filename)
+            destination_path = os.path.join(dst_abspath, filename)
+            if os.path.isdir(destination_path):
+                shutil.copy(source_path, destination_path)
+            elif same_device:
+                os.replace(source_path, destination_path)
+            elif os.path.islink(source_path) or not os.path.isfile(source_path):
+                shutil.copy(source_path, destination_path)
+            else:
+                copy_file(source_path, destination_path)
 
 
 def remove_folder(path):
@@ -273,12 +362,7 @@ def get_pids_using_file(path):
     if not os.path.exists(path):
         logger.error("Can't return PIDs using non existing file: %s", path)
         return set()
-    fuser_path = find_executable("fuser")
-    if not fuser_path:
-        logger.warning("fuser not available, please install psmisc")
-        return set([])
-    fuser_output = execute([fuser_path, path], quiet=True)
-    return set(fuser_output.split())
+    return get_pids_using_files([path])
 
 
 def get_terminal_apps():
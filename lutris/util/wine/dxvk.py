@@ -8,8 +8,8 @@ import urllib.request
 
 from lutris.settings import RUNTIME_DIR
 from lutris.util.log import logger
-from lutris.util.extract import extract_archive
-from lutris.util.downloader import Downloader
+from lutris.util.extract import extract_archive, get_tar_stream_mode
+from lutris.util.downloader import ArchiveDownloader, Downloader
 from lutris.util import system
 
 CACHE_MAX_AGE = 86400  # Re-download DXVK versions every day
@@ -154,6 +154,18 @@ class DXVKManager:
 
         dxvk_archive_path = os.path.join(self.base_dir, os.path.basename(dxvk_url))
 
+        if get_tar_stream_mode(dxvk_archive_path):
+            # Extracted while downloaded, the archive isn't written to disk
+            downloader = ArchiveDownloader(dxvk_url, self.dxvk_path, merge_single=True)
+            downloader.start()
+            while downloader.check_progress() < 1 and downloader.state != downloader.ERROR:
+                time.sleep(0.3)
+            if downloader.state == downloader.ERROR or not self.is_available():
+                raise UnavailableDXVKVersion(
+                    "Failed to download %s %s" % (self.base_name.upper(), self.version)
+                )
+            return
+
         downloader = Downloader(dxvk_url, dxvk_archive_path)
         downloader.start()
         while downloader.check_progress() < 1 and downloader.state != downloader.ERROR:
@@ -1,5 +1,6 @@
 """Wine prefix management"""
 import os
+from contextlib import contextmanager
 from lutris.util.wine.registry import WineRegistry
 from lutris.util.log import logger
 from lutris.util import joypad, system
@@ -20,17 +21,57 @@ class WinePrefixManager:
         if not path:
             logger.warning("No path specified for Wine prefix")
         self.path = path
+        # Registries loaded by the current registry session, by file name,
+        # None when no session is in progress
+        self._registries = None
+        self._modified_registries = set()
+
+    @contextmanager
+    def registry_session(self):
+        """Group changes to the registry: each registry file is read the
+        first time it's needed and written once at the end of the block.
+        Sessions can be nested, only the outermost one saves the changes.
+        Nothing is saved if the block raises an exception.
+        """
+        if self._registries is not None:
+            yield
+            return
+        self._registries = {}
+        try:
+            yield
+            for reg_filename in self._modified_registries:
+                self._registries[reg_filename].save()
+        finally:
+            self._registries = None
+            self._modified_registries = set()
+
+    def get_registry(self, key):
+        """Return the registry containing key, shared by the current session"""
+        reg_filename = self.get_registry_path(key)
+        if self._registries is None:
+            return WineRegistry(reg_filename)
+        if reg_filename not in self._registries:
+            self._registries[reg_filename] = WineRegistry(reg_filename)
+        return self._registries[reg_filename]
+
+    def save_registry(self, registry):
+        """Save a modified registry, or delay it to the end of the session"""
+        if self._registries is None:
+            registry.save()
+        else:
+            self._modified_registries.add(registry.reg_filename)
 
     def setup_defaults(self):
         """Sets the defaults for newly created prefixes"""
-        self.override_dll("winemenubuilder.exe", "")
-        try:
-            self.desktop_integration()
-        except OSError as ex:
-            logger.error(
-                "Failed to setup desktop integration, the prefix may not be valid."
-            )
-            logger.exception(ex)
+        with self.registry_session():
+            self.override_dll("winemenubuilder.exe", "")
+            try:
+                self.desktop_integration()
+            except OSError as ex:
+                logger.error(
+                    "Failed to setup desktop integration, the prefix may not be valid."
+                )
+                logger.exception(ex)
 
     def get_registry_path(self, key):
         """Matches registry keys to a registry file
@@ -49,23 +90,23 @@ class WinePrefixManager:
         )
 
     def get_registry_key(self, key, subkey):
-        registry = WineRegistry(self.get_registry_path(key))
+        registry = self.get_registry(key)
         return registry.query(self.get_key_path(key), subkey)
 
     def set_registry_key(self, key, subkey, value):
-        registry = WineRegistry(self.get_registry_path(key))
+        registry = self.get_registry(key)
         registry.set_value(self.get_key_path(key), subkey, value)
-        registry.save()
+        self.save_registry(registry)
 
     def clear_registry_key(self, key):
-        registry = WineRegistry(self.get_registry_path(key))
+        registry = self.get_registry(key)
         registry.clear_key(self.get_key_path(key))
-        registry.save()
+        self.save_registry(registry)
 
     def clear_registry_subkeys(self, key, subkeys):
-        registry = WineRegistry(self.get_registry_path(key))
+        registry = self.get_registry(key)
         registry.clear_subkeys(self.get_key_path(key), subkeys)
-        registry.save()
+        self.save_registry(registry)
 
     def override_dll(self, dll, mode):
         key = self.hkcu_prefix + "/Software/Wine/DllOverrides"
@@ -176,17 +217,18 @@ class WinePrefixManager:
         """
         path = self.hkcu_prefix + "/Software/Wine/Explorer"
         if enabled:
-            self.set_registry_key(path, "Desktop", "WineDesktop")
-            default_resolution = "x".join(DISPLAY_MANAGER.get_current_resolution())
-            logger.debug(
-                "Enabling wine virtual desktop with default resolution of %s",
-                default_resolution,
-            )
-            self.set_registry_key(
-                self.hkcu_prefix + "/Software/Wine/Explorer/Desktops",
-                "WineDesktop",
-                default_resolution,
-            )
+            with self.registry_session():
+                self.set_registry_key(path, "Desktop", "WineDesktop")
+                default_resolution = "x".join(DISPLAY_MANAGER.get_current_resolution())
+                logger.debug(
+                    "Enabling wine virtual desktop with default resolution of %s",
+                    default_resolution,
+                )
+                self.set_registry_key(
+                    self.hkcu_prefix + "/Software/Wine/Explorer/Desktops",
+                    "WineDesktop",
+                    default_resolution,
+                )
         else:
             self.clear_registry_key(path)
 
@@ -209,10 +251,11 @@ class WinePrefixManager:
     def configure_joypads(self):
         joypads = joypad.get_joypads()
         key = self.hkcu_prefix + "/Software/Wine/DirectInput/Joysticks"
-        self.clear_registry_key(key)
-        for device, joypad_name in joypads:
-            if "event" in device:
-                disabled_joypad = "{} (js)".format(joypad_name)
-            else:
-                disabled_joypad = "{} (event)".format(joypad_name)
-            self.set_registry_key(key, disabled_joypad, "disabled")
+        with self.registry_session():
+            self.clear_registry_key(key)
+            for device, joypad_name in joypads:
+                if "event" in device:
+                    disabled_joypad = "{} (js)".format(joypad_name)
+                else:
+                    disabled_joypad = "{} (event)".format(joypad_name)
+                self.set_registry_key(key, disabled_joypad, "disabled")
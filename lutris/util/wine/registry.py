@@ -2,6 +2,7 @@
 import os
 import re
 from collections import OrderedDict
+from collections.abc import MutableMapping
 from datetime import datetime
 from lutris.util.log import logger
 from lutris.util import system
@@ -27,6 +28,19 @@ DATA_TYPES = {
     "dword": REG_DWORD,
 }
 
+# Registry files are read as UTF-8, invalid bytes are written back unchanged
+REG_ENCODING = "utf-8"
+REG_ENCODING_ERRORS = "surrogateescape"
+
+# Separates the name of a key from its timestamp in a key definition
+KEY_DEF_SEPARATOR = re.compile(r"(?<=[^\\]\]) ")
+
+# Start of the lines defining a key
+KEY_DEF_START = re.compile(rb"^\[", re.MULTILINE)
+
+# Indexes of the registry files read so far, by file name
+REGISTRY_INDEXES = {}
+
 
 class WindowsFileTime:
     """Utility class to deal with Windows FILETIME structures.
@@ -68,6 +82,173 @@ class WindowsFileTime:
         return datetime.fromtimestamp(self.to_unix_timestamp())
 
 
+def get_file_id(reg_file):
+    """Return a value changing when the registry file is modified"""
+    stat = os.fstat(reg_file.fileno())
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def decode_registry(content):
+    return content.decode(REG_ENCODING, REG_ENCODING_ERRORS)
+
+
+def get_key_name(key_def):
+    """Return the name of a key from its definition line"""
+    raw_name = KEY_DEF_SEPARATOR.split(key_def, maxsplit=1)[0]
+    return raw_name.replace("\\\\", "/").strip("[]")
+
+
+def parse_key(raw_key):
+    """Return a WineRegistryKey from its text in a registry file"""
+    lines = raw_key.split("\n")
+    key = WineRegistryKey(key_def=lines[0])
+    add_next_to_value = False
+    additional_values = []
+    for line in lines[1:]:
+        if add_next_to_value:
+            additional_values.append(line)
+        else:
+            if additional_values:
+                key.add_to_last("\n".join(additional_values))
+                additional_values = []
+            key.parse(line)
+        add_next_to_value = line.endswith("\\")
+    if additional_values:
+        key.add_to_last("\n".join(additional_values))
+    return key
+
+
+class RegistryIndex:
+    """Position of the keys in a registry file.
+
+    The index is built by looking for key definitions without parsing the
+    keys. It stays valid as long as the file isn't modified.
+    """
+
+    def __init__(self, header, offsets, file_id):
+        self.header = header
+        self.offsets = offsets
+        self.file_id = file_id
+
+    @classmethod
+    def from_content(cls, content, file_id):
+        """Index the content of a registry file, given as bytes"""
+        starts = [match.start() for match in KEY_DEF_START.finditer(content)]
+        ends = starts[1:] + [len(content)]
+        offsets = OrderedDict()
+        for start, end in zip(starts, ends):
+            line_end = content.find(b"\n", start, end)
+            key_def = decode_registry(content[start:end if line_end == -1 else line_end])
+            offsets[get_key_name(key_def)] = (start, end)
+        header = decode_registry(content[:starts[0] if starts else len(content)])
+        return cls(header, offsets, file_id)
+
+
+class RegistryKeys(MutableMapping):
+    """Keys of a registry, by name. Keys are parsed the first time they are
+    accessed, the ones that never were are saved back as they were read.
+    """
+
+    def __init__(self, reg_filename=None, index=None, content=None):
+        self.reg_filename = reg_filename
+        self.index = index or RegistryIndex("", OrderedDict(), None)
+        self._content = content
+        self._names = OrderedDict.fromkeys(self.index.offsets)
+        self._parsed = {}
+
+    @classmethod
+    def from_file(cls, reg_filename):
+        """Load the keys of a registry file. If the file was indexed before
+        and hasn't changed since, it isn't read until keys are accessed.
+        """
+        try:
+            with open(reg_filename, "rb") as reg_file:
+                file_id = get_file_id(reg_file)
+                index = REGISTRY_INDEXES.get(reg_filename)
+                if index and index.file_id == file_id:
+                    return cls(reg_filename, index)
+                content = reg_file.read()
+        except OSError:
+            logger.exception(
+                "Failed to registry read %s, please send attach this file in a bug report",
+                reg_filename,
+            )
+            return cls()
+        index = RegistryIndex.from_content(content, file_id)
+        REGISTRY_INDEXES[reg_filename] = index
+        return cls(reg_filename, index, content)
+
+    def __getitem__(self, name):
+        if name not in self._parsed:
+            if name not in self._names:
+                raise KeyError(name)
+            self._parsed[name] = parse_key(self.get_raw_key(name))
+        return self._parsed[name]
+
+    def __setitem__(self, name, key):
+        self._names[name] = None
+        self._parsed[name] = key
+
+    def __delitem__(self, name):
+        del self._names[name]
+        self._parsed.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def has_unparsed_keys(self):
+        """Return whether some keys were never accessed"""
+        return len(self._names) > len(self._parsed)
+
+    def load_content(self):
+        """Read the registry file if it wasn't already. The keys are
+        reindexed if the file changed since it was indexed.
+        """
+        if self._content is not None or not self.reg_filename:
+            return
+        with open(self.reg_filename, "rb") as reg_file:
+            file_id = get_file_id(reg_file)
+            self._content = reg_file.read()
+        if file_id != self.index.file_id:
+            logger.warning("%s changed while being edited, reloading it", self.reg_filename)
+            self.set_content(self._content, file_id)
+
+    def set_content(self, content, file_id):
+        """Use a new version of the registry file for the keys not parsed yet"""
+        self._content = content
+        self.index = RegistryIndex.from_content(content, file_id)
+        REGISTRY_INDEXES[self.reg_filename] = self.index
+        for name in list(self._names):
+            if name not in self.index.offsets and name not in self._parsed:
+                del self._names[name]
+        for name in self.index.offsets:
+            self._names.setdefault(name)
+
+    def get_raw_key(self, name):
+        """Return the text of a key as it is in the registry file"""
+        start, end = self.index.offsets[name]
+        if self._content is None:
+            with open(self.reg_filename, "rb") as reg_file:
+                if get_file_id(reg_file) == self.index.file_id:
+                    reg_file.seek(start)
+                    return decode_registry(reg_file.read(end - start))
+            self.load_content()
+            start, end = self.index.offsets[name]
+        return decode_registry(self._content[start:end])
+
+    def render_key(self, name):
+        """Return the content of a key in the wine .reg format"""
+        if name in self._parsed:
+            return self._parsed[name].render()
+        return self.get_raw_key(name).rstrip("\n") + "\n"
+
+
 class WineRegistry:
     version_header = "WINE REGISTRY Version "
     relative_to_header = ";; All keys relative to "
@@ -76,7 +257,7 @@ class WineRegistry:
         self.arch = WINE_DEFAULT_ARCH
         self.version = 2
         self.relative_to = "\\\\User\\\\S-1-5-21-0-0-0-1000"
-        self.keys = OrderedDict()
+        self.keys = RegistryKeys()
         self.reg_filename = reg_filename
         if reg_filename:
             if not system.path_exists(reg_filename):
@@ -107,27 +288,15 @@ class WineRegistry:
         return registry_content
 
     def parse_reg_file(self, reg_filename):
-        registry_lines = self.get_raw_registry(reg_filename)
-        current_key = None
-        add_next_to_value = False
-        additional_values = []
-        for line in registry_lines:
-            line = line.rstrip("\n")
-
-            if line.startswith("["):
-                current_key = WineRegistryKey(key_def=line)
-                self.keys[current_key.name] = current_key
-            elif current_key:
-                if add_next_to_value:
-                    additional_values.append(line)
-                elif not add_next_to_value:
-                    if additional_values:
-                        additional_values = "\n".join(additional_values)
-                        current_key.add_to_last(additional_values)
-                        additional_values = []
-                    current_key.parse(line)
-                add_next_to_value = line.endswith("\\")
-            elif line.startswith(self.version_header):
+        """Load a registry file, its keys are only parsed when accessed"""
+        if not system.path_exists(reg_filename):
+            return
+        self.keys = RegistryKeys.from_file(reg_filename)
+        self.parse_header(self.keys.index.header)
+
+    def parse_header(self, header):
+        for line in header.split("\n"):
+            if line.startswith(self.version_header):
                 self.version = int(line[len(self.version_header):])
             elif line.startswith(self.relative_to_header):
                 self.relative_to = line[len(self.relative_to_header):]
@@ -135,16 +304,25 @@ class WineRegistry:
                 self.arch = line.split("=")[1]
 
     def render(self):
-        content = "{}{}\n".format(self.version_header, self.version)
-        content += "{}{}\n\n".format(self.relative_to_header, self.relative_to)
-        content += "#arch={}\n".format(self.arch)
-        for key in self.keys:
-            content += "\n"
-            content += self.keys[key].render()
-        return content
+        content = [
+            "{}{}\n".format(self.version_header, self.version),
+            "{}{}\n\n".format(self.relative_to_header, self.relative_to),
+            "#arch={}\n".format(self.arch),
+        ]
+        if self.keys.has_unparsed_keys():
+            # Read the whole file once rather than each key not parsed
+            self.keys.load_content()
+        for name in self.keys:
+            content.append("\n")
+            content.append(self.keys.render_key(name))
+        return "".join(content)
 
     def save(self, path=None):
-        """Write the registry to a file"""
+        """Write the registry to a file. The content is written to a
+        temporary file first, then moved over the registry, so that the
+        registry is never left half written. Keys that weren't accessed are
+        copied from the original file.
+        """
         if not path:
             path = self.reg_filename
         if not path:
@@ -155,8 +333,16 @@ class WineRegistry:
                 "Invalid Wine prefix path %s, make sure to "
                 "create the prefix before saving to a registry" % prefix_path
             )
-        with open(path, "w") as registry_file:
-            registry_file.write(self.render())
+        content = self.render().encode(REG_ENCODING, REG_ENCODING_ERRORS)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as registry_file:
+            registry_file.write(content)
+            # Written out first, the id has to be the one of the complete file
+            registry_file.flush()
+            file_id = get_file_id(registry_file)
+        os.replace(temp_path, path)
+        if path == self.reg_filename:
+            self.keys.set_content(content, file_id)
 
     def query(self, path, subkey):
         key = self.keys.get(path)
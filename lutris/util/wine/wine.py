@@ -23,6 +23,7 @@ WINE_PATHS = {
 ESYNC_LIMIT_CHECK = os.environ.get("ESYNC_LIMIT_CHECK", "").lower()
 
 
+@lru_cache()
 def get_playonlinux():
     """Return the folder containing PoL config files"""
     pol_path = os.path.expanduser("~/.PlayOnLinux")
@@ -52,9 +53,6 @@ def get_proton_paths():
     return list(paths)
 
 
-POL_PATH = get_playonlinux()
-
-
 def detect_arch(prefix_path=None, wine_path=None):
     """Given a Wine prefix path, return its architecture"""
     arch = detect_prefix_arch(prefix_path)
@@ -159,9 +157,10 @@ def get_wine_versions():
             if os.path.isfile(path):
                 versions.append(version)
 
-    if POL_PATH:
+    pol_path = get_playonlinux()
+    if pol_path:
         for arch in ['x86', 'amd64']:
-            builds_path = os.path.join(POL_PATH, "wine/linux-%s" % arch)
+            builds_path = os.path.join(pol_path, "wine/linux-%s" % arch)
             if not system.path_exists(builds_path):
                 continue
             for version in os.listdir(builds_path):
@@ -1,29 +1,78 @@
 """Utility functions for YAML handling"""
 # pylint: disable=no-member
+import os
+import threading
+
 import yaml
 
 from lutris.util.log import logger
 from lutris.util.system import path_exists
 
+# Use the libyaml bindings when PyYAML is built with them, they are an order
+# of magnitude faster than the pure Python loader and dumper.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Parsed documents by path, with the size and modification time of the file
+# they were parsed from
+_YAML_CACHE = {}
+_YAML_CACHE_LOCK = threading.Lock()
+
+
+def get_yaml_file_key(filename):
+    """Return what identifies a version of a file in the cache, or None if
+    the file doesn't exist.
+    """
+    try:
+        stat = os.stat(filename)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def copy_yaml_data(data):
+    """Return a copy of parsed YAML data, its dicts and lists can be
+    modified without altering the original.
+    """
+    if isinstance(data, dict):
+        return {key: copy_yaml_data(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [copy_yaml_data(value) for value in data]
+    return data
+
 
 def read_yaml_from_file(filename):
-    """Read filename and return parsed yaml"""
+    """Read filename and return parsed yaml
+
+    Parsed files are cached until their size or modification time change,
+    callers get a copy they are free to modify.
+    """
     if not path_exists(filename):
         return {}
 
+    file_key = get_yaml_file_key(filename)
+    with _YAML_CACHE_LOCK:
+        cached = _YAML_CACHE.get(filename)
+    if cached and cached[0] == file_key:
+        return copy_yaml_data(cached[1])
+
     with open(filename, "r") as yaml_file:
         try:
-            yaml_content = yaml.safe_load(yaml_file) or {}
+            yaml_content = yaml.load(yaml_file, Loader=SafeLoader) or {}
         except (yaml.scanner.ScannerError, yaml.parser.ParserError):
             logger.error("error parsing file %s", filename)
             yaml_content = {}
 
-    return yaml_content
+    with _YAML_CACHE_LOCK:
+        _YAML_CACHE[filename] = (file_key, yaml_content)
+    return copy_yaml_data(yaml_content)
 
 
 def write_yaml_to_file(filepath, config):
     if not filepath:
         raise ValueError("Missing filepath")
-    yaml_config = yaml.dump(config, default_flow_style=False)
+    yaml_config = yaml.dump(config, Dumper=SafeDumper, default_flow_style=False)
     with open(filepath, "w") as filehandler:
         filehandler.write(yaml_config)
+    with _YAML_CACHE_LOCK:
+        _YAML_CACHE.pop(filepath, None)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Time loading the configs of a library of generated games, the way lutris
+did before parsed configs were cached, on a first load and when the configs
+are loaded again, as when the library view is refreshed."""
+import os
+import sys
+import time
+import tempfile
+import yaml
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lutris import config, settings
+from lutris.util import yaml as lutris_yaml
+
+GAME_COUNT = 2000
+RUNNERS = ("wine", "linux", "dosbox", "mednafen")
+
+
+def write_configs(config_dir):
+    """Write a system config, runner configs and GAME_COUNT game configs"""
+    os.makedirs(os.path.join(config_dir, "runners"))
+    os.makedirs(os.path.join(config_dir, "games"))
+    lutris_yaml.write_yaml_to_file(os.path.join(config_dir, "system.yml"), {
+        "system": {"resolution": "1920x1080", "env": {"DXVK_HUD": "fps"}}
+    })
+    for runner in RUNNERS:
+        lutris_yaml.write_yaml_to_file(os.path.join(config_dir, "runners", runner + ".yml"), {
+            runner: {"fullscreen": True},
+            "system": {"disable_runtime": False}
+        })
+    for index in range(GAME_COUNT):
+        runner = RUNNERS[index % len(RUNNERS)]
+        lutris_yaml.write_yaml_to_file(
+            os.path.join(config_dir, "games", "game-%d.yml" % index),
+            {
+                "game": {
+                    "exe": "drive_c/Games/Game %d/game.exe" % index,
+                    "prefix": "/home/user/Games/game-%d" % index,
+                    "args": "-windowed -skipintro",
+                },
+                runner: {"version": "5.7-%d" % index},
+                "system": {"env": {"GAME_INDEX": str(index)}},
+            }
+        )
+
+
+def load_configs():
+    for index in range(GAME_COUNT):
+        config.LutrisConfig(
+            runner_slug=RUNNERS[index % len(RUNNERS)],
+            game_config_id="game-%d" % index
+        )
+
+
+def clear_caches():
+    lutris_yaml._YAML_CACHE.clear()  # pylint: disable=protected-access
+    config._CASCADE_CACHE.clear()  # pylint: disable=protected-access
+    config._DEFAULTS_CACHE.clear()  # pylint: disable=protected-access
+
+
+def load_configs_uncached():
+    """Load every config the way it was done before configs were cached"""
+    loader = lutris_yaml.SafeLoader
+    lutris_yaml.SafeLoader = yaml.SafeLoader
+    for index in range(GAME_COUNT):
+        clear_caches()
+        config.LutrisConfig(
+            runner_slug=RUNNERS[index % len(RUNNERS)],
+            game_config_id="game-%d" % index
+        )
+    lutris_yaml.SafeLoader = loader
+
+
+def run(label, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print("{:<24} {:>8.1f} ms".format(label, elapsed * 1000))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as config_dir:
+        settings.CONFIG_DIR = config_dir
+        write_configs(config_dir)
+        print("%d game configs, libyaml %s" % (
+            GAME_COUNT, "available" if yaml.__with_libyaml__ else "unavailable"
+        ))
+        run("before", load_configs_uncached)
+        clear_caches()
+        run("first load", load_configs)
+        run("loaded again", load_configs)
+
+
+if __name__ == "__main__":
+    main()
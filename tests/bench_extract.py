@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Compare extracting a tar archive over an existing folder the way
+extract_archive used to, with extractall and a merge copying every file,
+against the current extraction, on a generated archive of many small files
+and a few large ones.
+
+The size of the archive in MB can be given as argument, 2048 by default.
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import tarfile
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lutris.util import extract
+
+SMALL_FILE_SIZE = 32 * 1024
+LARGE_FILE_SIZE = 64 * 1024 * 1024
+LARGE_FILE_SHARE = 0.5  # Part of the archive made of large files
+FILES_PER_FOLDER = 200
+
+
+def write_archive(path, size):
+    """Write an uncompressed archive of `size` bytes, with a single top
+    level folder like runner archives.
+    """
+    block = os.urandom(LARGE_FILE_SIZE)
+    small_count = int(size * (1 - LARGE_FILE_SHARE)) // SMALL_FILE_SIZE
+    large_count = max(1, int(size * LARGE_FILE_SHARE) // LARGE_FILE_SIZE)
+    with tarfile.open(path, "w") as archive:
+        for index in range(small_count):
+            add_file(
+                archive,
+                "wine-bench/lib/%d/file%d.dll" % (index // FILES_PER_FOLDER, index),
+                block[index % 1024 * 1024:][:SMALL_FILE_SIZE]
+            )
+        for index in range(large_count):
+            add_file(archive, "wine-bench/share/large%d.bin" % index, block)
+    return small_count, large_count
+
+
+def add_file(archive, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = 0o644
+    info.mtime = time.time()
+    archive.addfile(info, io.BytesIO(data))
+
+
+def copy_merge(source, destination):
+    """Merge folders the way system.merge_folders used to"""
+    for (dirpath, dirnames, filenames) in os.walk(source):
+        dst_abspath = os.path.join(destination, dirpath[len(source):].strip("/"))
+        for dirname in dirnames:
+            os.makedirs(os.path.join(dst_abspath, dirname), exist_ok=True)
+        for filename in filenames:
+            shutil.copy(os.path.join(dirpath, filename), os.path.join(dst_abspath, filename))
+
+
+def extract_before(archive_path, dest):
+    temp_path = os.path.join(dest, ".extract-bench")
+    with tarfile.open(archive_path, "r:") as archive:
+        archive.extractall(temp_path)
+    for name in os.listdir(temp_path):
+        copy_merge(os.path.join(temp_path, name), os.path.join(dest, name))
+    shutil.rmtree(temp_path)
+
+
+def extract_now(archive_path, dest):
+    extract.extract_archive(archive_path, dest, merge_single=False)
+
+
+def run(label, func, archive_path, work_dir):
+    dest = os.path.join(work_dir, "dest")
+    # Extract over an existing version, as when a runner is updated
+    os.makedirs(os.path.join(dest, "wine-bench"))
+    os.sync()
+    start = time.perf_counter()
+    func(archive_path, dest)
+    os.sync()
+    elapsed = time.perf_counter() - start
+    print("{:<24} {:>8.1f} s".format(label, elapsed))
+    shutil.rmtree(dest)
+
+
+def main():
+    size = int(sys.argv[1]) * 1024 * 1024 if len(sys.argv) > 1 else 2048 * 1024 * 1024
+    with tempfile.TemporaryDirectory(dir=os.path.expanduser("~")) as work_dir:
+        archive_path = os.path.join(work_dir, "wine-bench.tar")
+        small_count, large_count = write_archive(archive_path, size)
+        print("archive: %.0f MB, %d small files, %d large files, %d CPUs" % (
+            os.path.getsize(archive_path) / 1024 / 1024,
+            small_count,
+            large_count,
+            os.cpu_count()
+        ))
+        run("extractall + copy", extract_before, archive_path, work_dir)
+        run("extract_archive", extract_now, archive_path, work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Compare filtering a library of generated games the way the view did
+before, running the filter function on every row for each change, against
+the filter index, while typing a search and changing the sidebar filters.
+
+Only the filtering is timed, with plain tuples as rows. The view used to
+also read each value from the Gtk model, and refilter every row."""
+import os
+import sys
+import time
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lutris.gui.views.filter_index import GameFilterIndex
+
+GAME_COUNT = 20000
+WORDS = (
+    "the", "legend", "of", "dark", "space", "quest", "knight", "star", "war",
+    "city", "racing", "tales", "kingdom", "dungeon", "lost", "island", "zero",
+    "hero", "doom", "shadow", "fantasy", "final", "super", "world", "age",
+)
+RUNNERS = ("wine", "linux", "steam", "dosbox", "mednafen", "libretro", "mame", "scummvm")
+PLATFORMS = ("Windows", "Linux", "MS-DOS", "Nintendo SNES", "Sega Genesis", "Arcade")
+SEARCH = "the legend of zero"
+# Filters changed in order: text typed then erased, then sidebar filters
+CHANGES = (
+    [{"text": SEARCH[:length]} for length in range(1, len(SEARCH) + 1)]
+    + [{"text": SEARCH[:length]} for length in range(len(SEARCH) - 1, -1, -1)]
+    + [{"runner": "wine"}, {"runner": None, "platform": "MS-DOS"}, {"platform": None},
+       {"installed": True}, {"installed": False}]
+)
+
+
+def make_games():
+    randomizer = random.Random(42)
+    return [
+        (
+            game_id,
+            " ".join(randomizer.choice(WORDS) for _index in range(randomizer.randint(2, 5))).title(),
+            randomizer.choice(RUNNERS),
+            randomizer.choice(PLATFORMS),
+            randomizer.random() < 0.3,
+        )
+        for game_id in range(1, GAME_COUNT + 1)
+    ]
+
+
+def filter_row(filters, row):
+    """Visible function of the view before the filter index"""
+    _game_id, name, runner, platform, installed = row
+    if filters["installed"]:
+        if not installed:
+            return False
+    if filters["text"]:
+        if not filters["text"].lower() in name.lower():
+            return False
+    if filters["runner"]:
+        if not filters["runner"] == runner:
+            return False
+    if filters["platform"]:
+        if platform != filters["platform"]:
+            return False
+    return True
+
+
+def filter_rows(games):
+    filters = {"text": None, "runner": None, "platform": None, "installed": False}
+    updated_rows = 0
+    for change in CHANGES:
+        filters.update(change)
+        for row in games:
+            filter_row(filters, row)
+        updated_rows += len(games)
+    return updated_rows
+
+
+def make_index(games):
+    index = GameFilterIndex()
+    for game_id, name, runner, platform, installed in games:
+        index.add(game_id, name, runner, platform, installed)
+    return index
+
+
+def filter_index(index):
+    filters = {"text": None, "runner": None, "platform": None, "installed": False}
+    visible = index.all
+    updated_rows = 0
+    for change in CHANGES:
+        filters.update(change)
+        matches = index.search(**filters)
+        updated_rows += len(index.get_keys(matches ^ visible))
+        visible = matches
+    return updated_rows
+
+
+def run(label, func, *args):
+    start = time.perf_counter()
+    updated_rows = func(*args)
+    elapsed = time.perf_counter() - start
+    print("{:<16} {:>8.1f} ms, {:>5.2f} ms per change, {:>7} rows updated".format(
+        label, elapsed * 1000, elapsed * 1000 / len(CHANGES), updated_rows
+    ))
+
+
+def main():
+    games = make_games()
+    print("%d games, %d filter changes" % (len(games), len(CHANGES)))
+    run("visible func", filter_rows, games)
+    start = time.perf_counter()
+    index = make_index(games)
+    print("{:<16} {:>8.1f} ms".format("index build", (time.perf_counter() - start) * 1000))
+    run("filter index", filter_index, index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Compare requests per second against a local server, sending the API
+requests the way lutris did before, opening a connection with urllib for
+each request, against the pooled keep-alive connections, from one thread
+and from several threads as when the library downloads its media.
+
+Requests are sent over HTTP, then over HTTPS with a self signed certificate
+when openssl is available, as lutris.net is only served over HTTPS."""
+import os
+import ssl
+import sys
+import time
+import json
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lutris.util import http
+
+REQUEST_COUNT = 2000
+THREAD_COUNT = 8
+OPENER = urllib.request.build_opener()
+BODY = json.dumps({
+    "count": 50,
+    "results": [{"id": index, "slug": "game-%d" % index, "name": "Game %d" % index} for index in range(50)]
+}).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without this each response on
+    # a kept alive connection waits for the client's delayed acknowledgment.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def make_certificate(cert_dir):
+    """Return the path of a self signed certificate for 127.0.0.1, with its key"""
+    cert_path = os.path.join(cert_dir, "cert.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+            "-keyout", cert_path, "-out", cert_path,
+        ],
+        check=True, capture_output=True
+    )
+    return cert_path
+
+
+def get_before(url):
+    """Request sent the way util.http.Request did before the pooled session"""
+    request = urllib.request.Request(url=url, headers={"User-Agent": "lutris"})
+    response = OPENER.open(request, timeout=30)
+    content = response.read()
+    response.close()
+    return json.loads(content.decode())
+
+
+def get_after(url):
+    return http.Request(url).get().json
+
+
+def run(label, func, url, threads):
+    start = time.perf_counter()
+    if threads == 1:
+        for _index in range(REQUEST_COUNT):
+            func(url)
+    else:
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(func, [url] * REQUEST_COUNT))
+    elapsed = time.perf_counter() - start
+    print("{:<8} {:>2} threads {:>8.0f} requests/s".format(label, threads, REQUEST_COUNT / elapsed))
+
+
+def run_all(scheme, server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "%s://127.0.0.1:%d/api/games" % (scheme, server.server_address[1])
+    print("%s, %d requests of %d bytes" % (scheme.upper(), REQUEST_COUNT, len(BODY)))
+    for threads in (1, THREAD_COUNT):
+        run("before", get_before, url, threads)
+        run("after", get_after, url, threads)
+    server.shutdown()
+    server.server_close()
+
+
+def main():
+    global OPENER  # pylint: disable=global-statement
+    run_all("http", Server(("127.0.0.1", 0), Handler))
+    with tempfile.TemporaryDirectory() as cert_dir:
+        try:
+            cert_path = make_certificate(cert_dir)
+        except (OSError, subprocess.CalledProcessError):
+            print("openssl unavailable, skipping HTTPS")
+            return
+        server = Server(("127.0.0.1", 0), Handler)
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(cert_path)
+        server.socket = server_context.wrap_socket(server.socket, server_side=True)
+        client_context = ssl.create_default_context(cafile=cert_path)
+        OPENER = urllib.request.build_opener(urllib.request.HTTPSHandler(context=client_context))
+        http.get_session().verify = cert_path
+        run_all("https", server)
+
+
+if __name__ == "__main__":
+    main()
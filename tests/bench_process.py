@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Compare walking a process tree with Process, as the monitor used to,
+against a ProcessTable snapshot, and looking for the processes using
+files with fuser against the /proc scanner, on a synthetic tree of 500
+processes"""
+import os
+import sys
+import time
+import shutil
+import subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lutris.util.process import Process, ProcessTable, scan_file_users
+
+BRANCH_COUNT = 50
+LEAF_COUNT = 9
+RUNS = 20
+# Stand-ins for wine, wine64 and wineserver
+USED_FILES = [shutil.which("sleep"), shutil.which("bash"), shutil.which("env")]
+
+
+def start_tree():
+    """Start BRANCH_COUNT shells, each with LEAF_COUNT sleeping children"""
+    script = "for i in $(seq %d); do sleep 60 & done; wait" % LEAF_COUNT
+    return [subprocess.Popen(["bash", "-c", script]) for _index in range(BRANCH_COUNT)]
+
+
+def walk_processes():
+    return [(child.pid, child.name, child.state) for child in Process(os.getpid()).iter_children()]
+
+
+def walk_snapshot():
+    return [
+        (child.pid, child.comm, child.state)
+        for child in ProcessTable.snapshot().iter_children(os.getpid())
+    ]
+
+
+def find_users_with_fuser():
+    pids = set()
+    for path in USED_FILES:
+        pids |= set(subprocess.run(
+            ["fuser", path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        ).stdout.split())
+    return pids
+
+
+def find_users_with_scan():
+    return scan_file_users(USED_FILES)
+
+
+def run(label, func):
+    timings = []
+    for _index in range(RUNS):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    print("{:<24} {:>8.2f} ms  {} processes".format(label, min(timings) * 1000, len(result)))
+
+
+def main():
+    branches = start_tree()
+    try:
+        expected_count = BRANCH_COUNT * (LEAF_COUNT + 1)
+        while len(walk_snapshot()) < expected_count:
+            time.sleep(0.1)
+        print("processes on the system: %d" % len(ProcessTable.snapshot()))
+        run("Process.iter_children", walk_processes)
+        run("ProcessTable snapshot", walk_snapshot)
+        if shutil.which("fuser"):
+            run("fuser x3", find_users_with_fuser)
+        run("scan_file_users", find_users_with_scan)
+    finally:
+        for branch in branches:
+            subprocess.call(["pkill", "-P", str(branch.pid)])
+            branch.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Compare changing registry keys one by one with WinePrefixManager against
+a registry session, and time single queries and changes, on a large
+generated user.reg"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lutris.util.wine.prefix import WinePrefixManager
+from lutris.util.wine.registry import WineRegistry
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "user.reg")
+KEY_COUNT = 40000
+CHANGE_COUNT = 30
+
+
+def write_large_registry(path):
+    """Write a registry with the keys of the fixture and KEY_COUNT more"""
+    shutil.copy(FIXTURE_PATH, path)
+    with open(path, "a") as registry_file:
+        for index in range(KEY_COUNT):
+            registry_file.write(
+                "\n[Software\\\\Bench\\\\Key%d] 1477412318\n"
+                "#time=1d22edb71813e3c\n"
+                "\"Path\"=\"C:\\\\Program Files\\\\Bench\\\\%d\"\n"
+                "\"Size\"=dword:%08x\n" % (index, index, index)
+            )
+
+
+def apply_changes(prefix_manager):
+    """Make changes similar to what the wine runner does before a launch"""
+    key = "HKEY_CURRENT_USER/Software/Wine/DirectInput/Joysticks"
+    prefix_manager.clear_registry_key(key)
+    for index in range(CHANGE_COUNT):
+        prefix_manager.set_registry_key(key, "Joypad %d (js)" % index, "disabled")
+
+
+def run(label, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print("{:<24} {:>8.1f} ms".format(label, elapsed * 1000))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as prefix_path:
+        write_large_registry(os.path.join(prefix_path, "user.reg"))
+        print("user.reg: %.1f MB, %d changes" % (
+            os.path.getsize(os.path.join(prefix_path, "user.reg")) / 1024 / 1024,
+            CHANGE_COUNT + 1
+        ))
+        prefix_manager = WinePrefixManager(prefix_path)
+        run("without session", lambda: apply_changes(prefix_manager))
+
+        def apply_changes_in_session():
+            with prefix_manager.registry_session():
+                apply_changes(prefix_manager)
+        run("registry session", apply_changes_in_session)
+
+        user_reg = os.path.join(prefix_path, "user.reg")
+        run("query", lambda: WineRegistry(user_reg).query("Control Panel/Desktop", "DragHeight"))
+        run("query (indexed)", lambda: WineRegistry(user_reg).query("Control Panel/Desktop", "DragHeight"))
+        run("single change", lambda: prefix_manager.set_registry_key(
+            "HKEY_CURRENT_USER/Control Panel/Desktop", "DragHeight", "8"
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Compare the cost of PGA queries with a connection per query against the
+pooled connections of lutris.util.sql, and of bulk upserts against add_or_update"""
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lutris import pga
+from lutris.util import sql
+
+QUERY_COUNT = 2000
+
+
+def unpooled_insert(db_path, fields):
+    """Insert a row the way lutris did before connections were pooled"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute(
+        "insert into games({}) values ({})".format(
+            ", ".join(fields), ", ".join("?" * len(fields))
+        ),
+        tuple(fields.values())
+    )
+    conn.commit()
+    conn.close()
+
+
+def unpooled_select(db_path, slug):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("select * from games where slug=?", (slug, )).fetchall()
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def run(label, func):
+    start = time.perf_counter()
+    for index in range(QUERY_COUNT):
+        func(index)
+    elapsed = time.perf_counter() - start
+    print("{:<24} {:>8.1f} µs/query".format(label, elapsed / QUERY_COUNT * 1000000))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pga.PGA_DB = os.path.join(temp_dir, "unpooled.db")
+        pga.syncdb()
+        sql.close_connections()
+        with sqlite3.connect(pga.PGA_DB) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+        run("insert (unpooled)", lambda i: unpooled_insert(
+            pga.PGA_DB, {"name": "Game %d" % i, "slug": "game-%d" % i}
+        ))
+        run("select (unpooled)", lambda i: unpooled_select(pga.PGA_DB, "game-%d" % i))
+
+        pga.PGA_DB = os.path.join(temp_dir, "pooled.db")
+        pga.syncdb()
+        run("insert (pooled)", lambda i: sql.db_insert(
+            pga.PGA_DB, "games", {"name": "Game %d" % i, "slug": "game-%d" % i}
+        ))
+        run("select (pooled)", lambda i: pga.get_games_by_slug("game-%d" % i))
+
+        games = [{"name": "Game %d" % i, "runner": "linux"} for i in range(QUERY_COUNT)]
+        run("add_or_update", lambda i: pga.add_or_update(**games[i]))
+        start = time.perf_counter()
+        pga.upsert_games(games)
+        elapsed = time.perf_counter() - start
+        print("{:<24} {:>8.1f} µs/game".format("upsert_games", elapsed / QUERY_COUNT * 1000000))
+        sql.close_connections()
+
+
+if __name__ == "__main__":
+    main()
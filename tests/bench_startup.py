@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Measure the runner related work done before the main window is shown:
+the sidebar lists every runner with its human name, the platforms of all
+runners and the installed runners. Each measure runs in a fresh interpreter
+so module imports are accounted for."""
+import os
+import sys
+import subprocess
+
+RUNS = 5
+
+STARTUP_CODE = """
+import sys
+import time
+start = time.perf_counter()
+from lutris import runners
+from lutris import platforms
+names = [runners.get_runner_human_name(name) for name in runners.__all__]
+installed = [name for name in runners.__all__ if runners.is_runner_installed(name)]
+elapsed = time.perf_counter() - start
+runner_modules = [
+    name for name in sys.modules
+    if name.startswith("lutris.runners.") and name.split(".")[2] in runners.__all__
+]
+print(elapsed, len(runner_modules))
+"""
+
+
+def main():
+    source_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Load the settings and the runner base class first, they are needed by
+    # the window anyway
+    code = "import lutris.settings\nimport lutris.runners.runner\n" + STARTUP_CODE
+    timings = []
+    for _index in range(RUNS):
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=source_path)
+        elapsed, module_count = output.split()
+        timings.append(float(elapsed))
+    print("{:<24} {:>8.1f} ms".format("runners for sidebar", min(timings) * 1000))
+    print("{:<24} {:>8}".format("runner modules loaded", int(module_count)))
+
+
+if __name__ == "__main__":
+    main()
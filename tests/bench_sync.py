@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Time syncing a library of generated games with a mocked Lutris API: the
+games are read from the API, then their banners are downloaded, 8 at a time
+as the library view does.
+
+Before, the pages of games were read one after the other and the banners
+downloaded again on each sync. The pages are now read concurrently, and
+the responses are cached and revalidated: the mocked API answers the second
+sync with 304 Not Modified. The server waits LATENCY seconds before each
+response, and as long as sending its body at BANDWIDTH would take, as a
+remote server would."""
+import os
+import re
+import sys
+import time
+import json
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lutris import api, settings
+from lutris.util import http, http_cache, resources
+
+GAME_COUNT = 5000
+PAGE_SIZE = 100
+LATENCY = 0.02  # Seconds
+BANDWIDTH = 5 * 1024 * 1024  # Bytes per second, for each connection
+MEDIA_WORKERS = 8
+BANNER = b"\xff\xd8" * 30000
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        page = int(query["page"])
+        slugs = query["games"]
+        body = json.dumps({
+            "count": len(slugs),
+            "next": "/api/games?page=%d" % (page + 1) if page * PAGE_SIZE < len(slugs) else None,
+            "results": [
+                {
+                    "slug": slug,
+                    "name": slug.replace("-", " ").title(),
+                    "banner_url": "%s/media/banners/%s.jpg" % (self.server.url, slug),
+                    "aliases": [],
+                }
+                for slug in slugs[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+            ]
+        }).encode()
+        self.respond(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.respond(BANNER)
+
+    def respond(self, body):
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers["If-None-Match"] == etag:
+            self.send_response(304)
+            body = b""
+        else:
+            self.send_response(200)
+        time.sleep(LATENCY + len(body) / BANDWIDTH)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def get_api_games_before(game_slugs):
+    """Read the pages of games the way get_api_games did before, one after
+    the other, without caching them.
+    """
+    results = []
+    page = "1"
+    while page:
+        response = http.Request(settings.SITE_URL + "/api/games?page=%s" % page)
+        response.get(data=json.dumps({"games": game_slugs, "page": page}).encode("utf-8"))
+        response_data = response.json
+        results += response_data["results"]
+        page_match = re.search(r"page=(\d+)", response_data["next"] or "")
+        page = page_match.group(1) if page_match else None
+    return results
+
+
+def download_media_before(url, dest):
+    """Download a media the way download_media did before, when overwriting"""
+    if os.path.exists(dest):
+        os.remove(dest)
+    http.Request(url).get().write_to_file(dest)
+
+
+def sync(get_api_games, download_media, banner_dir):
+    os.makedirs(banner_dir, exist_ok=True)
+    slugs = ["game-%d" % index for index in range(GAME_COUNT)]
+    start = time.perf_counter()
+    games = get_api_games(slugs)
+    api_time = time.perf_counter() - start
+    with ThreadPoolExecutor(max_workers=MEDIA_WORKERS) as executor:
+        for game in games:
+            executor.submit(
+                download_media,
+                game["banner_url"],
+                os.path.join(banner_dir, "%s.jpg" % game["slug"])
+            )
+    return api_time, time.perf_counter() - start
+
+
+def run(label, *args):
+    api_time, total_time = sync(*args)
+    print("{:<14} games {:>7.2f} s, with banners {:>7.2f} s".format(label, api_time, total_time))
+
+
+def main():
+    server = Server(("127.0.0.1", 0), Handler)
+    server.url = "http://127.0.0.1:%d" % server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings.SITE_URL = server.url
+    with tempfile.TemporaryDirectory() as temp_dir:
+        http_cache.HTTP_CACHE = http_cache.HTTPCache(os.path.join(temp_dir, "http"))
+        print("%d games, %d per page, %d ms latency, %d MB/s" % (
+            GAME_COUNT, PAGE_SIZE, LATENCY * 1000, BANDWIDTH / 1024 / 1024
+        ))
+        run("before", get_api_games_before, download_media_before, os.path.join(temp_dir, "before"))
+        banner_dir = os.path.join(temp_dir, "banners")
+        run("after, first", api.get_api_games, resources.download_media, banner_dir)
+        run(
+            "after, 304",
+            api.get_api_games,
+            lambda url, dest: resources.download_media(url, dest, overwrite=True),
+            banner_dir
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
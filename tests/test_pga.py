@@ -2,6 +2,7 @@ import unittest
 import os
 from sqlite3 import OperationalError
 from lutris import pga
+from lutris.catalog import GameCatalog
 from lutris.util import sql
 
 TEST_PGA_PATH = os.path.join(os.path.dirname(__file__), 'pga.db')
@@ -15,6 +16,7 @@ class DatabaseTester(unittest.TestCase):
         pga.syncdb()
 
     def tearDown(self):
+        sql.close_connections()
         if os.path.exists(TEST_PGA_PATH):
             os.remove(TEST_PGA_PATH)
 
@@ -65,6 +67,155 @@ class TestPersonnalGameArchive(DatabaseTester):
         self.assertEqual(game['directory'], '/foo')
 
 
+class TestBulkOperations(DatabaseTester):
+    def test_add_games_bulk_returns_ids_in_order(self):
+        game_ids = pga.add_games_bulk([{"name": "foo"}, {"name": "bar", "year": 1999}])
+        self.assertEqual(pga.get_game_by_field(game_ids[0], "id")["name"], "foo")
+        self.assertEqual(pga.get_game_by_field(game_ids[1], "id")["name"], "bar")
+
+    def test_upsert_games(self):
+        game_id = pga.add_game(name="some game", runner="linux")
+        games = [
+            {"name": "some game", "runner": "linux", "directory": "/foo"},
+            {"name": "other game", "runner": "linux"},
+        ]
+        inserted, updated = pga.upsert_games(games)
+        self.assertEqual(updated, [game_id])
+        self.assertEqual(len(inserted), 1)
+        self.assertEqual(games[0]["id"], game_id)
+        self.assertEqual(games[1]["id"], inserted[0])
+        self.assertEqual(pga.get_game_by_field(game_id, "id")["directory"], "/foo")
+        self.assertEqual(pga.get_game_by_field("other-game")["id"], inserted[0])
+
+    def test_upsert_merges_duplicates(self):
+        games = [{"name": "foo"}, {"name": "foo", "year": 1999}]
+        inserted, updated = pga.upsert_games(games)
+        self.assertEqual(len(inserted), 1)
+        self.assertEqual(updated, [])
+        self.assertEqual(pga.get_game_by_field("foo")["year"], 1999)
+
+    def test_upsert_can_match_on_field(self):
+        game_id = pga.add_game(name="foo", steamid=10)
+        inserted, updated = pga.upsert_games(
+            [{"name": "bar", "steamid": 10}, {"name": "baz", "steamid": 20}],
+            match_on="steamid"
+        )
+        self.assertEqual(updated, [game_id])
+        self.assertEqual(pga.get_game_by_field(game_id, "id")["name"], "bar")
+        self.assertEqual(pga.get_game_by_field(inserted[0], "id")["steamid"], 20)
+
+
+class TestGameCatalog(DatabaseTester):
+    def setUp(self):
+        super().setUp()
+        self.catalog = GameCatalog()
+        self.game_id = pga.add_game(name="LutrisTest", runner="linux", steamid=10)
+
+    def tearDown(self):
+        pga.GAME_CHANGE_CALLBACKS.remove(self.catalog.invalidate)
+        super().tearDown()
+
+    def test_can_lookup_games(self):
+        self.assertEqual(self.catalog.get_game(self.game_id)["name"], "LutrisTest")
+        self.assertEqual(self.catalog.get_games(slug="lutristest")[0]["id"], self.game_id)
+        self.assertEqual(self.catalog.get_games(steamid="10")[0]["id"], self.game_id)
+        self.assertEqual(self.catalog.get_games(runner="linux", installed=1), [])
+        self.assertEqual(self.catalog.get_game(self.game_id + 1), {})
+
+    def test_catalog_follows_changes(self):
+        self.catalog.get_games()
+        other_id = pga.add_game(name="Other", runner="wine", platform="Windows")
+        self.assertEqual(self.catalog.get_values("platform"), ["Windows"])
+        pga.add_or_update(id=self.game_id, name="Renamed", runner="dosbox")
+        self.assertEqual(self.catalog.get_games(runner="linux"), [])
+        self.assertEqual(self.catalog.get_games(runner="dosbox")[0]["name"], "Renamed")
+        pga.set_uninstalled(other_id)
+        self.assertEqual(self.catalog.get_game(other_id)["runner"], "")
+        pga.delete_game(self.game_id)
+        self.assertEqual(self.catalog.get_game(self.game_id), {})
+        self.assertEqual(self.catalog.get_games_with("steamid"), [])
+
+    def test_catalog_follows_bulk_changes(self):
+        self.catalog.get_games()
+        pga.upsert_games([
+            {"name": "LutrisTest", "runner": "linux", "year": 2000},
+            {"name": "New"},
+        ])
+        self.assertEqual(self.catalog.get_game(self.game_id)["year"], 2000)
+        self.assertEqual(len(self.catalog.get_games()), 2)
+
+
+class TestQueryPlans(DatabaseTester):
+    """Make sure the frequent queries don't scan the whole games table"""
+
+    def assertUsesIndex(self, query, params=()):
+        with sql.db_cursor(TEST_PGA_PATH) as cursor:
+            plan = [row[-1] for row in cursor.execute("EXPLAIN QUERY PLAN " + query, params)]
+        for step in plan:
+            self.assertIn("INDEX", step, "%s: %s" % (query, plan))
+            self.assertNotIn("TEMP B-TREE", step, "%s: %s" % (query, plan))
+
+    def test_lookups_by_field_use_indexes(self):
+        for field in ("slug", "installer_slug", "configpath", "steamid"):
+            self.assertUsesIndex("select * from games where %s=?" % field, ("foo", ))
+
+    def test_lookups_by_slug_use_indexes(self):
+        self.assertUsesIndex("select * from games where slug in (?, ?)", ("foo", "bar"))
+
+    def test_steam_games_query_uses_index(self):
+        self.assertUsesIndex(
+            "select * from games where steamid is not null AND steamid != ?", ("", )
+        )
+
+    def test_runner_count_uses_index(self):
+        self.assertUsesIndex(
+            "select runner, count(*) from games where runner is not null "
+            "group by runner order by runner"
+        )
+
+    def test_platform_count_uses_index(self):
+        self.assertUsesIndex(
+            "select platform, count(*) from games "
+            "where platform is not null and platform is not '' and installed is 1 "
+            "group by platform order by platform"
+        )
+
+    def test_store_games_lookup_uses_index(self):
+        self.assertUsesIndex("select * from store_games where store=? and appid=?", ("gog", "1"))
+
+
+class TestConnectionPool(DatabaseTester):
+    def test_connection_is_reused(self):
+        connection = sql.get_connection(TEST_PGA_PATH)
+        pga.add_game(name="LutrisTest", runner="Linux")
+        self.assertIs(sql.get_connection(TEST_PGA_PATH), connection)
+
+    def test_database_uses_wal(self):
+        with sql.db_cursor(TEST_PGA_PATH) as cursor:
+            journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, "wal")
+
+    def test_replaced_database_is_reopened(self):
+        connection = sql.get_connection(TEST_PGA_PATH)
+        os.remove(TEST_PGA_PATH)
+        pga.syncdb()
+        self.assertIsNot(sql.get_connection(TEST_PGA_PATH), connection)
+        self.assertEqual(pga.get_games(), [])
+
+    def test_transaction_is_rolled_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with sql.db_transaction(TEST_PGA_PATH):
+                pga.add_game(name="LutrisTest", runner="Linux")
+                raise ValueError
+        self.assertEqual(pga.get_games(), [])
+
+    def test_nested_transactions_commit_once(self):
+        with sql.db_transaction(TEST_PGA_PATH):
+            pga.add_games_bulk([{"name": "foo"}, {"name": "bar"}])
+            self.assertEqual(sql.get_connection(TEST_PGA_PATH).transaction_depth, 1)
+        self.assertEqual(len(pga.get_games()), 2)
+
+
 class TestDbCreator(DatabaseTester):
     def test_can_generate_fields(self):
         text_field = pga.field_to_string('name', 'TEXT')
@@ -142,6 +293,47 @@ class TestMigration(DatabaseTester):
         self.assertTrue(pga.get_schema(self.tablename))
         self.assertFalse(pga.get_schema('notatable'))
 
+    def test_schema_is_versioned(self):
+        self.assertEqual(sql.get_user_version(TEST_PGA_PATH), len(pga.SCHEMA_MIGRATIONS))
+        self.assertIn("idx_games_runner", sql.get_indexes(TEST_PGA_PATH, "games"))
+
+    def test_can_migrate_schema(self):
+        self.create_table()
+        migrations = pga.SCHEMA_MIGRATIONS + [
+            [{"action": "create_index", "table": self.tablename, "columns": ["name"]}],
+            [{"action": "drop_index", "name": "idx_games_runner"}],
+        ]
+        version = pga.migrate_schema(migrations)
+        self.assertEqual(version, len(migrations))
+        self.assertEqual(sql.get_user_version(TEST_PGA_PATH), version)
+        self.assertIn("idx_basetable_name", sql.get_indexes(TEST_PGA_PATH, self.tablename))
+        self.assertNotIn("idx_games_runner", sql.get_indexes(TEST_PGA_PATH, "games"))
+
+    def test_failed_schema_migration_is_rolled_back(self):
+        migrations = pga.SCHEMA_MIGRATIONS + [[
+            {"action": "drop_index", "name": "idx_games_runner"},
+            {"action": "create_index", "table": "notatable", "columns": ["name"]},
+        ]]
+        with self.assertRaises(OperationalError):
+            pga.migrate_schema(migrations)
+        self.assertEqual(sql.get_user_version(TEST_PGA_PATH), len(pga.SCHEMA_MIGRATIONS))
+        self.assertIn("idx_games_runner", sql.get_indexes(TEST_PGA_PATH, "games"))
+
+    def test_unique_index_falls_back_on_duplicates(self):
+        self.create_table()
+        sql.db_insert(TEST_PGA_PATH, self.tablename, {"name": "foo"})
+        sql.db_insert(TEST_PGA_PATH, self.tablename, {"name": "foo"})
+        pga.create_index(self.tablename, ["name"], unique=True)
+        self.assertIn("idx_basetable_name", sql.get_indexes(TEST_PGA_PATH, self.tablename))
+
+    def test_can_rebuild_table(self):
+        game_id = pga.add_game(name="foo", playtime="1.5")
+        pga.rebuild_table("games")
+        game = pga.get_game_by_field(game_id, "id")
+        self.assertEqual(game["name"], "foo")
+        self.assertEqual(game["playtime"], 1.5)
+        self.assertIn("idx_games_runner", sql.get_indexes(TEST_PGA_PATH, "games"))
+
     def test_can_migrate(self):
         self.create_table()
         self.schema.append({'name': 'new_field', 'type': 'TEXT'})
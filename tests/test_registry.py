@@ -1,6 +1,10 @@
 import os
+import shutil
+import tempfile
 from unittest import TestCase
-from lutris.util.wine.registry import WineRegistry, WineRegistryKey
+from unittest.mock import patch
+from lutris.util.wine.registry import WineRegistry, WineRegistryKey, RegistryIndex, REGISTRY_INDEXES
+from lutris.util.wine.prefix import WinePrefixManager
 
 FIXTURES_PATH = os.path.join(os.path.dirname(__file__), 'fixtures')
 
@@ -86,6 +90,109 @@ class TestWineRegistry(TestCase):
         self.assertEqual(len(key.subkeys), 0)
 
 
+class TestRegistrySession(TestCase):
+    def setUp(self):
+        self.prefix_path = tempfile.mkdtemp()
+        self.registry_path = os.path.join(self.prefix_path, 'user.reg')
+        shutil.copy(os.path.join(FIXTURES_PATH, 'user.reg'), self.registry_path)
+        self.prefix_manager = WinePrefixManager(self.prefix_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.prefix_path)
+
+    def test_session_reads_and_writes_once(self):
+        key = 'HKEY_CURRENT_USER/Software/Wine/Direct3D'
+        with patch.object(WineRegistry, 'parse_reg_file', autospec=True,
+                          side_effect=WineRegistry.parse_reg_file) as parse_reg_file:
+            with patch.object(WineRegistry, 'save', autospec=True,
+                              side_effect=WineRegistry.save) as save:
+                with self.prefix_manager.registry_session():
+                    self.prefix_manager.set_registry_key(key, 'MaxVersionGL', 'x')
+                    self.prefix_manager.set_registry_key(key, 'OffscreenRenderingMode', 'fbo')
+                    self.prefix_manager.clear_registry_subkeys(key, ['MaxVersionGL'])
+                    self.assertEqual(self.prefix_manager.get_registry_key(key, 'MaxVersionGL'), None)
+                    save.assert_not_called()
+                self.assertEqual(parse_reg_file.call_count, 1)
+                self.assertEqual(save.call_count, 1)
+        registry = WineRegistry(self.registry_path)
+        self.assertEqual(registry.query('Software/Wine/Direct3D', 'OffscreenRenderingMode'), 'fbo')
+        self.assertEqual(registry.query('Software/Wine/Direct3D', 'MaxVersionGL'), None)
+        self.assertFalse(os.path.exists(self.registry_path + '.tmp'))
+
+    def test_session_is_discarded_on_error(self):
+        with open(self.registry_path) as registry_file:
+            original_content = registry_file.read()
+        with self.assertRaises(RuntimeError):
+            with self.prefix_manager.registry_session():
+                self.prefix_manager.set_registry_key(
+                    'HKEY_CURRENT_USER/Software/Wine/Direct3D', 'MaxVersionGL', 'x'
+                )
+                raise RuntimeError
+        with open(self.registry_path) as registry_file:
+            self.assertEqual(registry_file.read(), original_content)
+
+    def test_changes_are_saved_without_session(self):
+        self.prefix_manager.set_registry_key(
+            'HKEY_CURRENT_USER/Software/Wine/Direct3D', 'MaxVersionGL', 'x'
+        )
+        registry = WineRegistry(self.registry_path)
+        self.assertEqual(registry.query('Software/Wine/Direct3D', 'MaxVersionGL'), 'x')
+
+
+class TestRegistryIndex(TestCase):
+    def setUp(self):
+        self.prefix_path = tempfile.mkdtemp()
+        self.registry_path = os.path.join(self.prefix_path, 'user.reg')
+        shutil.copy(os.path.join(FIXTURES_PATH, 'user.reg'), self.registry_path)
+
+    def tearDown(self):
+        REGISTRY_INDEXES.pop(self.registry_path, None)
+        shutil.rmtree(self.prefix_path)
+
+    def test_keys_are_parsed_when_accessed(self):
+        registry = WineRegistry(self.registry_path)
+        self.assertIn('Control Panel/Desktop', registry.keys)
+        self.assertEqual(registry.keys._parsed, {})
+        self.assertEqual(registry.query('Control Panel/Desktop', 'DragHeight'), '4')
+        self.assertEqual(list(registry.keys._parsed), ['Control Panel/Desktop'])
+
+    def test_index_is_reused_until_file_changes(self):
+        WineRegistry(self.registry_path)
+        index = REGISTRY_INDEXES[self.registry_path]
+        self.assertIs(WineRegistry(self.registry_path).keys.index, index)
+        with open(self.registry_path, 'a') as registry_file:
+            registry_file.write('\n[Software\\\\Lutris] 1477412318\n"Test"="1"\n')
+        registry = WineRegistry(self.registry_path)
+        self.assertIsNot(registry.keys.index, index)
+        self.assertEqual(registry.query('Software/Lutris', 'Test'), '1')
+
+    def test_save_only_renders_changed_keys(self):
+        with open(self.registry_path) as registry_file:
+            original_content = registry_file.read()
+        registry = WineRegistry(self.registry_path)
+        registry.set_value('Control Panel/Desktop', 'DragHeight', '8')
+        registry.set_value('Control Panel/Desktop', 'DragDepth', '8')
+        with patch.object(WineRegistryKey, 'render', autospec=True,
+                          side_effect=WineRegistryKey.render) as render:
+            registry.save()
+            self.assertEqual(render.call_count, 1)
+        with open(self.registry_path) as registry_file:
+            content = registry_file.read()
+        self.assertEqual(len(content.splitlines()), len(original_content.splitlines()) + 1)
+        self.assertIs(registry.keys.index, REGISTRY_INDEXES[self.registry_path])
+        self.assertEqual(WineRegistry(self.registry_path).render(), content)
+
+    def test_saved_registry_index_is_reused(self):
+        registry = WineRegistry(self.registry_path)
+        registry.set_value('Control Panel/Desktop', 'DragHeight', '8')
+        registry.save()
+        with patch.object(RegistryIndex, 'from_content', wraps=RegistryIndex.from_content) as from_content:
+            reloaded_registry = WineRegistry(self.registry_path)
+            self.assertEqual(reloaded_registry.query('Control Panel/Desktop', 'DragHeight'), '8')
+        from_content.assert_not_called()
+        self.assertIs(reloaded_registry.keys.index, registry.keys.index)
+
+
 class TestWineRegistryKey(TestCase):
     def test_creation_by_key_def_parses(self):
         key = WineRegistryKey(key_def='[Control Panel\\\\Desktop] 1477412318')
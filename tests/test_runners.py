@@ -1,8 +1,11 @@
 import logging
-from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
 
 from lutris.config import LutrisConfig
-from lutris import runners
+from lutris import runners, settings
 from test_pga import DatabaseTester
 
 LOGGER = logging.getLogger(__name__)
@@ -33,6 +36,37 @@ class ImportRunnerTest(DatabaseTester):
                 self.assertIn('type', option)
                 self.assertFalse(option['type'] == 'single')
 
+    def test_runner_info(self):
+        for runner_name in runners.__all__:
+            runner = runners.import_runner(runner_name)()
+            runner_info = runners.get_runner_info(runner_name)
+            self.assertEqual(runner_info.human_name, runner.human_name)
+            self.assertEqual(runner_info.platforms, tuple(runner.platforms))
+            self.assertEqual(
+                [option["option"] for option in runner_info.runner_options],
+                [option["option"] for option in runner.runner_options]
+            )
+            self.assertIs(runners.get_runner_info(runner_name), runner_info)
+        self.assertEqual(runners.get_runner_human_name("notarunner"), "")
+
+    def test_runner_manifest(self):
+        self.assertEqual(set(runners.RUNNER_MANIFESTS), set(runners.__all__))
+        for runner_name in runners.__all__:
+            runner = runners.import_runner(runner_name)()
+            manifest = runners.get_runner_manifest(runner_name)
+            self.assertEqual(manifest.name, runner_name)
+            self.assertEqual(manifest.human_name, runner.human_name)
+            self.assertEqual(
+                runners.get_runner_platforms(runner_name), tuple(runner.platforms)
+            )
+            if manifest.executable:
+                self.assertEqual(manifest.executable, runner.runner_executable)
+                self.assertEqual(
+                    runners.is_runner_installed(runner_name), runner.is_installed()
+                )
+        with self.assertRaises(runners.InvalidRunner):
+            runners.get_runner_manifest("notarunner")
+
     def test_get_system_config(self):
         def fake_yaml_reader(path):
             if not path:
@@ -105,3 +139,98 @@ class ImportRunnerTest(DatabaseTester):
             self.assertEqual(game_config.runner_slug, 'wine')
             wine = wine_runner(game_config)
             self.assertEqual(wine.system_config.get('resolution'), '1680x1050')
+
+    def test_cascaded_config_follows_changed_levels(self):
+        resolutions = ['640x480']
+
+        def fake_yaml_reader(path):
+            if path and 'system.yml' in path:
+                return {'system': {'resolution': resolutions[-1]}}
+            return {}
+
+        with patch('lutris.config.read_yaml_from_file') as yaml_reader:
+            yaml_reader.side_effect = fake_yaml_reader
+            game_config = LutrisConfig(game_config_id='rage', runner_slug='wine')
+            self.assertEqual(game_config.system_config.get('resolution'), '640x480')
+            resolutions.append('800x600')
+            game_config = LutrisConfig(game_config_id='rage', runner_slug='wine')
+            self.assertEqual(game_config.system_config.get('resolution'), '800x600')
+
+    def test_saved_config_applies_to_other_levels(self):
+        config_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(config_dir, 'games'))
+        os.makedirs(os.path.join(config_dir, 'runners'))
+        with patch.object(settings, 'CONFIG_DIR', config_dir):
+            game_config = LutrisConfig(game_config_id='rage', runner_slug='wine')
+            game_config.system_config['resolution'] = '640x480'
+            runner_config = LutrisConfig(runner_slug='wine')
+            runner_config.raw_system_config['resolution'] = '800x600'
+            runner_config.save()
+            game_config = LutrisConfig(game_config_id='rage', runner_slug='wine')
+            self.assertEqual(game_config.system_config.get('resolution'), '800x600')
+        shutil.rmtree(config_dir)
+
+    def test_failed_streamed_install_raises(self):
+        def downloader(url, destination, callback, callback_args=None, downloader=None):
+            downloader.state = downloader.ERROR
+            return callback(**callback_args)
+        runner = runners.import_runner("wine")()
+        installed_callback = Mock()
+        with self.assertRaises(runners.RunnerInstallationError):
+            runner.download_and_extract(
+                "https://example.com/wine-lutris.tar.xz",
+                tempfile.gettempdir(),
+                downloader=downloader,
+                callback=installed_callback
+            )
+        installed_callback.assert_not_called()
+
+    def test_cancelled_streamed_install_raises(self):
+        def downloader(url, destination, callback, callback_args=None, downloader=None):
+            downloader.cancel()
+            return callback(**callback_args)
+        runner = runners.import_runner("wine")()
+        with self.assertRaises(runners.RunnerInstallationError):
+            runner.download_and_extract(
+                "https://example.com/wine-lutris.tar.xz",
+                tempfile.gettempdir(),
+                downloader=downloader,
+                callback=Mock()
+            )
+
+    def test_completed_streamed_install_calls_back(self):
+        def downloader(url, destination, callback, callback_args=None, downloader=None):
+            downloader.state = downloader.COMPLETED
+            downloader.extracted = True
+            return callback(**callback_args)
+        runner = runners.import_runner("wine")()
+        installed_callback = Mock()
+        runner.download_and_extract(
+            "https://example.com/wine-lutris.tar.xz",
+            tempfile.gettempdir(),
+            downloader=downloader,
+            callback=installed_callback
+        )
+        installed_callback.assert_called_once_with()
+
+    def test_runner_info_follows_installed_wine_versions(self):
+        from lutris.util.wine import wine
+
+        def get_default_version():
+            runner_options = runners.get_runner_info("wine").runner_options
+            return next(option["default"] for option in runner_options if option["option"] == "version")
+        runners.clear_runner_info("wine")
+        with patch.object(wine, "get_wine_versions", return_value=["lutris-5.0-x86_64"]):
+            self.assertEqual(get_default_version(), "lutris-5.0-x86_64")
+        with patch.object(wine, "get_wine_versions", return_value=["lutris-6.0-x86_64"]):
+            runners.import_runner("wine")().on_extracted()
+            self.assertEqual(get_default_version(), "lutris-6.0-x86_64")
+
+    def test_config_defaults_follow_installed_wine_versions(self):
+        from lutris.util.wine import wine
+        with patch.object(wine, "get_wine_versions", return_value=["lutris-5.0-x86_64"]):
+            runners.import_runner("wine")().on_extracted()
+            self.assertEqual(LutrisConfig(runner_slug="wine").runner_config["version"], "lutris-5.0-x86_64")
+        with patch.object(wine, "get_wine_versions", return_value=["lutris-6.0-x86_64"]):
+            runners.import_runner("wine")().on_extracted()
+            self.assertEqual(LutrisConfig(runner_slug="wine").runner_config["version"], "lutris-6.0-x86_64")
@@ -1,10 +1,37 @@
+import io
+import json
+import gzip
 import os
+import hashlib
+import tarfile
+import time
+import shutil
+import tempfile
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from collections import OrderedDict
 from unittest import TestCase
+from unittest.mock import Mock, patch
 from lutris.util import system
 from lutris.util.steam import vdf
 from lutris.util import strings
 from lutris.util import fileio
+from lutris.util import linux
+from lutris.util.profiling import StartupProfiler
+from lutris.util.log_capture import LogCapture, LogLines
+from lutris.util import monitor
+from lutris.util import process_watcher
+from lutris.util import process
+from lutris.util import downloader
+from lutris.util import http
+from lutris.util import http_cache
+from lutris.util import extract
+from lutris.util import yaml as lutris_yaml
+from lutris.util.process import ProcessTable
+from lutris import api
+from lutris.gui.widgets import utils as widget_utils
+from lutris.gui.views.filter_index import GameFilterIndex
 
 
 class TestFileUtils(TestCase):
@@ -166,3 +193,889 @@ class TestSubstitute(TestCase):
     def test_can_sub_game_files_with_dashes_in_key(self):
         replacements = {'steam-data': '/tmp'}
         self.assertEqual(system.substitute('--path=$steam-data', replacements), '--path=/tmp')
+
+
+class TestStartupProfiler(TestCase):
+    def test_phases_are_reported_in_order(self):
+        profiler = StartupProfiler()
+        with profiler.phase("second"):
+            pass
+        profiler.add_phase("first", profiler.start_time, profiler.start_time + 0.5)
+        profiler.mark("third")
+        report = profiler.get_report().splitlines()
+        self.assertEqual(len(report), 4)
+        self.assertTrue(report[1].endswith("first"))
+        self.assertIn("500.0ms", report[1])
+        self.assertTrue(report[2].endswith("second"))
+        self.assertTrue(report[3].endswith("third"))
+
+    def test_failing_phase_is_recorded(self):
+        profiler = StartupProfiler()
+        with self.assertRaises(ValueError):
+            with profiler.phase("failure"):
+                raise ValueError
+        self.assertEqual(profiler.phases[0][2], "failure")
+
+
+class TestLinuxSystemCache(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.temp_dir, "system.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_probes_are_lazy(self):
+        with patch.object(linux.LinuxSystem, "find_commands") as find_commands:
+            linux.LinuxSystem(cache_path=self.cache_path)
+            find_commands.assert_not_called()
+        self.assertFalse(os.path.exists(self.cache_path))
+
+    def test_probes_are_read_from_cache(self):
+        system = linux.LinuxSystem(cache_path=self.cache_path)
+        commands = system.commands
+        self.assertTrue(os.path.exists(self.cache_path))
+        with patch.object(linux.LinuxSystem, "find_commands") as find_commands:
+            self.assertEqual(linux.LinuxSystem(cache_path=self.cache_path).commands, commands)
+            find_commands.assert_not_called()
+
+    def test_cache_is_invalidated(self):
+        linux.LinuxSystem(cache_path=self.cache_path).get_terminals()
+        cache_key = dict(linux.get_system_cache_key(), kernel="another-kernel")
+        with patch.object(linux, "get_system_cache_key", return_value=cache_key):
+            with patch.object(linux.LinuxSystem, "find_commands", return_value={"xterm": "/bin/xterm"}):
+                system = linux.LinuxSystem(cache_path=self.cache_path)
+                self.assertEqual(system.get_terminals(), ["/bin/xterm"])
+
+
+class TestProcessWatcher(TestCase):
+    def test_polling_interval_grows_while_nothing_changes(self):
+        watcher = process_watcher.ProcessWatcher()
+        watcher.watch({1})
+        self.assertEqual(watcher.interval, watcher.min_interval)
+        for _ in range(10):
+            watcher.watch({1})
+        self.assertEqual(watcher.interval, watcher.max_interval)
+        watcher.watch({1, 2})
+        self.assertEqual(watcher.interval, watcher.min_interval)
+
+    def test_pidfd_watcher_wakes_up_on_exit(self):
+        if not process_watcher.PidfdProcessWatcher.is_available():
+            self.skipTest("pidfd not supported")
+        watcher = process_watcher.PidfdProcessWatcher()
+        watcher.max_interval = watcher.min_interval = 10
+        process = subprocess.Popen(["sleep", "0.1"])
+        try:
+            start = time.monotonic()
+            watcher.wait({process.pid})
+            self.assertLess(time.monotonic() - start, 5)
+        finally:
+            process.wait()
+            watcher.close()
+        self.assertEqual(watcher.pidfds, {})
+
+
+class TestProcessMonitor(TestCase):
+    def test_zombies_are_not_watched(self):
+        processes = [Mock(pid=100, state="S", comm="wine"), Mock(pid=101, state="Z", comm="game")]
+        process_monitor = monitor.ProcessMonitor(None, None)
+        with patch.object(monitor.ProcessMonitor, "iterate_all_processes", return_value=processes):
+            self.assertFalse(process_monitor.find_process(iter([])))
+        self.assertEqual(process_monitor.watched_pids, {100, os.getpid()})
+
+
+class TestProcessTable(TestCase):
+    def setUp(self):
+        self.proc_path = tempfile.mkdtemp()
+        for pid, ppid, comm, state in (
+                (1, 0, "init", "S"),
+                (10, 1, "wineserver", "S"),
+                (11, 10, "Game (x64).exe", "R"),
+                (12, 11, "steam", "Z"),
+                (20, 1, "bash", "S"),
+        ):
+            os.makedirs(os.path.join(self.proc_path, str(pid)))
+            with open(os.path.join(self.proc_path, str(pid), "stat"), "w") as stat_file:
+                stat_file.write(
+                    "%d (%s) %s %d 1 1 0 -1 0 0 0 0 0 0 0 0 0 20 0 1 0 %d 0 0\n"
+                    % (pid, comm, state, ppid, pid * 100)
+                )
+        os.makedirs(os.path.join(self.proc_path, "self"))
+
+    def tearDown(self):
+        shutil.rmtree(self.proc_path)
+
+    def test_snapshot_parses_stat_files(self):
+        table = ProcessTable.snapshot(self.proc_path)
+        self.assertEqual(len(table), 5)
+        game = table.get(11)
+        self.assertEqual(game.comm, "Game (x64).exe")
+        self.assertEqual(game.ppid, 10)
+        self.assertEqual(game.state, "R")
+        self.assertEqual(game.starttime, 1100)
+
+    def test_iter_children_walks_tree(self):
+        table = ProcessTable.snapshot(self.proc_path)
+        self.assertEqual([process.pid for process in table.iter_children(10)], [11, 12])
+        self.assertEqual(sorted(process.pid for process in table.iter_children(1)), [10, 11, 12, 20])
+
+    def test_find_matches_names(self):
+        table = ProcessTable.snapshot(self.proc_path)
+        self.assertEqual([process.pid for process in table.find("steam$")], [12])
+        self.assertEqual([process.pid for process in table.find(r"\.exe")], [11])
+
+
+class TestFileUsers(TestCase):
+    def test_finds_running_executable(self):
+        sleep_process = subprocess.Popen(["sleep", "10"])
+        try:
+            self.assertIn(str(sleep_process.pid), process.scan_file_users([shutil.which("sleep")]))
+        finally:
+            sleep_process.kill()
+            sleep_process.wait()
+
+    def test_mappings_are_matched_by_path_or_inode(self):
+        maps = (
+            b"7f0000000000-7f0000001000 r--p 00000000 fd:01 1234 /usr/lib/wine/ntdll.so\n"
+            b"7f0000001000-7f0000002000 rw-p 00000000 00:00 0 \n"
+        )
+        self.assertTrue(process.is_mapping_files(maps, set(), {b"/usr/lib/wine/ntdll.so"}))
+        self.assertTrue(process.is_mapping_files(maps, {(os.makedev(0xfd, 1), 1234)}, set()))
+        self.assertFalse(process.is_mapping_files(maps, {(os.makedev(0xfd, 1), 4321)}, {b"/usr/bin/wine"}))
+
+    def test_results_are_cached(self):
+        with patch("lutris.util.process.scan_file_users", return_value={"1"}) as scan:
+            self.assertEqual(process.get_pids_using_files(["/bin/true"]), {"1"})
+            self.assertEqual(process.get_pids_using_files(["/bin/true"]), {"1"})
+            self.assertEqual(scan.call_count, 1)
+            with patch("lutris.util.process.time.monotonic", return_value=time.monotonic() + 10):
+                process.get_pids_using_files(["/bin/true"])
+            self.assertEqual(scan.call_count, 2)
+        process.FILE_USERS_CACHE.clear()
+
+
+class TestLogCapture(TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.log_dir, "logs", "game.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def test_keeps_output_under_max_size(self):
+        capture = LogCapture(max_size=100)
+        for index in range(100):
+            capture.write("line %02d\n" % index)
+        text = capture.get_text()
+        self.assertLessEqual(len(text), 100)
+        self.assertTrue(text.endswith("line 98\nline 99\n"))
+
+    def test_older_output_is_written_to_log_file(self):
+        capture = LogCapture(self.log_path, max_size=100)
+        output = "".join("line %02d\n" % index for index in range(100))
+        for index in range(0, len(output), 7):
+            capture.write(output[index:index + 7])
+        self.assertTrue(os.path.exists(self.log_path))
+        capture.close()
+        with open(self.log_path) as log_file:
+            self.assertEqual(log_file.read(), output)
+
+    def test_log_file_of_previous_run_is_kept(self):
+        for run in ("first\n", "second\n"):
+            capture = LogCapture(self.log_path, max_size=1)
+            capture.write(run * 2)
+            capture.close()
+        with open(self.log_path + ".1") as log_file:
+            self.assertEqual(log_file.read(), "first\nfirst\n")
+
+    def test_small_output_is_not_written_to_disk(self):
+        capture = LogCapture(self.log_path)
+        capture.write("hello\n")
+        capture.close()
+        self.assertFalse(os.path.exists(self.log_path))
+
+    def test_watched_strings_are_matched_across_chunks(self):
+        capture = LogCapture(max_size=10)
+        capture.watch("maybe the wrong wineserver")
+        capture.watch("not in output")
+        capture.write("wine: version mismatch, maybe the wr")
+        capture.write("ong wineserver?\nmore output\n" * 10)
+        self.assertEqual(
+            capture.get_match("maybe the wrong wineserver"),
+            "wine: version mismatch, maybe the wrong wineserver?"
+        )
+        self.assertIsNone(capture.get_match("not in output"))
+
+
+class TestLogLines(TestCase):
+    def test_text_is_appended_to_last_line(self):
+        lines = LogLines(max_lines=10)
+        self.assertEqual(lines.append("foo"), (0, "foo"))
+        lines.append("bar\nbaz\n")
+        self.assertEqual(lines.lines, ["foobar", "baz", ""])
+        self.assertEqual(lines.get_text(), "foobar\nbaz\n")
+
+    def test_older_lines_are_removed(self):
+        lines = LogLines(max_lines=3)
+        lines.append("one\ntwo\n")
+        self.assertEqual(lines.append("three\n"), (1, "three\n"))
+        self.assertEqual(lines.get_text(), "two\nthree\n")
+
+    def test_text_longer_than_max_lines_replaces_everything(self):
+        lines = LogLines(max_lines=3)
+        lines.append("one\n")
+        self.assertEqual(lines.append("two\nthree\nfour\nfive"), (None, "three\nfour\nfive"))
+        self.assertEqual(lines.lines, ["three", "four", "five"])
+
+    def test_find_wraps_around(self):
+        lines = LogLines(max_lines=10)
+        lines.append("Error one\nok\nerror two\n")
+        self.assertEqual(lines.find("ERROR", 0), 0)
+        self.assertEqual(lines.find("error", 1), 13)
+        self.assertEqual(lines.find("error", 14), 0)
+        self.assertEqual(lines.find("error", 13, backwards=True), 0)
+        self.assertEqual(lines.find("error", 0, backwards=True), 13)
+        self.assertIsNone(lines.find("warning", 0))
+
+
+class TestDownloader(TestCase):
+    def setUp(self):
+        self.download_dir = tempfile.mkdtemp()
+        self.dest = os.path.join(self.download_dir, "setup.exe")
+        self.url = "https://example.com/setup.exe"
+
+    def tearDown(self):
+        shutil.rmtree(self.download_dir)
+
+    def test_file_is_split_in_segments(self):
+        size = downloader.MIN_SEGMENT_SIZE * 10 + 3
+        segments = downloader.get_segments(size, 4)
+        self.assertEqual(len(segments), 4)
+        self.assertEqual(segments[0][0], 0)
+        self.assertEqual(segments[-1][1], size)
+        for previous, segment in zip(segments, segments[1:]):
+            self.assertEqual(previous[1], segment[0])
+
+    def test_small_files_use_a_single_segment(self):
+        self.assertEqual(downloader.get_segments(1000, 4), [[0, 1000, 0]])
+
+    def test_journal_is_loaded_for_the_same_file(self):
+        size = 100
+        with open(self.dest, "wb") as dest_file:
+            dest_file.truncate(size)
+        segments = [[0, 50, 10], [50, 100, 20]]
+        file_desc = os.open(self.dest, os.O_WRONLY)
+        dl = downloader.Downloader(self.url, self.dest)
+        dl.full_size = size
+        dl.save_journal(file_desc, '"etag"', segments)
+        os.close(file_desc)
+
+        dl = downloader.Downloader(self.url, self.dest)
+        dl.full_size = size
+        self.assertEqual(dl.load_journal('"etag"'), segments)
+        self.assertIsNone(dl.load_journal('"other-etag"'))
+        dl.full_size = 200
+        self.assertIsNone(dl.load_journal('"etag"'))
+
+    def test_journal_requires_a_validator(self):
+        size = 100
+        with open(self.dest, "wb") as dest_file:
+            dest_file.truncate(size)
+        file_desc = os.open(self.dest, os.O_WRONLY)
+        dl = downloader.Downloader(self.url, self.dest)
+        dl.full_size = size
+        dl.save_journal(file_desc, None, [[0, 100, 10]])
+        os.close(file_desc)
+        self.assertFalse(os.path.exists(self.dest + ".journal"))
+        with open(self.dest + ".journal", "w") as journal_file:
+            json.dump({"url": self.url, "size": size, "validator": None, "segments": [[0, 100, 10]]}, journal_file)
+        self.assertIsNone(dl.load_journal(None))
+
+    def test_cancel_before_the_response_creates_no_file(self):
+        dl = downloader.Downloader(self.url, self.dest)
+        response = Mock(status_code=200, url=self.url, headers={
+            "Content-Length": str(downloader.MIN_SEGMENT_SIZE * 4),
+            "Accept-Ranges": "bytes",
+            "ETag": '"etag"',
+        })
+
+        def get(*_args, **_kwargs):
+            dl.cancel()
+            return response
+
+        with patch("lutris.util.downloader.requests.get", side_effect=get):
+            dl.async_download()
+        self.assertEqual(os.listdir(self.download_dir), [])
+
+    def test_cancel_removes_the_journal(self):
+        for path in (self.dest, self.dest + ".journal"):
+            with open(path, "w"):
+                pass
+        downloader.Downloader(self.url, self.dest).cancel()
+        self.assertEqual(os.listdir(self.download_dir), [])
+
+
+class TestFileChecksums(TestCase):
+    def setUp(self):
+        self.file_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.file_dir, "setup.exe")
+        with open(self.path, "wb") as game_file:
+            game_file.write(b"lutris" * 1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.file_dir)
+
+    def test_checksum_is_computed_once(self):
+        expected = hashlib.sha256(b"lutris" * 1000).hexdigest()
+        self.assertEqual(system.get_cached_file_checksum(self.path, "sha256"), expected)
+        with patch("lutris.util.system.get_file_checksum") as get_file_checksum:
+            self.assertEqual(system.get_cached_file_checksum(self.path, "sha256"), expected)
+            get_file_checksum.assert_not_called()
+
+    def test_checksum_of_modified_file_is_computed_again(self):
+        system.save_file_checksum(self.path, "md5", "0" * 32)
+        with open(self.path, "ab") as game_file:
+            game_file.write(b"patch")
+        self.assertEqual(
+            system.get_cached_file_checksum(self.path, "md5"),
+            hashlib.md5(b"lutris" * 1000 + b"patch").hexdigest()
+        )
+
+
+class TestDownloadQueue(TestCase):
+    def start_download(self, downloader_instance):
+        downloader_instance.state = downloader_instance.DOWNLOADING
+        downloader_instance.full_size = 100
+
+    def test_downloads_are_limited(self):
+        queue = downloader.DownloadQueue(max_downloads=2)
+        for index in range(3):
+            queue.add("https://example.com/%d" % index, "/tmp/%d" % index)
+        with patch.object(downloader.Downloader, "start", autospec=True, side_effect=self.start_download):
+            with patch.object(downloader.Downloader, "check_progress", autospec=True):
+                queue.start()
+                self.assertEqual(len(queue.get_active_downloaders()), 2)
+                queue.downloaders[0].state = downloader.Downloader.COMPLETED
+                queue.downloaders[0].downloaded_size = 100
+                queue.check_progress()
+                self.assertEqual(len(queue.get_active_downloaders()), 2)
+                self.assertAlmostEqual(queue.progress_fraction, 1 / 3)
+                for downloader_instance in queue.downloaders:
+                    downloader_instance.state = downloader.Downloader.COMPLETED
+                self.assertEqual(queue.check_progress(), 1.0)
+                self.assertEqual(queue.state, queue.COMPLETED)
+
+    def test_failed_download_stops_the_queue(self):
+        queue = downloader.DownloadQueue(max_downloads=2)
+        for index in range(2):
+            queue.add("https://example.com/%d" % index, "/tmp/%d" % index)
+        with patch.object(downloader.Downloader, "start", autospec=True, side_effect=self.start_download):
+            with patch.object(downloader.Downloader, "cancel", autospec=True) as cancel:
+                queue.start()
+                queue.downloaders[0].state = downloader.Downloader.ERROR
+                queue.downloaders[0].error = "404"
+                queue.check_progress()
+        self.assertEqual(queue.state, queue.ERROR)
+        self.assertEqual(queue.error, "404")
+        cancel.assert_called_once_with(queue.downloaders[1], keep_files=True)
+
+    def test_failed_download_keeps_the_other_journals(self):
+        download_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, download_dir)
+        queue = downloader.DownloadQueue(max_downloads=2)
+        for index in range(2):
+            queue.add("https://example.com/%d" % index, os.path.join(download_dir, str(index)))
+        paths = [os.path.join(download_dir, "1"), os.path.join(download_dir, "1.journal")]
+        for path in paths:
+            with open(path, "w"):
+                pass
+        with patch.object(downloader.Downloader, "start", autospec=True, side_effect=self.start_download):
+            queue.start()
+            queue.downloaders[0].state = downloader.Downloader.ERROR
+            queue.check_progress()
+        self.assertTrue(queue.downloaders[1].stop_request.is_set())
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+        queue.downloaders[1].state = downloader.Downloader.DOWNLOADING
+        queue.cancel()
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+
+class TestArchiveStream(TestCase):
+    def setUp(self):
+        self.extract_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.extract_dir)
+
+    def get_response(self, data):
+        response = Mock()
+        response.iter_content.return_value = (
+            data[index:index + 1000] for index in range(0, len(data), 1000)
+        )
+        return response
+
+    def test_archive_is_extracted_from_the_response(self):
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:xz") as tar:
+            content = b"lutris" * 1000
+            info = tarfile.TarInfo("dxvk-1.0/x64/d3d11.dll")
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+        data = archive.getvalue()
+        archive_downloader = downloader.ArchiveDownloader(
+            "https://example.com/dxvk-1.0.tar.xz",
+            self.extract_dir,
+            checksum="md5:%s" % hashlib.md5(data).hexdigest()
+        )
+        archive_downloader.hasher = hashlib.md5()
+        stream = downloader.ResponseStream(archive_downloader, self.get_response(data))
+        temp_dir = extract.extract_tar_stream(stream, self.extract_dir, archive_downloader.mode)
+        extract.move_extracted(temp_dir, self.extract_dir)
+        self.assertEqual(archive_downloader.downloaded_size, len(data))
+        self.assertEqual(archive_downloader.hasher.hexdigest(), archive_downloader.expected_checksum)
+        with open(os.path.join(self.extract_dir, "x64", "d3d11.dll"), "rb") as dll_file:
+            self.assertEqual(dll_file.read(), content)
+
+    def test_failed_extraction_is_cleaned_up(self):
+        archive_downloader = downloader.ArchiveDownloader("https://example.com/a.tar.gz", self.extract_dir)
+        stream = downloader.ResponseStream(archive_downloader, self.get_response(b"not an archive"))
+        with self.assertRaises(extract.ExtractFailure):
+            extract.extract_tar_stream(stream, self.extract_dir, archive_downloader.mode)
+        self.assertEqual(os.listdir(self.extract_dir), [])
+
+
+class TestExtract(TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def write_archive(self, members):
+        archive_path = os.path.join(self.work_dir, "runner.tar.gz")
+        with tarfile.open(archive_path, "w:gz") as archive:
+            for info, content in members:
+                archive.addfile(info, io.BytesIO(content) if content is not None else None)
+        return archive_path
+
+    def test_tar_members_are_extracted(self):
+        library = tarfile.TarInfo("runner/lib/libfoo.so.1")
+        library.size = 5
+        library.mode = 0o755
+        symlink = tarfile.TarInfo("runner/lib/libfoo.so")
+        symlink.type = tarfile.SYMTYPE
+        symlink.linkname = "libfoo.so.1"
+        hardlink = tarfile.TarInfo("runner/bin/foo")
+        hardlink.type = tarfile.LNKTYPE
+        hardlink.linkname = "runner/lib/libfoo.so.1"
+        hardlink.mode = 0o755
+        archive_path = self.write_archive([
+            (library, b"libfo"), (symlink, None), (hardlink, None)
+        ])
+        dest = os.path.join(self.work_dir, "dest")
+        extract.extract_archive(archive_path, dest)
+        self.assertEqual(os.readlink(os.path.join(dest, "lib", "libfoo.so")), "libfoo.so.1")
+        self.assertEqual(os.stat(os.path.join(dest, "lib", "libfoo.so.1")).st_mode & 0o777, 0o755)
+        with open(os.path.join(dest, "bin", "foo"), "rb") as linked_file:
+            self.assertEqual(linked_file.read(), b"libfo")
+
+    def test_members_outside_of_destination_are_refused(self):
+        member = tarfile.TarInfo("../escaped")
+        member.size = 1
+        archive_path = self.write_archive([(member, b"x")])
+        with self.assertRaises(extract.ExtractFailure):
+            extract.extract_archive(archive_path, os.path.join(self.work_dir, "dest"))
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, "escaped")))
+
+    def test_members_written_through_symlinks_are_refused(self):
+        outside = os.path.join(self.work_dir, "outside")
+        os.makedirs(outside)
+        symlink = tarfile.TarInfo("lnk")
+        symlink.type = tarfile.SYMTYPE
+        symlink.linkname = outside
+        member = tarfile.TarInfo("lnk/evil")
+        member.size = 1
+        archive_path = self.write_archive([(symlink, None), (member, b"x")])
+        with self.assertRaises(extract.ExtractFailure):
+            extract.extract_archive(archive_path, os.path.join(self.work_dir, "dest"))
+        self.assertEqual(os.listdir(outside), [])
+
+    def test_hard_links_outside_of_destination_are_refused(self):
+        hardlink = tarfile.TarInfo("passwd")
+        hardlink.type = tarfile.LNKTYPE
+        hardlink.linkname = "../../outside"
+        archive_path = self.write_archive([(hardlink, None)])
+        with self.assertRaises(extract.ExtractFailure):
+            extract.extract_archive(archive_path, os.path.join(self.work_dir, "dest"))
+
+    def test_merged_files_are_moved(self):
+        source = os.path.join(self.work_dir, "source", "sub")
+        destination = os.path.join(self.work_dir, "destination")
+        os.makedirs(source)
+        os.makedirs(os.path.join(destination, "sub"))
+        with open(os.path.join(source, "file"), "w") as source_file:
+            source_file.write("new")
+        system.merge_folders(os.path.dirname(source), destination, move=True)
+        self.assertFalse(os.path.exists(os.path.join(source, "file")))
+        with open(os.path.join(destination, "sub", "file")) as merged_file:
+            self.assertEqual(merged_file.read(), "new")
+
+    def test_copied_files_keep_their_content_and_mode(self):
+        source = os.path.join(self.work_dir, "game.sh")
+        with open(source, "w") as source_file:
+            source_file.write("#!/bin/sh\n" * 1000)
+        os.chmod(source, 0o755)
+        destination = os.path.join(self.work_dir, "copy.sh")
+        system.copy_file(source, destination)
+        with open(destination) as copied_file:
+            self.assertEqual(copied_file.read(), "#!/bin/sh\n" * 1000)
+        self.assertEqual(os.stat(destination).st_mode & 0o777, 0o755)
+
+    def test_gzip_file_is_decompressed(self):
+        content = os.urandom(100) * 50000
+        with gzip.open(os.path.join(self.work_dir, "data.bin.gz"), "wb") as gzipped_file:
+            gzipped_file.write(content)
+        dest = os.path.join(self.work_dir, "dest")
+        os.makedirs(dest)
+        extract.decompress_gz(os.path.join(self.work_dir, "data.bin.gz"), dest)
+        with open(os.path.join(dest, "data.bin"), "rb") as data_file:
+            self.assertEqual(data_file.read(), content)
+
+
+class TestYamlCache(TestCase):
+    def setUp(self):
+        self.yaml_path = os.path.join(tempfile.mkdtemp(), "game.yml")
+        lutris_yaml.write_yaml_to_file(self.yaml_path, {"game": {"exe": "game.exe"}})
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.yaml_path))
+
+    def test_parsed_files_can_be_modified(self):
+        config = lutris_yaml.read_yaml_from_file(self.yaml_path)
+        config["game"]["exe"] = "other.exe"
+        self.assertEqual(lutris_yaml.read_yaml_from_file(self.yaml_path), {"game": {"exe": "game.exe"}})
+
+    def test_changed_files_are_parsed_again(self):
+        lutris_yaml.read_yaml_from_file(self.yaml_path)
+        with open(self.yaml_path, "w") as yaml_file:
+            yaml_file.write("game:\n  exe: setup.exe\n")
+        self.assertEqual(lutris_yaml.read_yaml_from_file(self.yaml_path), {"game": {"exe": "setup.exe"}})
+        lutris_yaml.write_yaml_to_file(self.yaml_path, {"game": {"exe": "other.exe"}})
+        self.assertEqual(lutris_yaml.read_yaml_from_file(self.yaml_path), {"game": {"exe": "other.exe"}})
+
+
+class TestPixbufCache(TestCase):
+    @staticmethod
+    def get_pixbuf(size):
+        pixbuf = Mock()
+        pixbuf.get_byte_length.return_value = size
+        return pixbuf
+
+    def test_least_recently_used_pixbufs_are_dropped(self):
+        cache = widget_utils.PixbufCache(max_size=300)
+        cache.add("a", self.get_pixbuf(100))
+        cache.add("b", self.get_pixbuf(100))
+        cache.add("c", self.get_pixbuf(100))
+        self.assertTrue(cache.get("a"))
+        cache.add("d", self.get_pixbuf(100))
+        self.assertIsNone(cache.get("b"))
+        self.assertTrue(cache.get("a"))
+        self.assertEqual(cache.size, 300)
+
+    def test_pixbufs_are_decoded_once(self):
+        loader = widget_utils.PixbufLoader()
+        pixbuf = self.get_pixbuf(100)
+        callbacks = [Mock(), Mock()]
+        with patch.object(widget_utils, "get_game_pixbuf_key", return_value=("key", )), \
+                patch.object(widget_utils, "get_default_game_pixbuf", return_value="placeholder"), \
+                patch.object(widget_utils, "load_game_pixbuf", return_value=pixbuf) as load_game_pixbuf:
+            for callback in callbacks:
+                self.assertEqual(loader.get_pixbuf("quake", "banner", True, callback), "placeholder")
+            loader.executor.shutdown(wait=True)
+        loader.flush()
+        self.assertEqual(load_game_pixbuf.call_count, 1)
+        for callback in callbacks:
+            callback.assert_called_once_with(pixbuf)
+
+    def test_cancelled_pixbufs_are_not_handed(self):
+        loader = widget_utils.PixbufLoader()
+        callback = Mock()
+        pixbuf = self.get_pixbuf(100)
+        with patch.object(widget_utils, "get_game_pixbuf_key", return_value=("key", )), \
+                patch.object(widget_utils, "get_default_game_pixbuf"), \
+                patch.object(widget_utils, "load_game_pixbuf", side_effect=lambda key: time.sleep(0.1) or pixbuf):
+            loader.get_pixbuf("quake", "banner", True, callback)
+            loader.cancel([callback])
+            loader.executor.shutdown(wait=True)
+        loader.flush()
+        callback.assert_not_called()
+
+    def test_cancel_keeps_other_requests(self):
+        loader = widget_utils.PixbufLoader(max_workers=1)
+        cancelled_callback, shared_callback, other_callback = Mock(), Mock(), Mock()
+        pixbufs = {("quake", ): self.get_pixbuf(100), ("doom", ): self.get_pixbuf(100)}
+        with patch.object(widget_utils, "get_game_pixbuf_key", side_effect=lambda slug, *args: (slug, )), \
+                patch.object(widget_utils, "get_default_game_pixbuf"), \
+                patch.object(widget_utils, "load_game_pixbuf", side_effect=lambda key: time.sleep(0.1) or pixbufs[key]):
+            loader.get_pixbuf("quake", "banner", True, cancelled_callback)
+            loader.get_pixbuf("quake", "banner", True, shared_callback)
+            loader.get_pixbuf("doom", "banner", True, other_callback)
+            loader.cancel([cancelled_callback])
+            loader.executor.shutdown(wait=True)
+        loader.flush()
+        cancelled_callback.assert_not_called()
+        shared_callback.assert_called_once_with(pixbufs[("quake", )])
+        other_callback.assert_called_once_with(pixbufs[("doom", )])
+
+
+class TestGameFilterIndex(TestCase):
+    def setUp(self):
+        self.index = GameFilterIndex()
+        self.index.add(1, "Quake", "linux", "Linux", True)
+        self.index.add(2, "Quake II", "wine", "Windows", False)
+        self.index.add(3, "Pokémon Snap", "mupen64plus", "Nintendo 64", True)
+
+    def search(self, **filters):
+        return sorted(self.index.get_keys(self.index.search(**filters)))
+
+    def test_names_are_searched(self):
+        self.assertEqual(self.search(text="qua"), [1, 2])
+        self.assertEqual(self.search(text="Quake I"), [2])
+        self.assertEqual(self.search(text="ake"), [1, 2])
+        self.assertEqual(self.search(text="pokemon"), [3])
+        self.assertEqual(self.search(text="Q"), [1, 2])
+        self.assertEqual(self.search(text="quake 3"), [])
+
+    def test_filters_are_combined(self):
+        self.assertEqual(self.search(installed=True), [1, 3])
+        self.assertEqual(self.search(text="quake", runner="wine"), [2])
+        self.assertEqual(self.search(text="quake", installed=True), [1])
+        self.assertEqual(self.search(platform="Linux"), [1])
+        self.assertTrue(self.index.is_match(1, text="QUAKE", installed=True))
+        self.assertFalse(self.index.is_match(2, text="quake", platform="Linux"))
+
+    def test_changed_games_are_searched(self):
+        self.assertEqual(self.search(text="quake"), [1, 2])
+        self.index.add(2, "Doom", "wine", "Windows", True)
+        self.index.remove(1)
+        self.assertEqual(self.search(text="quake"), [])
+        self.assertEqual(self.search(installed=True), [2, 3])
+        self.index.add(4, "Quake III Arena", "linux", "Linux", True)
+        self.assertEqual(self.search(text="quake", runner="linux"), [4])
+        self.assertEqual(len(self.index), 3)
+
+
+class LocalHTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        status, body, *headers = self.server.responses.get(self.path, (404, b""))
+        headers = headers[0] if headers else {}
+        if headers.get("Content-Encoding") == "gzip":
+            body = gzip.compress(body)
+        for header, request_header in (("ETag", "If-None-Match"), ("Last-Modified", "If-Modified-Since")):
+            if headers.get(header) and headers[header] == self.headers[request_header]:
+                status, body = 304, b""
+        self.server.statuses.append(status)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class LocalHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, responses):
+        super().__init__(("127.0.0.1", 0), LocalHTTPHandler)
+        self.responses = responses
+        self.connection_count = 0
+        self.statuses = []  # Status codes of the responses sent
+
+    def get_request(self):
+        self.connection_count += 1
+        return super().get_request()
+
+
+class TestRequest(TestCase):
+    def setUp(self):
+        self.server = LocalHTTPServer({
+            "/games": (200, b'{"results": [{"slug": "quake"}]}'),
+            "/banner.jpg": (200, b"\xff\xd8" * 1000),
+            "/empty": (200, b""),
+            "/private": (401, b""),
+        })
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_reads_json(self):
+        request = http.Request(self.url + "/games").get()
+        self.assertEqual(request.status_code, 200)
+        self.assertEqual(request.json, {"results": [{"slug": "quake"}]})
+
+    def test_sends_data_as_post(self):
+        request = http.Request(self.url + "/games").get(data=b'{"page": 2}')
+        self.assertEqual(request.json, {"page": 2})
+
+    def test_raises_errors(self):
+        with self.assertRaises(http.HTTPError):
+            http.Request(self.url + "/missing").get()
+        with self.assertRaises(http.UnauthorizedAccess):
+            http.Request(self.url + "/private").get()
+
+    def test_streams_to_file(self):
+        path = os.path.join(self.temp_dir, "banner.jpg")
+        request = http.Request(self.url + "/banner.jpg").get(stream=True)
+        self.assertEqual(request.total_size, 2000)
+        request.write_to_file(path)
+        with open(path, "rb") as banner_file:
+            self.assertEqual(banner_file.read(), b"\xff\xd8" * 1000)
+        self.assertEqual(request.downloaded_size, 2000)
+
+    def test_empty_body_writes_no_file(self):
+        path = os.path.join(self.temp_dir, "empty")
+        http.Request(self.url + "/empty").get(stream=True).write_to_file(path)
+        self.assertFalse(os.path.exists(path))
+
+    def test_stopped_request_has_no_content(self):
+        stop_request = threading.Event()
+        stop_request.set()
+        request = http.Request(self.url + "/games", stop_request=stop_request).get()
+        self.assertEqual(request.content, b"")
+
+    def test_reuses_connections(self):
+        for _index in range(5):
+            http.Request(self.url + "/games").get()
+        self.assertEqual(self.server.connection_count, 1)
+
+
+class TestHTTPCache(TestCase):
+    def setUp(self):
+        self.server = LocalHTTPServer({
+            "/games": (200, b'{"results": [{"slug": "quake"}]}', {"ETag": '"v1"'}),
+            "/runtimes": (200, b'[{"name": "Ubuntu-18.04"}]', {"Cache-Control": "max-age=60"}),
+            "/banner.jpg": (200, b"\xff\xd8" * 1000, {"Last-Modified": "Mon, 12 Oct 2020 10:00:00 GMT"}),
+            "/user": (200, b'{"username": "quake"}', {"ETag": '"v1"', "Cache-Control": "no-store"}),
+            "/library": (200, b'{"games": [%s]}' % b", ".join([b'{"slug": "quake"}'] * 500),
+                         {"ETag": '"v1"', "Content-Encoding": "gzip"}),
+        })
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = http_cache.HTTPCache(os.path.join(self.temp_dir, "http"))
+        patcher = patch.object(http_cache, "HTTP_CACHE", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_revalidates_response(self):
+        http.Request(self.url + "/games", cache=True).get()
+        request = http.Request(self.url + "/games", cache=True).get()
+        self.assertEqual(self.server.statuses, [200, 304])
+        self.assertTrue(request.from_cache)
+        self.assertEqual(request.json, {"results": [{"slug": "quake"}]})
+
+    def test_encoded_response_is_cached(self):
+        request = http.Request(self.url + "/library", cache=True).get()
+        self.assertLess(request.total_size, len(request.content))
+        request = http.Request(self.url + "/library", cache=True).get()
+        self.assertEqual(self.server.statuses, [200, 304])
+        self.assertEqual(len(request.json["games"]), 500)
+
+    def test_fresh_response_is_not_requested(self):
+        http.Request(self.url + "/runtimes", cache=True).get()
+        request = http.Request(self.url + "/runtimes", cache=True).get()
+        self.assertEqual(self.server.statuses, [200])
+        self.assertEqual(request.json, [{"name": "Ubuntu-18.04"}])
+
+    def test_request_body_is_part_of_key(self):
+        self.assertNotEqual(
+            http_cache.get_key(self.url + "/games", b'{"page": 1}'),
+            http_cache.get_key(self.url + "/games", b'{"page": 2}')
+        )
+
+    def test_no_store_response_is_not_cached(self):
+        http.Request(self.url + "/user", cache=True).get()
+        http.Request(self.url + "/user", cache=True).get()
+        self.assertEqual(self.server.statuses, [200, 200])
+
+    def test_file_is_kept_when_not_modified(self):
+        path = os.path.join(self.temp_dir, "banner.jpg")
+        http.Request(self.url + "/banner.jpg", cache=True).get(stream=True).write_to_file(path)
+        mtime = os.stat(path).st_mtime_ns
+        http.Request(self.url + "/banner.jpg", cache=True).get(stream=True).write_to_file(path)
+        self.assertEqual(self.server.statuses, [200, 304])
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+        self.assertFalse(os.listdir(os.path.join(self.temp_dir, "http", "bodies")))
+
+    def test_modified_file_is_downloaded(self):
+        path = os.path.join(self.temp_dir, "banner.jpg")
+        http.Request(self.url + "/banner.jpg", cache=True).get(stream=True).write_to_file(path)
+        with open(path, "wb") as banner_file:
+            banner_file.write(b"custom banner")
+        http.Request(self.url + "/banner.jpg", cache=True).get(stream=True).write_to_file(path)
+        self.assertEqual(self.server.statuses, [200, 200])
+        with open(path, "rb") as banner_file:
+            self.assertEqual(banner_file.read(), b"\xff\xd8" * 1000)
+
+    def test_expiry(self):
+        self.assertEqual(http_cache.get_expiry({"Cache-Control": "public, max-age=60"}, 1000), 1060)
+        self.assertEqual(http_cache.get_expiry({"Cache-Control": "max-age=60", "Age": "20"}, 1000), 1040)
+        self.assertEqual(http_cache.get_expiry({"Cache-Control": "no-cache, max-age=60"}, 1000), 1000)
+        self.assertEqual(http_cache.get_expiry({"Expires": "Thu, 01 Jan 1970 00:20:00 GMT"}, 1000), 1200)
+        self.assertEqual(http_cache.get_expiry({"Expires": "0"}, 1000), 1000)
+
+
+class TestAPIPages(TestCase):
+    def setUp(self):
+        self.requested_pages = []
+
+    def get_game_api_page(self, game_ids, page="1", query_type="games"):
+        self.requested_pages.append(int(page))
+        games = [{"slug": slug} for slug in game_ids[(int(page) - 1) * 2:int(page) * 2]]
+        return {
+            "count": len(game_ids),
+            "next": "/api/games?page=%d" % (int(page) + 1) if int(page) * 2 < len(game_ids) else None,
+            "results": games,
+        }
+
+    def test_reads_every_page(self):
+        slugs = ["quake", "doom", "hexen", "heretic", "strife"]
+        with patch.object(api, "get_game_api_page", self.get_game_api_page):
+            games = api.get_api_games(slugs)
+        self.assertEqual([game["slug"] for game in games], slugs)
+        self.assertEqual(sorted(self.requested_pages), [1, 2, 3])
+
+    def test_stops_at_failed_page(self):
+        slugs = ["quake", "doom", "hexen", "heretic", "strife"]
+
+        def get_game_api_page(game_ids, page="1", query_type="games"):
+            if page == "2":
+                return None
+            return self.get_game_api_page(game_ids, page, query_type)
+        with patch.object(api, "get_game_api_page", get_game_api_page):
+            games = api.get_api_games(slugs)
+        self.assertEqual([game["slug"] for game in games], ["quake", "doom"])